@@ -0,0 +1,169 @@
+"""e-Stat取得・変換処理のベンチマーク（ローカルのスタブサーバーに対してオフラインで実行）
+
+使い方:
+    python benchmark.py                                # small・1k・100kの全フィクスチャを計測
+    python benchmark.py --sizes small 1k --repeat 10
+    python benchmark.py --output bench.json            # 結果をJSONで保存
+    python benchmark.py --baseline bench.json          # 保存した結果より25%以上遅ければ終了コード1
+    python benchmark.py --no-streaming                 # 逐次解析（ijson）を使わない経路を計測
+    python benchmark.py --record                       # e-Statの実データをフィクスチャとして記録（APIキーが必要）
+
+ダッシュボードと同じ経路（EStatClient.get_stats_frame → normalize_stats_frame）で
+処理し、工程ごとの時間・ピークメモリ・1秒あたりの行数を出力する。
+リポジトリのフィクスチャ（small・1k）は合成データ。100kは初回実行時に同じ形の合成データを作って
+benchmarks/fixtures/ に保存する。
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+from benchmarks.fixtures import FIXTURE_COLUMN_MAPPING, FIXTURE_SIZES, load_fixture, record_fixture
+from benchmarks.stub_server import StubEStatServer
+from services.estat_client import EStatClient
+from services.instrumentation import configure_logging, get_logger, metrics
+from services.normalize import normalize_stats_frame
+from services.transport import CircuitBreaker, TokenBucket, Transport
+
+logger = get_logger("benchmark")
+
+# 結果に出力する工程（metricsの区間名 -> 表示名）
+STAGES = {
+    "estat.request": "HTTP",
+    "estat.parse": "JSON解析",
+    "estat.frame": "DataFrame作成",
+    "normalize.numeric": "数値変換",
+    "normalize.category": "分類コード",
+    "normalize.rename": "列名変換",
+    "normalize.time": "時間軸解析",
+    "normalize.sort": "並べ替え",
+    "normalize.dedupe": "重複削除",
+}
+
+
+def run_pipeline(client: EStatClient, stats_data_id: str) -> int:
+    """ダッシュボードと同じ取得・変換処理を1回実行し、変換後の行数を返す"""
+    df = client.get_stats_frame(stats_data_id)
+    return len(normalize_stats_frame(df, FIXTURE_COLUMN_MAPPING, dedupe=True))
+
+
+def benchmark_fixture(client: EStatClient, name: str, repeat: int) -> Dict:
+    """
+    1つのフィクスチャを計測（時間は中央値、メモリは時間計測とは別の1回で計測）
+
+    tracemallocは処理を遅くするため、ピークメモリの計測は時間の計測と分けて行う。
+    """
+    rows = FIXTURE_SIZES[name]
+    run_pipeline(client, name)  # ウォームアップ（接続の確立・ページのシリアライズ）
+
+    walls = []
+    stage_runs: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    for _ in range(repeat):
+        metrics.reset()
+        started = time.perf_counter()
+        run_pipeline(client, name)
+        walls.append(time.perf_counter() - started)
+        spans = metrics.snapshot()["spans"]
+        for stage in STAGES:
+            stage_runs[stage].append(spans.get(stage, {}).get("total", 0.0))
+
+    tracemalloc.start()
+    try:
+        run_pipeline(client, name)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    wall = statistics.median(walls)
+    return {
+        "rows": rows,
+        "wall": wall,
+        "rows_per_sec": rows / wall if wall else 0.0,
+        "peak_bytes": peak,
+        "stages": {stage: statistics.median(runs) for stage, runs in stage_runs.items()},
+    }
+
+
+def print_report(results: Dict[str, Dict]) -> None:
+    for name, result in results.items():
+        print(f"\n[{name}] {result['rows']:,}行")
+        print(f"  合計: {result['wall'] * 1000:.1f}ms  {result['rows_per_sec']:,.0f}行/秒  "
+              f"ピークメモリ: {result['peak_bytes'] / 1024 / 1024:.1f}MB")
+        for stage, label in STAGES.items():
+            print(f"    {result['stages'][stage] * 1000:8.1f}ms  {label}")
+
+
+def compare_with_baseline(results: Dict[str, Dict], baseline: Dict[str, Dict], max_regression: float) -> List[str]:
+    """基準より max_regression 以上遅い・メモリが多いフィクスチャの一覧"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for field, label in (("wall", "処理時間"), ("peak_bytes", "ピークメモリ")):
+            if base[field] and result[field] > base[field] * (1 + max_regression):
+                regressions.append(f"{name}: {label}が{(result[field] / base[field] - 1) * 100:.0f}%悪化しました")
+    return regressions
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="e-Stat取得・変換処理のベンチマーク")
+    parser.add_argument("--sizes", nargs="+", choices=list(FIXTURE_SIZES), default=list(FIXTURE_SIZES), help="計測するフィクスチャ")
+    parser.add_argument("--repeat", type=int, default=5, help="計測回数（中央値を採用）")
+    parser.add_argument("--output", help="結果を保存するJSONファイル")
+    parser.add_argument("--baseline", help="比較する過去の結果（JSONファイル）")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="許容する悪化の割合（0.25 = 25%%）")
+    parser.add_argument("--no-streaming", action="store_true", help="逐次解析を使わずresponse.json()で解析する")
+    parser.add_argument("--record", action="store_true", help="e-Statの実データをフィクスチャとして記録する")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    load_dotenv()
+    configure_logging()
+    args = parse_args(argv)
+
+    if args.record:
+        app_id = os.getenv("ESTAT_API_KEY")
+        if not app_id:
+            logger.error("エラー: APIキーが設定されていません。.envファイルを確認してください。")
+            return 1
+        client = EStatClient(app_id)
+        for name in args.sizes:
+            logger.info("%s: %d件を記録しました", name, record_fixture(client, name))
+        return 0
+
+    fixtures = {name: load_fixture(name) for name in args.sizes}
+
+    with StubEStatServer(fixtures) as server:
+        # 計測がレート制限・共有のブレーカーの影響を受けないよう専用の設定にする
+        client = EStatClient("benchmark", base_url=server.base_url, streaming=not args.no_streaming)
+        client.transport = Transport(client.session, rate_limiter=TokenBucket(1e9, 10 ** 9), breaker=CircuitBreaker())
+        results = {name: benchmark_fixture(client, name, args.repeat) for name in args.sizes}
+
+    print(f"JSON解析: {'逐次解析（ijson）' if client.streaming else 'response.json()'}")
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.max_regression)
+        for message in regressions:
+            logger.error(message)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
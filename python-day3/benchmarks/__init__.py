@@ -0,0 +1 @@
+"""e-Stat取得・変換処理のベンチマーク用フィクスチャとスタブサーバー"""
@@ -0,0 +1,108 @@
+"""
+ベンチマーク用のgetStatsDataレスポンス（フィクスチャ）の記録・生成・読み込み
+
+リポジトリに含めているsmall・1kは generate_fixture で作った合成データ（実データではない）。
+100kは大きいため含めず、初回の読み込み時に同じ方法で作る。
+`python benchmark.py --record` で実行すると、e-Statの実データで上書きする。
+"""
+import json
+import os
+import random
+from typing import Dict, List
+
+from services.estat_client import EStatClient
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# フィクスチャ名 -> 行数
+FIXTURE_SIZES = {
+    "small": 120,
+    "1k": 1000,
+    "100k": 100000,
+}
+
+# 記録・生成するデータの形（景気動向指数の長期系列と同じ列構成）
+FIXTURE_STATS_DATA_ID = "0003446461"
+FIXTURE_COLUMN_MAPPING = {
+    '@tab': '表番号',
+    '@cat01': '指標分類',
+    '@time': '時間軸',
+    '@unit': '単位',
+    '$': 'CI一致指数',
+}
+
+
+def _path(name: str) -> str:
+    return os.path.join(FIXTURE_DIR, f"{name}.json")
+
+
+def _wrap(values: List[Dict], stats_data_id: str) -> Dict:
+    """VALUEのリストをgetStatsDataのレスポンス形式にする"""
+    return {
+        "GET_STATS_DATA": {
+            "RESULT": {"STATUS": 0, "ERROR_MSG": "正常に終了しました。"},
+            "PARAMETER": {"STATS_DATA_ID": stats_data_id},
+            "STATISTICAL_DATA": {
+                "RESULT_INF": {"TOTAL_NUMBER": len(values), "FROM_NUMBER": 1, "TO_NUMBER": len(values)},
+                "TABLE_INF": {"@id": stats_data_id},
+                "DATA_INF": {"VALUE": values},
+            },
+        }
+    }
+
+
+def generate_fixture(rows: int, seed: int = 0) -> Dict:
+    """
+    記録済みのレスポンスと同じ形の合成データを作る（同じ引数なら常に同じ内容）
+
+    分類コードごとに1980年からの月次系列を並べ、改訂による時間軸の重複と
+    欠損値（"-"）を少し混ぜる。
+    """
+    rng = random.Random(seed)
+    months = 12 * 45
+    values = []
+    while len(values) < rows:
+        code = f"{100 + len(values) // months:03d}"
+        month = len(values) % months
+        year, m = 1980 + month // 12, month % 12 + 1
+        value = "-" if rng.random() < 0.01 else f"{80 + rng.random() * 40:.1f}"
+        values.append({
+            "@tab": "100",
+            "@cat01": code,
+            "@time": f"{year}00{m:02d}{m:02d}",
+            "@unit": "2020年=100",
+            "$": value,
+        })
+        if rng.random() < 0.02 and len(values) < rows:
+            values.append({**values[-1], "$": f"{80 + rng.random() * 40:.1f}"})
+    return _wrap(values[:rows], FIXTURE_STATS_DATA_ID)
+
+
+def record_fixture(client: EStatClient, name: str, stats_data_id: str = FIXTURE_STATS_DATA_ID) -> int:
+    """e-Statから実データを取得してフィクスチャとして保存（行数を返す）"""
+    values = []
+    for value in client.iter_values(stats_data_id):
+        values.append(value)
+        if len(values) >= FIXTURE_SIZES[name]:
+            break
+    _save(name, _wrap(values, stats_data_id))
+    return len(values)
+
+
+def _save(name: str, fixture: Dict) -> None:
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    tmp_path = f"{_path(name)}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(fixture, f, ensure_ascii=False)
+    os.replace(tmp_path, _path(name))
+
+
+def load_fixture(name: str) -> Dict:
+    """記録済みのフィクスチャを読み込む（未記録なら合成データを作って保存）"""
+    try:
+        with open(_path(name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        fixture = generate_fixture(FIXTURE_SIZES[name])
+        _save(name, fixture)
+        return fixture
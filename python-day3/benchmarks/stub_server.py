@@ -0,0 +1,118 @@
+"""フィクスチャを返すe-Stat APIのスタブサーバー（ベンチマークをオフラインで実行するため）"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "StubEStatServer"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if not url.path.endswith("/getStatsData"):
+            self._send(404, {"error": f"未対応のエンドポイントです: {url.path}"})
+            return
+
+        stats_data_id = query.get("statsDataId", "")
+        if stats_data_id not in self.server.fixtures:
+            body = {"GET_STATS_DATA": {"RESULT": {"STATUS": 100, "ERROR_MSG": f"統計表IDが存在しません: {stats_data_id}"}}}
+            self._send(200, body)
+            return
+
+        # 統計表が更新されていなければ、e-Statと同じく条件付きリクエストに304を返す
+        etag = self.server.etag(stats_data_id)
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        start = int(query.get("startPosition", 1))
+        limit = int(query.get("limit", 100000))
+        self._send_bytes(200, self.server.page(stats_data_id, start, limit), {"ETag": etag})
+
+    def _send(self, status: int, body: Dict) -> None:
+        self._send_bytes(status, json.dumps(body, ensure_ascii=False).encode("utf-8"))
+
+    def _send_bytes(self, status: int, payload: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # 計測結果の出力にアクセスログを混ぜない
+
+
+class StubEStatServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, fixtures: Dict[str, Dict]):
+        """
+        Args:
+            fixtures: 統計表ID -> getStatsDataのレスポンス（startPosition・limitに応じてページ分割して返す）
+        """
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.fixtures = fixtures
+        self._revisions: Dict[str, int] = {}
+        self._pages: Dict[Tuple[str, int, int], bytes] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/rest/3.0/app/json"
+
+    def etag(self, stats_data_id: str) -> str:
+        """統計表のETag（reviseで差し替えるたびに変わる）"""
+        with self._lock:
+            return f'"{stats_data_id}-{self._revisions.get(stats_data_id, 0)}"'
+
+    def revise(self, stats_data_id: str, fixture: Dict) -> None:
+        """統計表の内容を差し替える（e-Statでの改訂・追加公表の代わり）"""
+        with self._lock:
+            self.fixtures[stats_data_id] = fixture
+            self._revisions[stats_data_id] = self._revisions.get(stats_data_id, 0) + 1
+            self._pages = {key: page for key, page in self._pages.items() if key[0] != stats_data_id}
+
+    def page(self, stats_data_id: str, start: int, limit: int) -> bytes:
+        """1ページ分のレスポンス（計測にサーバー側の処理時間が混ざらないよう、作ったものは使い回す）"""
+        key = (stats_data_id, start, limit)
+        with self._lock:
+            if key in self._pages:
+                return self._pages[key]
+
+        fixture = self.fixtures[stats_data_id]["GET_STATS_DATA"]
+        statistical_data = fixture["STATISTICAL_DATA"]
+        values = statistical_data["DATA_INF"]["VALUE"]
+        chunk = values[start - 1:start - 1 + limit]
+
+        result_inf = {"TOTAL_NUMBER": len(values), "FROM_NUMBER": start, "TO_NUMBER": start + len(chunk) - 1}
+        if start - 1 + limit < len(values):
+            result_inf["NEXT_KEY"] = start + limit
+
+        body = {
+            "GET_STATS_DATA": {
+                **fixture,
+                "STATISTICAL_DATA": {**statistical_data, "RESULT_INF": result_inf, "DATA_INF": {"VALUE": chunk}},
+            }
+        }
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            self._pages[key] = payload
+        return payload
+
+    def __enter__(self) -> "StubEStatServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+        self.server_close()
@@ -1,520 +1,197 @@
 import streamlit as st
 import os
 from dotenv import load_dotenv
-import requests
 import pandas as pd
-import json
 import plotly.express as px
-import plotly.graph_objects as go
+from functools import partial
 
-# 環境変数の読み込み
-load_dotenv()
-
-# APIキーの取得
-ESTAT_API_KEY = os.getenv("ESTAT_API_KEY")
+from services.catalog import SERIES_CATALOG
+from services.charts import ChartConfig, figure_cache, figure_key
+from services.derived import DERIVED_METRICS, RAW_METRIC, derived_cache
+from services.indicators import Indicator, IndicatorRegistry, load_concurrently
+from services.instrumentation import configure_logging, get_logger, metrics
+from services.series import build_engine
 
-# ページの設定
+# ページの設定（最初のStreamlitコマンドでなければならないため、キャッシュしたリソースの作成より前に呼ぶ）
 st.set_page_config(
     page_title="国内の経済指標",
     page_icon="📊",
     layout="wide"
 )
 
-# タイトル
-st.title("国内の経済指標")
+# 環境変数の読み込み
+load_dotenv()
 
-# 景気動向指数データ取得関数
-@st.cache_data
-def get_keiki_data():
-    """e-StatのAPIから景気動向指数を取得"""
+# ログ設定（DASHBOARD_LOG_LEVEL=DEBUGで詳細なデータも出力）
+configure_logging()
+logger = get_logger("fetch")
 
-    print("=" * 60)
-    print("景気動向指数データの取得を開始します")
-    print("=" * 60)
+# APIキーの取得
+ESTAT_API_KEY = os.getenv("ESTAT_API_KEY")
 
-    if not ESTAT_API_KEY:
-        error_msg = "エラー: APIキーが設定されていません。.envファイルを確認してください。"
-        print(error_msg)
-        return None, error_msg
+# DASHBOARD_OFFLINE=1 ならe-Statにアクセスせず、export.pyで保存済みのデータだけを表示する
+OFFLINE = os.getenv("DASHBOARD_OFFLINE", "0") == "1"
 
-    print(f"APIキー: {ESTAT_API_KEY[:10]}...")
-
-    # e-Stat APIのエンドポイント
-    url = "https://api.e-stat.go.jp/rest/3.0/app/json/getStatsData"
-
-    # 景気動向指数の統計表ID（長期系列）
-    stats_data_id = "0003446461"  # 景気動向指数 長期系列
-
-    params = {
-        "appId": ESTAT_API_KEY,
-        "statsDataId": stats_data_id,
-        "cdCat01": "100",  # CI一致指数
-        "limit": 1000,  # できるだけ多くのデータを取得（全期間）
-        "metaGetFlg": "Y",  # メタ情報も取得
-    }
-
-    print(f"\nリクエストURL: {url}")
-    print(f"統計表ID: {stats_data_id}")
-    print(f"パラメータ: {json.dumps(params, indent=2, ensure_ascii=False)}")
-
-    try:
-        print("\nAPIリクエストを送信中...")
-        response = requests.get(url, params=params, timeout=30)
-
-        print(f"ステータスコード: {response.status_code}")
-        print(f"レスポンスヘッダー: {dict(response.headers)}")
-
-        # ステータスコードの確認
-        if response.status_code != 200:
-            error_msg = f"APIリクエストエラー: ステータスコード {response.status_code}"
-            print(f"\n{error_msg}")
-            print(f"レスポンス本文:\n{response.text[:500]}")
-            return None, error_msg
-
-        # JSONデータの解析
-        print("\nJSONデータを解析中...")
-        data = response.json()
-
-        # レスポンスの構造を確認
-        print(f"\nレスポンスのキー: {list(data.keys())}")
-
-        # エラーチェック
-        if "GET_STATS_DATA" not in data:
-            error_msg = f"予期しないレスポンス形式: {json.dumps(data, indent=2, ensure_ascii=False)[:500]}"
-            print(f"\n{error_msg}")
-            return None, error_msg
-
-        result = data["GET_STATS_DATA"]["STATISTICAL_DATA"]
-
-        # データが存在するか確認
-        if "DATA_INF" not in result or "VALUE" not in result["DATA_INF"]:
-            error_msg = "データが見つかりませんでした"
-            print(f"\n{error_msg}")
-            print(f"利用可能なキー: {list(result.keys())}")
-            return None, error_msg
-
-        values = result["DATA_INF"]["VALUE"]
-
-        print(f"\n取得したデータ件数: {len(values)}件")
-        print(f"サンプルデータ（最初の3件）:")
-        for i, val in enumerate(values[:3]):
-            print(f"  {i+1}. {json.dumps(val, indent=4, ensure_ascii=False)}")
-
-        # データフレームに変換
-        df = pd.DataFrame(values)
-
-        print(f"\nデータフレームの形状: {df.shape}")
-        print(f"カラム: {list(df.columns)}")
-        print(f"\nデータフレームのサンプル:")
-        print(df.head())
-
-        # 列名を日本語に変換
-        column_mapping = {
-            '@tab': '表番号',
-            '@cat01': '指標分類',
-            '@time': '時間軸',
-            '@unit': '単位',
-            '$': 'CI一致指数'
-        }
-
-        df = df.rename(columns=column_mapping)
-
-        # 時間軸を読みやすい形式に変換（例: 1985000101 -> 1985年1月）
-        if '時間軸' in df.columns:
-            def format_time(time_str):
-                try:
-                    time_str = str(time_str)
-                    if len(time_str) >= 10:
-                        year = time_str[0:4]
-                        month = time_str[6:8]
-                        return f"{year}年{month}月"
-                    return time_str
-                except:
-                    return time_str
-
-            df['年月'] = df['時間軸'].apply(format_time)
-
-        # CI一致指数を数値型に変換
-        if 'CI一致指数' in df.columns:
-            df['CI一致指数'] = pd.to_numeric(df['CI一致指数'], errors='coerce')
-
-        # 時間軸で降順ソートして重複を削除（最新のデータを優先）
-        if '時間軸' in df.columns:
-            df = df.sort_values('時間軸', ascending=False)
-            df = df.drop_duplicates(subset=['時間軸'], keep='first')
-            print(f"\n重複削除後のデータ件数: {len(df)}件")
-
-        print(f"\n列名を日本語に変換しました")
-        print(f"変換後のカラム: {list(df.columns)}")
-        print(f"\n変換後のデータフレームのサンプル（最新順）:")
-        print(df.head(15))
-
-        print("\n" + "=" * 60)
-        print("データ取得成功")
-        print("=" * 60)
-
-        return df, None
-
-    except requests.exceptions.Timeout:
-        error_msg = "エラー: APIリクエストがタイムアウトしました"
-        print(f"\n{error_msg}")
-        return None, error_msg
 
-    except requests.exceptions.RequestException as e:
-        error_msg = f"エラー: リクエスト中に問題が発生しました - {str(e)}"
-        print(f"\n{error_msg}")
-        return None, error_msg
+@st.cache_resource
+def get_series_engine():
+    """
+    系列カタログの取得・変換エンジン
 
-    except json.JSONDecodeError as e:
-        error_msg = f"エラー: JSONの解析に失敗しました - {str(e)}"
-        print(f"\n{error_msg}")
-        print(f"レスポンステキスト: {response.text[:500]}")
-        return None, error_msg
+    Streamlitの再実行ごとに作り直すとHTTP接続が使い回せないため、プロセスで1つだけ作る。
+    """
+    return build_engine(ESTAT_API_KEY, SERIES_CATALOG, offline=OFFLINE)
 
-    except Exception as e:
-        error_msg = f"エラー: 予期しないエラーが発生しました - {type(e).__name__}: {str(e)}"
-        print(f"\n{error_msg}")
-        import traceback
-        print(f"トレースバック:\n{traceback.format_exc()}")
-        return None, error_msg
 
+series_engine = get_series_engine()
 
-# 消費者物価指数データ取得関数
-@st.cache_data
-def get_cpi_data():
-    """e-StatのAPIから消費者物価指数（CPI）を取得"""
+# タイトル
+st.title("国内の経済指標")
 
-    print("=" * 60)
-    print("消費者物価指数データの取得を開始します")
-    print("=" * 60)
 
-    if not ESTAT_API_KEY:
+# 系列データ取得関数（ワーカースレッドから呼ぶため、Streamlitの機能は使わずサービス層だけで取得する）
+def fetch_series_data(key):
+    """e-StatのAPIからカタログの系列を取得"""
+    if not ESTAT_API_KEY and not OFFLINE:
         error_msg = "エラー: APIキーが設定されていません。.envファイルを確認してください。"
-        print(error_msg)
+        logger.error(error_msg)
         return None, error_msg
 
-    print(f"APIキー: {ESTAT_API_KEY[:10]}...")
-
-    # e-Stat APIのエンドポイント
-    url = "https://api.e-stat.go.jp/rest/3.0/app/json/getStatsData"
-
-    # 消費者物価指数の統計表ID
-    # 総務省統計局の消費者物価指数（2020年基準）
-    stats_data_id = "0003427113"  # 2020年基準消費者物価指数
-
-    params = {
-        "appId": ESTAT_API_KEY,
-        "statsDataId": stats_data_id,
-        "cdCat01": "0001",  # 総合指数
-        "cdArea": "13A01",  # 全国
-        "limit": 50,  # より多くのデータを取得
-        "metaGetFlg": "Y",  # メタ情報も取得
-    }
-
-    print(f"\nリクエストURL: {url}")
-    print(f"統計表ID: {stats_data_id}")
-    print(f"パラメータ: {json.dumps(params, indent=2, ensure_ascii=False)}")
-
-    try:
-        print("\nAPIリクエストを送信中...")
-        response = requests.get(url, params=params, timeout=30)
-
-        print(f"ステータスコード: {response.status_code}")
-        print(f"レスポンスヘッダー: {dict(response.headers)}")
-
-        # ステータスコードの確認
-        if response.status_code != 200:
-            error_msg = f"APIリクエストエラー: ステータスコード {response.status_code}"
-            print(f"\n{error_msg}")
-            print(f"レスポンス本文:\n{response.text[:500]}")
-            return None, error_msg
-
-        # JSONデータの解析
-        print("\nJSONデータを解析中...")
-        data = response.json()
-
-        # レスポンスの構造を確認
-        print(f"\nレスポンスのキー: {list(data.keys())}")
-
-        # エラーチェック
-        if "GET_STATS_DATA" not in data:
-            error_msg = f"予期しないレスポンス形式: {json.dumps(data, indent=2, ensure_ascii=False)[:500]}"
-            print(f"\n{error_msg}")
-            return None, error_msg
-
-        result = data["GET_STATS_DATA"]["STATISTICAL_DATA"]
-
-        # データが存在するか確認
-        if "DATA_INF" not in result or "VALUE" not in result["DATA_INF"]:
-            error_msg = "データが見つかりませんでした"
-            print(f"\n{error_msg}")
-            print(f"利用可能なキー: {list(result.keys())}")
-            return None, error_msg
-
-        values = result["DATA_INF"]["VALUE"]
-
-        print(f"\n取得したデータ件数: {len(values)}件")
-        print(f"サンプルデータ（最初の3件）:")
-        for i, val in enumerate(values[:3]):
-            print(f"  {i+1}. {json.dumps(val, indent=4, ensure_ascii=False)}")
-
-        # データフレームに変換
-        df = pd.DataFrame(values)
-
-        print(f"\nデータフレームの形状: {df.shape}")
-        print(f"カラム: {list(df.columns)}")
-        print(f"\nデータフレームのサンプル:")
-        print(df.head())
-
-        # 列名を日本語に変換
-        column_mapping = {
-            '@tab': '表番号',
-            '@cat01': '品目分類',
-            '@area': '地域コード',
-            '@time': '時間軸',
-            '@unit': '単位',
-            '$': '指数値'
-        }
-
-        df = df.rename(columns=column_mapping)
-
-        # 時間軸を読みやすい形式に変換（例: 2025001111 -> 2025年11月）
-        if '時間軸' in df.columns:
-            def format_time(time_str):
-                try:
-                    time_str = str(time_str)
-                    if len(time_str) >= 10:
-                        year = time_str[0:4]
-                        month = time_str[6:8]
-                        return f"{year}年{month}月"
-                    return time_str
-                except:
-                    return time_str
-
-            df['年月'] = df['時間軸'].apply(format_time)
-
-        # 指数値を数値型に変換
-        if '指数値' in df.columns:
-            df['指数値'] = pd.to_numeric(df['指数値'], errors='coerce')
-
-        print(f"\n列名を日本語に変換しました")
-        print(f"変換後のカラム: {list(df.columns)}")
-        print(f"\n変換後のデータフレームのサンプル:")
-        print(df.head())
-
-        print("\n" + "=" * 60)
-        print("データ取得成功")
-        print("=" * 60)
-
-        return df, None
-
-    except requests.exceptions.Timeout:
-        error_msg = "エラー: APIリクエストがタイムアウトしました"
-        print(f"\n{error_msg}")
-        return None, error_msg
-
-    except requests.exceptions.RequestException as e:
-        error_msg = f"エラー: リクエスト中に問題が発生しました - {str(e)}"
-        print(f"\n{error_msg}")
-        return None, error_msg
+    return series_engine.fetch_series(key)
 
-    except json.JSONDecodeError as e:
-        error_msg = f"エラー: JSONの解析に失敗しました - {str(e)}"
-        print(f"\n{error_msg}")
-        print(f"レスポンステキスト: {response.text[:500]}")
-        return None, error_msg
 
-    except Exception as e:
-        error_msg = f"エラー: 予期しないエラーが発生しました - {type(e).__name__}: {str(e)}"
-        print(f"\n{error_msg}")
-        import traceback
-        print(f"トレースバック:\n{traceback.format_exc()}")
-        return None, error_msg
+@st.cache_data(show_spinner=False)
+def get_catalog_data(keys):
+    """
+    カタログの系列を並列取得して 系列キー -> (データ, エラーメッセージ) を返す
 
-# データ取得
-st.header("消費者物価指数（CPI）")
+    st.cache_dataはスクリプトのスレッド（ScriptRunContextがある）で呼ぶこの関数にだけ付け、
+    ワーカースレッドではfetch_series_dataを直接呼ぶ。
+    """
+    # 全指標を共有セッションで並列取得（待ち時間は最も遅い指標の分だけ）
+    indicators = [registry.get(key) for key in keys]
+    return {indicator.key: result for indicator, result in load_concurrently(indicators)}
 
-with st.spinner("データを取得中..."):
-    df, error = get_cpi_data()
 
-if error:
-    st.error(f"エラーが発生しました: {error}")
-    st.info("コンソールで詳細なエラーメッセージを確認してください。")
-elif df is not None:
+def render_series(spec, df):
+    """系列のグラフと表を表示"""
     st.success(f"データを取得しました（{len(df)}件）")
+    if spec.unit:
+        st.caption(f"単位: {spec.unit}")
+
+    # 派生指標を選んだ場合は、計算済みの全指標から選んだ列だけを追加する（切り替えても再計算しない）
+    value_column = spec.value_column
+    chart_title = spec.chart_title
+    if selected_metric != RAW_METRIC and spec.value_column in df.columns:
+        with metrics.span(f"{spec.key}.derived", logger):
+            derived = derived_cache.get(spec.key, df[spec.value_column])
+        df = df.join(derived[[selected_metric]])
+        value_column = selected_metric
+        chart_title = f"{spec.chart_title}（{selected_metric}）"
 
     # 表示用に必要な列だけを選択
-    display_columns = []
-    if '年月' in df.columns:
-        display_columns.append('年月')
-    if '指数値' in df.columns:
-        display_columns.append('指数値')
-    if '品目分類' in df.columns:
-        display_columns.append('品目分類')
-    if '地域コード' in df.columns:
-        display_columns.append('地域コード')
+    display_columns = [column for column in spec.display_columns if column in df.columns]
+    if value_column != spec.value_column:
+        display_columns.insert(2, value_column)
 
     if display_columns:
         df_display = df[display_columns].copy()
     else:
         df_display = df
 
-    # データを古い順に並べ替え（グラフ用）
-    if '年月' in df_display.columns:
-        df_chart = df_display.sort_values('年月', ascending=True).copy()
-    else:
-        df_chart = df_display.copy()
+    # データを古い順に並べ替え（グラフ用、indexは時点）
+    df_chart = df_display.sort_index(ascending=True)
 
     # 折れ線グラフの作成
-    if '年月' in df_chart.columns and '指数値' in df_chart.columns:
-        st.subheader("📈 消費者物価指数の推移")
-
-        # Plotlyで折れ線グラフを作成
-        fig = go.Figure()
-
-        fig.add_trace(go.Scatter(
-            x=df_chart['年月'],
-            y=df_chart['指数値'],
-            mode='lines+markers',
-            name='消費者物価指数',
-            line=dict(color='#1f77b4', width=3),
-            marker=dict(size=6),
-            hovertemplate='<b>%{x}</b><br>指数値: %{y}<extra></extra>'
-        ))
-
-        fig.update_layout(
-            title={
-                'text': '消費者物価指数（2020年基準）の推移',
-                'x': 0.5,
-                'xanchor': 'center'
-            },
-            xaxis=dict(
-                title='年月',
-                showgrid=True,
-                gridwidth=1,
-                gridcolor='lightgray'
-            ),
-            yaxis=dict(
-                title='指数値',
-                showgrid=True,
-                gridwidth=1,
-                gridcolor='lightgray'
-            ),
-            hovermode='x unified',
-            height=500,
-            template='plotly_white',
-            font=dict(size=12),
-            showlegend=True
+    if '年月' in df_chart.columns and value_column in df_chart.columns:
+        st.subheader(f"📈 {spec.name}の推移")
+
+        # 同じデータ・設定なら前回の図を再利用し、長期系列はLTTBで間引いて描画
+        chart_config = ChartConfig(
+            title=chart_title,
+            value_column=value_column,
+            name=spec.series_name or spec.name,
+            color=spec.color,
+            max_points=chart_max_points
         )
+        fig = figure_cache.get_figure(df_chart[value_column], chart_config)
 
-        st.plotly_chart(fig, use_container_width=True)
+        # データと設定が変わらない間は同じキーになり、ブラウザ側のグラフ（ズーム状態など）を作り直さない
+        st.plotly_chart(fig, use_container_width=True, key=figure_key(df_chart[value_column], chart_config))
 
     # データを新しい順に並べ替え（テーブル表示用）
-    if '年月' in df_display.columns:
-        df_display = df_display.sort_values('年月', ascending=False)
+    df_display = df_display.sort_index(ascending=False)
 
     # 直近12ヶ月のデータに絞る
     df_recent = df_display.head(12)
 
     st.subheader("📊 直近12ヶ月のデータ")
-    st.dataframe(df_recent, use_container_width=True)
+    st.dataframe(df_recent, use_container_width=True, hide_index=True)
 
     # 全データも表示
     with st.expander("全データを表示"):
-        st.dataframe(df_display, use_container_width=True)
+        st.dataframe(df_display, use_container_width=True, hide_index=True)
 
-else:
-    st.warning("データが取得できませんでした")
 
-# 景気動向指数セクション
-st.header("景気動向指数（CI一致指数）")
+# グラフの表示設定
+downsample_enabled = st.sidebar.checkbox("長期系列を間引いて表示（LTTB）", value=True)
+chart_max_points = None
+if downsample_enabled:
+    chart_max_points = int(st.sidebar.number_input("グラフの最大表示点数", min_value=50, max_value=5000, value=500, step=50))
 
-with st.spinner("データを取得中..."):
-    df_keiki, error_keiki = get_keiki_data()
-
-if error_keiki:
-    st.error(f"エラーが発生しました: {error_keiki}")
-    st.info("コンソールで詳細なエラーメッセージを確認してください。")
-elif df_keiki is not None:
-    st.success(f"データを取得しました（{len(df_keiki)}件）")
-
-    # 表示用に必要な列だけを選択
-    display_columns_keiki = []
-    if '年月' in df_keiki.columns:
-        display_columns_keiki.append('年月')
-    if 'CI一致指数' in df_keiki.columns:
-        display_columns_keiki.append('CI一致指数')
-    if '指標分類' in df_keiki.columns:
-        display_columns_keiki.append('指標分類')
-
-    if display_columns_keiki:
-        df_keiki_display = df_keiki[display_columns_keiki].copy()
-    else:
-        df_keiki_display = df_keiki
-
-    # データを古い順に並べ替え（グラフ用）
-    if '年月' in df_keiki_display.columns:
-        df_keiki_chart = df_keiki_display.sort_values('年月', ascending=True).copy()
-    else:
-        df_keiki_chart = df_keiki_display.copy()
+# 表示する指標（前年比・移動平均などは取得済みデータから計算）
+selected_metric = st.sidebar.selectbox(
+    "表示する指標",
+    [RAW_METRIC, *DERIVED_METRICS],
+    format_func=lambda name: name if name == RAW_METRIC else f"{name}（{DERIVED_METRICS[name]}）"
+)
 
-    # 折れ線グラフの作成
-    if '年月' in df_keiki_chart.columns and 'CI一致指数' in df_keiki_chart.columns:
-        st.subheader("📈 景気動向指数の推移")
-
-        # Plotlyで折れ線グラフを作成
-        fig_keiki = go.Figure()
-
-        fig_keiki.add_trace(go.Scatter(
-            x=df_keiki_chart['年月'],
-            y=df_keiki_chart['CI一致指数'],
-            mode='lines+markers',
-            name='CI一致指数',
-            line=dict(color='#ff7f0e', width=3),
-            marker=dict(size=6),
-            hovertemplate='<b>%{x}</b><br>CI一致指数: %{y}<extra></extra>'
-        ))
-
-        fig_keiki.update_layout(
-            title={
-                'text': '景気動向指数（CI一致指数）の推移',
-                'x': 0.5,
-                'xanchor': 'center'
-            },
-            xaxis=dict(
-                title='年月',
-                showgrid=True,
-                gridwidth=1,
-                gridcolor='lightgray'
-            ),
-            yaxis=dict(
-                title='CI一致指数',
-                showgrid=True,
-                gridwidth=1,
-                gridcolor='lightgray'
-            ),
-            hovermode='x unified',
-            height=500,
-            template='plotly_white',
-            font=dict(size=12),
-            showlegend=True
+# カタログの全系列を登録（カタログの順に表示）
+registry = IndicatorRegistry()
+for spec in SERIES_CATALOG:
+    registry.register(Indicator(
+        spec.key,
+        spec.title,
+        partial(fetch_series_data, spec.key),
+        partial(render_series, spec),
+        timeout=spec.timeout
+    ))
+
+# 各指標の表示枠を先に確保しておき、取得が終わったら描画する
+placeholders = {}
+for indicator in registry:
+    st.header(indicator.title)
+    placeholders[indicator.key] = st.empty()
+    placeholders[indicator.key].info("データを取得中...")
+
+catalog_data = get_catalog_data(tuple(indicator.key for indicator in registry))
+for indicator in registry:
+    data, error = catalog_data[indicator.key]
+    with placeholders[indicator.key].container():
+        if error:
+            st.error(f"エラーが発生しました: {error}")
+            st.info("コンソールで詳細なエラーメッセージを確認してください。")
+        elif data is not None:
+            with metrics.span(f"{indicator.key}.render", logger):
+                indicator.render(data)
+        else:
+            st.warning("データが取得できませんでした")
+
+# 取得できなかった系列があれば結果をキャッシュに残さず、次の再実行で取得し直す
+if any(error or data is None for data, error in catalog_data.values()):
+    get_catalog_data.clear()
+
+# 処理時間の内訳（どのフェーズでページの待ち時間が発生しているかを確認する）
+with st.sidebar.expander("⏱️ 処理時間の内訳"):
+    snapshot = metrics.snapshot()
+    if snapshot["spans"]:
+        st.dataframe(
+            pd.DataFrame([
+                {"処理": name, "回数": stats["count"], "合計(ms)": stats["total"] * 1000, "最大(ms)": stats["max"] * 1000}
+                for name, stats in sorted(snapshot["spans"].items())
+            ]),
+            use_container_width=True,
+            hide_index=True
         )
-
-        st.plotly_chart(fig_keiki, use_container_width=True)
-
-    # データを新しい順に並べ替え（テーブル表示用）
-    if '年月' in df_keiki_display.columns:
-        df_keiki_display = df_keiki_display.sort_values('年月', ascending=False)
-
-    # 直近12ヶ月のデータに絞る
-    df_keiki_recent = df_keiki_display.head(12)
-
-    st.subheader("📊 直近12ヶ月のデータ")
-    st.dataframe(df_keiki_recent, use_container_width=True)
-
-    # 全データも表示
-    with st.expander("全データを表示"):
-        st.dataframe(df_keiki_display, use_container_width=True)
-
-else:
-    st.warning("データが取得できませんでした")
+    for name, value in sorted(snapshot["counters"].items()):
+        st.caption(f"{name}: {value:,}")
@@ -0,0 +1,120 @@
+"""経済指標のバッチ出力（Streamlitを起動せずに全系列を更新してファイルに保存）
+
+使い方:
+    python export.py                          # 全系列をCSV・JSONで exports/ に出力
+    python export.py --format csv parquet     # 出力形式を指定
+    python export.py --series cpi --output-dir /data/snapshots
+    python export.py --derived                # 前年比・移動平均などの派生指標の列も出力
+
+全系列の取得に成功すれば終了コード0、1つでも失敗すれば1を返す。
+取得したデータは列指向ストアにも保存されるため、DASHBOARD_OFFLINE=1 で起動した
+ダッシュボードはe-Statにアクセスせずにこのデータを表示できる。
+"""
+import argparse
+import os
+import sys
+from functools import partial
+from typing import List
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from services.catalog import SERIES_CATALOG
+from services.derived import compute_catalog
+from services.indicators import Indicator, load_concurrently
+from services.instrumentation import configure_logging, get_logger, metrics
+from services.series import build_engine
+
+logger = get_logger("export")
+
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exports")
+FORMATS = ("csv", "parquet", "json")
+
+
+def write_snapshot(df: pd.DataFrame, output_dir: str, key: str, fmt: str) -> str:
+    """系列を1ファイルに書き出す（一時ファイルに書いてから置き換える）"""
+    path = os.path.join(output_dir, f"{key}.{fmt}")
+    tmp_path = f"{path}.tmp"
+    frame = df.reset_index()
+
+    if fmt == "csv":
+        frame.to_csv(tmp_path, index=False, encoding="utf-8-sig")  # Excelで文字化けしないようBOM付き
+    elif fmt == "parquet":
+        frame.to_parquet(tmp_path, index=False)
+    elif fmt == "json":
+        frame.to_json(tmp_path, orient="records", force_ascii=False, date_format="iso")
+    else:
+        raise ValueError(f"未対応の出力形式です: {fmt}")
+
+    os.replace(tmp_path, path)
+    return path
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="経済指標を取得してファイルに出力します")
+    parser.add_argument(
+        "--series", nargs="+", choices=[spec.key for spec in SERIES_CATALOG],
+        help="出力する系列（省略時は全系列）"
+    )
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=["csv", "json"], help="出力形式")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help="出力先ディレクトリ")
+    parser.add_argument("--derived", action="store_true", help="派生指標（前年比・移動平均など）の列を追加する")
+    parser.add_argument("--workers", type=int, default=None, help="並列取得数（省略時は系列数）")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    load_dotenv()
+    configure_logging()
+    args = parse_args(argv)
+
+    app_id = os.getenv("ESTAT_API_KEY")
+    if not app_id:
+        logger.error("エラー: APIキーが設定されていません。.envファイルを確認してください。")
+        return 1
+
+    specs = [spec for spec in SERIES_CATALOG if not args.series or spec.key in args.series]
+    engine = build_engine(app_id, specs)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    indicators = [
+        Indicator(spec.key, spec.title, partial(engine.fetch_series, spec.key), timeout=spec.timeout)
+        for spec in specs
+    ]
+
+    failed = []
+    frames = {}
+    for indicator, (df, error) in load_concurrently(indicators, max_workers=args.workers):
+        if error or df is None:
+            logger.error("%s: %s", indicator.key, error or "データが取得できませんでした")
+            failed.append(indicator.key)
+            continue
+        frames[indicator.key] = df
+
+    # 派生指標は取得できた全系列を1回の計算でまとめて求める
+    if args.derived and frames:
+        value_columns = {spec.key: spec.value_column for spec in specs}
+        with metrics.span("derived", logger):
+            derived = compute_catalog({key: df[value_columns[key]] for key, df in frames.items()})
+        frames = {key: df.join(derived[key]) for key, df in frames.items()}
+
+    for key, df in frames.items():
+        try:
+            for fmt in args.format:
+                path = write_snapshot(df, args.output_dir, key, fmt)
+                logger.info("%s: %d件を出力しました -> %s", key, len(df), path)
+        except Exception as e:
+            logger.error("%s: ファイルの出力に失敗しました - %s: %s", key, type(e).__name__, e)
+            failed.append(key)
+
+    for name, stats in sorted(metrics.snapshot()["spans"].items()):
+        logger.info("処理時間 %s: 合計%.0fms（%d回）", name, stats["total"] * 1000, stats["count"])
+
+    if failed:
+        logger.error("失敗した系列: %s", ", ".join(failed))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1 @@
+"""e-Stat経済指標ダッシュボード用サービス"""
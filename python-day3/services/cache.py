@@ -0,0 +1,216 @@
+"""e-Stat APIレスポンスのディスクキャッシュ（TTL・容量制限・stale-while-revalidate対応）"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from services.instrumentation import get_logger, metrics
+
+# 環境変数で共有ディレクトリを指定すると、複数レプリカで同じキャッシュを使える
+DEFAULT_CACHE_DIR = os.getenv(
+    "ESTAT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "estat")
+)
+DEFAULT_TTL = int(os.getenv("ESTAT_CACHE_TTL", str(6 * 60 * 60)))  # 6時間は新鮮とみなす
+DEFAULT_STALE_TTL = int(os.getenv("ESTAT_CACHE_STALE_TTL", str(7 * 24 * 60 * 60)))  # 1週間は古いデータを返せる
+DEFAULT_MAX_BYTES = int(os.getenv("ESTAT_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))  # 200MB
+
+logger = get_logger("cache")
+
+# キャッシュキーに含めないパラメータ（APIキーはレプリカごとに違っても同じデータ）
+IGNORED_PARAMS = {"appId"}
+
+
+@dataclass
+class CacheEntry:
+    """キャッシュされたレスポンス"""
+    data: Dict
+    stored_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def age(self) -> float:
+        """保存してからの経過秒数"""
+        return time.time() - self.stored_at
+
+
+# fetch関数: (前回のキャッシュ or None) -> (新しいエントリ or None)
+# Noneを返した場合は「更新なし（304 Not Modified）」として前回のエントリを延命する
+FetchFunc = Callable[[Optional[CacheEntry]], Optional[CacheEntry]]
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        ttl: int = DEFAULT_TTL,
+        stale_ttl: int = DEFAULT_STALE_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        """
+        Args:
+            cache_dir: キャッシュファイルの保存ディレクトリ
+            ttl: この秒数以内のエントリは再取得せずにそのまま返す
+            stale_ttl: TTL切れでもこの秒数以内なら古いデータを返しつつ裏で再検証する
+            max_bytes: キャッシュ全体の上限サイズ（超えたら古いものから削除）
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._refreshing = set()  # バックグラウンド再検証中のキー
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(stats_data_id: str, params: Dict) -> str:
+        """統計表IDとリクエストパラメータからキャッシュキーを生成"""
+        key_params = {k: v for k, v in params.items() if k not in IGNORED_PARAMS}
+        raw = json.dumps(
+            {"statsDataId": stats_data_id, "params": key_params},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """キャッシュを読み込む（存在しない・壊れている場合はNone）"""
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            return CacheEntry(
+                data=raw["data"],
+                stored_at=raw["stored_at"],
+                etag=raw.get("etag"),
+                last_modified=raw.get("last_modified")
+            )
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        """キャッシュを書き込む（一時ファイル経由で他プロセスから中途半端に見えないようにする）"""
+        payload = {
+            "stored_at": entry.stored_at,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+            "data": entry.data,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def touch(self, key: str, entry: CacheEntry) -> CacheEntry:
+        """再検証で更新がなかったエントリの保存時刻を更新"""
+        refreshed = CacheEntry(
+            data=entry.data,
+            stored_at=time.time(),
+            etag=entry.etag,
+            last_modified=entry.last_modified
+        )
+        self.set(key, refreshed)
+        return refreshed
+
+    def evict(self) -> None:
+        """期限切れのエントリを削除し、上限サイズを超えていれば古い順に削除"""
+        now = time.time()
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.ttl + self.stale_ttl:
+                self._remove(path)
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def get_or_fetch(self, key: str, fetch: FetchFunc) -> Tuple[Dict, str]:
+        """
+        キャッシュを優先してデータを返す
+
+        Returns:
+            tuple[dict, str]: (レスポンスJSON, 取得元 "fresh" / "stale" / "network")
+        """
+        with metrics.span("cache.read", logger):
+            entry = self.get(key)
+
+        if entry is not None and entry.age <= self.ttl:
+            metrics.incr("cache.fresh")
+            return entry.data, "fresh"
+
+        if entry is not None and entry.age <= self.ttl + self.stale_ttl:
+            # 古いデータをすぐに返し、再検証はバックグラウンドで行う
+            self._refresh_in_background(key, entry, fetch)
+            metrics.incr("cache.stale")
+            return entry.data, "stale"
+
+        try:
+            data = self._revalidate(key, entry, fetch).data
+            metrics.incr("cache.miss")
+            return data, "network"
+        except Exception as e:
+            # e-Statが落ちている間は期限切れのデータでも表示を優先する
+            if entry is not None:
+                logger.warning("e-Statに接続できないため期限切れのキャッシュを使用します: %s", e)
+                metrics.incr("cache.stale")
+                return entry.data, "stale"
+            raise
+
+    def _revalidate(self, key: str, entry: Optional[CacheEntry], fetch: FetchFunc) -> CacheEntry:
+        new_entry = fetch(entry)
+        if new_entry is None:
+            if entry is None:
+                raise ValueError("キャッシュがないのに更新なしの応答を受け取りました")
+            return self.touch(key, entry)
+        self.set(key, new_entry)
+        return new_entry
+
+    def _refresh_in_background(self, key: str, entry: CacheEntry, fetch: FetchFunc) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def worker():
+            try:
+                self._revalidate(key, entry, fetch)
+            except Exception as e:
+                logger.warning("キャッシュの再検証に失敗しました（古いデータを継続使用）: %s", e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=worker, daemon=True).start()
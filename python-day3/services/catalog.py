@@ -0,0 +1,76 @@
+"""ダッシュボードで扱う経済指標の定義（系列カタログ）
+
+系列を追加するときはSERIES_CATALOGにSeriesSpecを1つ足すだけでよい。
+統計表IDとcdCat01以外の絞り込み条件が同じ系列は、1回のリクエストでまとめて取得される。
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# すべての統計表に共通する列名の変換
+BASE_COLUMN_MAPPING = {
+    '@tab': '表番号',
+    '@time': '時間軸',
+    '@unit': '単位',
+}
+
+
+@dataclass
+class SeriesSpec:
+    """1つの経済指標系列の定義"""
+    key: str
+    name: str  # 指標名（例: 消費者物価指数）
+    title: str  # セクション見出し
+    chart_title: str
+    stats_data_id: str
+    filters: Dict[str, str]  # cdCat01・cdAreaなどの絞り込み条件
+    value_column: str  # 値の列名（例: 指数値）
+    category_columns: Dict[str, str] = field(default_factory=dict)  # 分類コードの列名（例: @cat01 -> 品目分類）
+    series_name: Optional[str] = None  # 凡例の名前（省略時はname）
+    unit: str = ''
+    color: str = '#1f77b4'
+    dedupe: bool = False  # 同じ時間軸の重複を削除するか
+    timeout: float = 60
+
+    @property
+    def column_mapping(self) -> Dict[str, str]:
+        """e-Statの列名 -> 日本語列名"""
+        return {**BASE_COLUMN_MAPPING, **self.category_columns, '$': self.value_column}
+
+    @property
+    def display_columns(self) -> List[str]:
+        """表に表示する列"""
+        return ['年月', self.value_column, *self.category_columns.values()]
+
+
+SERIES_CATALOG: List[SeriesSpec] = [
+    SeriesSpec(
+        key='cpi',
+        name='消費者物価指数',
+        title='消費者物価指数（CPI）',
+        chart_title='消費者物価指数（2020年基準）の推移',
+        stats_data_id='0003427113',  # 2020年基準消費者物価指数
+        filters={
+            'cdCat01': '0001',  # 総合指数
+            'cdArea': '13A01',  # 全国
+        },
+        value_column='指数値',
+        category_columns={'@cat01': '品目分類', '@area': '地域コード'},
+        unit='2020年=100',
+        color='#1f77b4',
+    ),
+    SeriesSpec(
+        key='keiki',
+        name='景気動向指数',
+        title='景気動向指数（CI一致指数）',
+        chart_title='景気動向指数（CI一致指数）の推移',
+        stats_data_id='0003446461',  # 景気動向指数 長期系列
+        filters={
+            'cdCat01': '100',  # CI一致指数
+        },
+        value_column='CI一致指数',
+        category_columns={'@cat01': '指標分類'},
+        series_name='CI一致指数',
+        color='#ff7f0e',
+        dedupe=True,
+    ),
+]
@@ -0,0 +1,180 @@
+"""折れ線グラフの生成（LTTBによる間引き・図のキャッシュ）
+
+FigureCacheが省くのは図を作り直す処理だけで、Streamlitは再実行のたびに図のJSONをブラウザへ送り直す
+（このページのウィジェットはすべてグラフの内容に関わるため、フラグメントにしても送信は減らない）。
+st.plotly_chartにはfigure_keyのキーを渡し、データと設定が同じ間はブラウザ側の要素を作り直さない。
+送信量を小さくしているのはLTTBによる間引きで、2万点の系列なら約670KBが約24KBになる。
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# これを超える点数の系列は間引き対象にする
+DEFAULT_MAX_POINTS = 500
+# マーカーを描くのはこの点数以下のときだけ（点が多いとマーカーで線が見えなくなる）
+MARKER_MAX_POINTS = 120
+
+
+@dataclass(frozen=True)
+class ChartConfig:
+    """グラフの表示設定（キャッシュキーの一部になるためfrozen）"""
+    title: str
+    value_column: str
+    name: str
+    color: str
+    x_title: str = '年月'
+    height: int = 500
+    max_points: Optional[int] = DEFAULT_MAX_POINTS  # Noneなら間引かない
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Bucketsで残す点のインデックスを返す
+
+    先頭と末尾の点は必ず残し、間の点はバケットごとに
+    「前に選んだ点・次のバケットの平均点」との三角形の面積が最大の点を選ぶ。
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+
+    # 先頭・末尾を除いた点をthreshold-2個のバケットに分割
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        areas = np.abs(
+            (x[a] - avg_x) * (bucket_y - y[a]) - (x[a] - bucket_x) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+
+    return selected
+
+
+def plottable(series: pd.Series) -> pd.Series:
+    """グラフに描ける点だけを残す（NaTはint64にすると最小値になり、LTTBの計算を壊す）"""
+    return series[series.index.notna() & series.notna()]
+
+
+def downsample(series: pd.Series, max_points: Optional[int]) -> pd.Series:
+    """時系列（indexが時点）をLTTBで間引く（欠損値と時点のない行は除外）"""
+    series = plottable(series)
+    if max_points is None or len(series) <= max_points:
+        return series
+    x = series.index.values.astype('datetime64[ns]').astype(np.int64)
+    return series.iloc[lttb_indices(x, series.to_numpy(), max_points)]
+
+
+def build_line_figure(series: pd.Series, config: ChartConfig) -> go.Figure:
+    """古い順に並んだ時系列から折れ線グラフを作成"""
+    plotted = downsample(series, config.max_points)
+    show_markers = len(plotted) <= MARKER_MAX_POINTS
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=plotted.index,
+        y=plotted.to_numpy(),
+        mode='lines+markers' if show_markers else 'lines',
+        name=config.name,
+        line=dict(color=config.color, width=3),
+        marker=dict(size=6),
+        hovertemplate=f'<b>%{{x|%Y年%m月}}</b><br>{config.value_column}: %{{y}}<extra></extra>'
+    ))
+
+    title = config.title
+    total = len(plottable(series))
+    if len(plotted) < total:
+        title += f'（{total}点中{len(plotted)}点を表示）'
+
+    fig.update_layout(
+        title={
+            'text': title,
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        xaxis=dict(
+            title=config.x_title,
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightgray'
+        ),
+        yaxis=dict(
+            title=config.value_column,
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightgray'
+        ),
+        hovermode='x unified',
+        height=config.height,
+        template='plotly_white',
+        font=dict(size=12),
+        showlegend=True
+    )
+
+    return fig
+
+
+def data_version(series: pd.Series) -> Tuple[int, int]:
+    """系列の内容から決まるバージョン（データが変わらなければ同じ値）"""
+    return len(series), int(pd.util.hash_pandas_object(series, index=True).sum())
+
+
+def figure_key(series: pd.Series, config: ChartConfig) -> str:
+    """FigureCacheのキーと同じ内容から作るst.plotly_chartのキー（プロセスが違っても同じ値）"""
+    raw = repr((data_version(series), config)).encode("utf-8")
+    return f"chart-{hashlib.sha256(raw).hexdigest()[:16]}"
+
+
+class FigureCache:
+    def __init__(self, max_entries: int = 32):
+        """
+        Args:
+            max_entries: 保持する図の最大数（古いものから破棄）
+        """
+        self.max_entries = max_entries
+        self._figures: "OrderedDict[Tuple, go.Figure]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_figure(self, series: pd.Series, config: ChartConfig) -> go.Figure:
+        """データのバージョンとグラフ設定が同じなら前回作った図を返す（ブラウザへの送信は減らない）"""
+        key = (data_version(series), config)
+        with self._lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                return self._figures[key]
+
+        fig = build_line_figure(series, config)
+
+        with self._lock:
+            self._figures[key] = fig
+            while len(self._figures) > self.max_entries:
+                self._figures.popitem(last=False)
+        return fig
+
+
+# プロセス全体で共有する図のキャッシュ（Streamlitの再実行をまたいで保持される）
+figure_cache = FigureCache()
@@ -0,0 +1,115 @@
+"""派生指標（前年比・前月比・移動平均・zスコア）の計算とキャッシュ"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import pandas as pd
+
+from services.charts import data_version
+
+RAW_METRIC = '原系列'
+
+# 表示名 -> 計算方法の説明（UIの選択肢の順番もこの順）
+DERIVED_METRICS = {
+    '前年比（%）': '12ヶ月前からの変化率',
+    '前月比（%）': '1ヶ月前からの変化率',
+    '3ヶ月移動平均': '直近3ヶ月の平均',
+    '6ヶ月移動平均': '直近6ヶ月の平均',
+    '12ヶ月移動平均': '直近12ヶ月の平均',
+    'zスコア': '全期間の平均・標準偏差で標準化',
+}
+
+
+def to_monthly_wide(series_by_key: Dict[str, pd.Series]) -> pd.DataFrame:
+    """
+    複数の系列（indexが時点）を、欠けた月も含む月次の横長データフレームにまとめる
+
+    月が欠けていても12行前がちょうど12ヶ月前になるように、全系列の期間で月初日を並べ直す。
+    """
+    columns = {}
+    for key, series in series_by_key.items():
+        series = series[series.index.notna()]
+        series = series[~series.index.duplicated(keep='first')]
+        columns[key] = series.astype('float64')
+
+    wide = pd.DataFrame(columns).sort_index()
+    if wide.empty:
+        return wide
+    months = pd.date_range(wide.index.min(), wide.index.max(), freq='MS')
+    return wide.reindex(months)
+
+
+def compute_derived(wide: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """横長データフレームの全列について派生指標をまとめて計算（指標名 -> 同じ形のデータフレーム）"""
+    std = wide.std(ddof=0).replace(0, float('nan'))
+    return {
+        '前年比（%）': wide.pct_change(12, fill_method=None) * 100,
+        '前月比（%）': wide.pct_change(1, fill_method=None) * 100,
+        '3ヶ月移動平均': wide.rolling(3).mean(),
+        '6ヶ月移動平均': wide.rolling(6).mean(),
+        '12ヶ月移動平均': wide.rolling(12).mean(),
+        'zスコア': (wide - wide.mean()) / std,
+    }
+
+
+def compute_catalog(series_by_key: Dict[str, pd.Series]) -> Dict[str, pd.DataFrame]:
+    """
+    カタログの全系列の派生指標を1回の計算で求める
+
+    Returns:
+        dict: 系列キー -> 列が派生指標名のデータフレーム（indexは時点、古い順）
+    """
+    wide = to_monthly_wide(series_by_key)
+    derived = compute_derived(wide)
+    return {
+        key: pd.DataFrame({name: frame[key] for name, frame in derived.items()}).astype('float32')
+        for key in wide.columns
+    }
+
+
+class DerivedMetricsCache:
+    def __init__(self, max_entries: int = 64):
+        """
+        Args:
+            max_entries: 保持する系列数の上限（古いものから破棄）
+        """
+        self.max_entries = max_entries
+        self._results: "OrderedDict[Tuple, pd.DataFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, series: pd.Series) -> pd.DataFrame:
+        """系列の全派生指標を返す（同じデータなら計算済みの結果を再利用）"""
+        cache_key = (key, data_version(series))
+        with self._lock:
+            if cache_key in self._results:
+                self._results.move_to_end(cache_key)
+                return self._results[cache_key]
+
+        result = compute_catalog({key: series})[key]
+
+        with self._lock:
+            self._results[cache_key] = result
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return result
+
+    def get_many(self, series_by_key: Dict[str, pd.Series]) -> Dict[str, pd.DataFrame]:
+        """複数系列の派生指標をまとめて返す（未計算の系列だけを1回の計算で求める）"""
+        versions = {key: (key, data_version(series)) for key, series in series_by_key.items()}
+        with self._lock:
+            results = {key: self._results[v] for key, v in versions.items() if v in self._results}
+
+        missing = {key: series for key, series in series_by_key.items() if key not in results}
+        if missing:
+            computed = compute_catalog(missing)
+            with self._lock:
+                for key, result in computed.items():
+                    self._results[versions[key]] = result
+                while len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+            results.update(computed)
+        return results
+
+
+# プロセス全体で共有する派生指標のキャッシュ
+derived_cache = DerivedMetricsCache()
@@ -0,0 +1,292 @@
+"""e-Stat APIクライアント（NEXT_KEYによるページング・並列取得対応）"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+import pandas as pd
+import requests
+
+from services.cache import CacheEntry, ResponseCache
+from services.instrumentation import get_logger, metrics
+from services.streaming import IJSON_AVAILABLE, ColumnBuffer, StreamedPage, parse_stats_data_stream
+from services.transport import RequestCoalescer, Transport
+
+logger = get_logger("estat")
+
+ESTAT_BASE_URL = "https://api.e-stat.go.jp/rest/3.0/app/json"
+
+# e-Statの1リクエストあたりの最大取得件数
+MAX_PAGE_SIZE = 100000
+
+# ESTAT_STREAMING=0 でijsonがあっても逐次解析を使わない
+STREAMING_ENABLED = IJSON_AVAILABLE and os.getenv("ESTAT_STREAMING", "1") != "0"
+
+
+class EStatError(Exception):
+    """e-Stat APIがエラーを返した場合の例外"""
+
+
+def as_list(value) -> List:
+    """e-Statは要素が1件だとリストではなく辞書を返すため、常にリストにそろえる"""
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+class EStatClient:
+    def __init__(
+        self,
+        app_id: str,
+        cache: Optional[ResponseCache] = None,
+        timeout: int = 30,
+        page_size: int = MAX_PAGE_SIZE,
+        pool_size: int = 10,
+        transport: Optional[Transport] = None,
+        base_url: str = ESTAT_BASE_URL,
+        streaming: bool = STREAMING_ENABLED
+    ):
+        """
+        Args:
+            app_id: e-StatのアプリケーションID
+            cache: レスポンスキャッシュ（Noneなら毎回APIにアクセス）
+            timeout: 1リクエストあたりのタイムアウト秒数
+            page_size: 1ページあたりの取得件数（最大100000）
+            pool_size: 使い回すHTTP接続（keep-alive）の最大数
+            transport: リトライ・レート制限などの設定（Noneならプロセス全体で共有する設定）
+            base_url: APIのURL（ベンチマークではローカルのスタブサーバーを指定）
+            streaming: get_stats_frameでレスポンスを逐次解析するか（ijsonが必要）
+        """
+        self.app_id = app_id
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.timeout = timeout
+        self.page_size = min(page_size, MAX_PAGE_SIZE)
+        self.streaming = streaming and IJSON_AVAILABLE
+
+        # 全指標・全ページで接続を共有してTLSハンドシェイクを省く
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.transport = transport or Transport(self.session)
+        # 同じリクエストが同時に来た場合（複数ユーザーの同時アクセスなど）は1回だけ送信する
+        self._coalescer = RequestCoalescer()
+
+    @staticmethod
+    def _conditional_headers(previous: Optional[CacheEntry]) -> Dict[str, str]:
+        """前回のキャッシュのETag・Last-Modifiedから条件付きリクエストのヘッダーを作る"""
+        headers = {}
+        if previous is not None:
+            if previous.etag:
+                headers["If-None-Match"] = previous.etag
+            if previous.last_modified:
+                headers["If-Modified-Since"] = previous.last_modified
+        return headers
+
+    def _request(self, endpoint: str, params: Dict, previous: Optional[CacheEntry] = None) -> Optional[CacheEntry]:
+        """APIにリクエストを送信（previousがあれば条件付きリクエスト）"""
+        headers = self._conditional_headers(previous)
+
+        with metrics.span("estat.request", logger):
+            response = self.transport.get(
+                f"{self.base_url}/{endpoint}",
+                params={"appId": self.app_id, **params},
+                headers=headers,
+                timeout=self.timeout
+            )
+        metrics.incr("estat.requests")
+        metrics.incr("estat.bytes", len(response.content))
+        logger.debug("%s %s -> %d (%d bytes)", endpoint, params, response.status_code, len(response.content))
+
+        if response.status_code == 304 and previous is not None:
+            return None
+        response.raise_for_status()
+
+        with metrics.span("estat.parse", logger):
+            data = response.json()
+
+        # e-Stat側のエラー（APIキー不正など）はキャッシュしない
+        result = next(iter(data.values()), {}).get("RESULT", {}) if data else {}
+        status = int(result.get("STATUS", 0))
+        if status >= 100:
+            raise EStatError(f"e-Stat APIエラー（STATUS {status}）: {result.get('ERROR_MSG', '')}")
+
+        return CacheEntry(
+            data=data,
+            stored_at=time.time(),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified")
+        )
+
+    def get_json(self, endpoint: str, params: Dict) -> Dict:
+        """APIを呼び出してJSONを返す（キャッシュがあればキャッシュ経由）"""
+        key = ResponseCache.make_key(f"{endpoint}:{params.get('statsDataId', '')}", params)
+        if self.cache is None:
+            return self._coalescer.run(key, lambda: self._request(endpoint, params).data)
+
+        data, _ = self._coalescer.run(
+            key, lambda: self.cache.get_or_fetch(key, lambda previous: self._request(endpoint, params, previous))
+        )
+        return data
+
+    def get_stats_list(self, search_word: str, limit: int = 10) -> List[Dict]:
+        """統計表を検索してTABLE_INFのリストを返す"""
+        data = self.get_json("getStatsList", {"searchWord": search_word, "limit": limit})
+        datalist_inf = data.get("GET_STATS_LIST", {}).get("DATALIST_INF", {})
+        return as_list(datalist_inf.get("TABLE_INF"))
+
+    def get_stats_data_page(
+        self,
+        stats_data_id: str,
+        start_position: Optional[int] = None,
+        limit: Optional[int] = None,
+        **filters
+    ) -> Dict:
+        """統計データを1ページ取得してSTATISTICAL_DATAを返す"""
+        params = {"statsDataId": stats_data_id, "limit": limit or self.page_size, **filters}
+        if start_position is not None:
+            params["startPosition"] = start_position
+
+        data = self.get_json("getStatsData", params)
+        if "GET_STATS_DATA" not in data:
+            raise EStatError(f"予期しないレスポンス形式: {list(data.keys())}")
+        return data["GET_STATS_DATA"]["STATISTICAL_DATA"]
+
+    def iter_values(self, stats_data_id: str, max_workers: int = 1, **filters) -> Iterator[Dict]:
+        """
+        統計データのVALUEを全ページ分ジェネレータで返す
+
+        Args:
+            stats_data_id: 統計表ID
+            max_workers: 2以上なら総件数がわかった時点で残りのページを並列取得
+            **filters: cdCat01などの絞り込み条件
+        """
+        first = self.get_stats_data_page(stats_data_id, **filters)
+        yield from as_list(first.get("DATA_INF", {}).get("VALUE"))
+
+        result_inf = first.get("RESULT_INF", {})
+        next_key = result_inf.get("NEXT_KEY")
+        if next_key is None:
+            return
+
+        # メタ情報は最初のページだけで十分
+        page_filters = {**filters, "metaGetFlg": "N"}
+
+        if max_workers <= 1:
+            while next_key is not None:
+                page = self.get_stats_data_page(stats_data_id, start_position=int(next_key), **page_filters)
+                yield from as_list(page.get("DATA_INF", {}).get("VALUE"))
+                next_key = page.get("RESULT_INF", {}).get("NEXT_KEY")
+            return
+
+        total = int(result_inf["TOTAL_NUMBER"])
+        positions = list(range(int(next_key), total + 1, self.page_size))
+        yield from self._iter_pages_concurrently(stats_data_id, positions, max_workers, page_filters)
+
+    def get_stats_frame(self, stats_data_id: str, **filters) -> pd.DataFrame:
+        """
+        統計データを全ページ取得してVALUEのデータフレームを返す
+
+        streamingが有効ならレスポンスを読みながら列ごとのリストに格納し、最後に1回だけ
+        データフレームを作る（VALUE 1件ごとの辞書を作らないため、大きな統計表でピークメモリが約半分になる）。
+        逐次解析した場合は全ページ分の列をまとめて1エントリとしてレスポンスキャッシュに保存し、
+        get_jsonと同じくTTL・stale-while-revalidate・同時リクエストの集約を通す。
+        """
+        if not self.streaming:
+            values = list(self.iter_values(stats_data_id, **filters))
+            with metrics.span("estat.frame", logger):
+                return pd.DataFrame(values)
+
+        params = {"statsDataId": stats_data_id, "limit": self.page_size, **filters}
+        # ページ単位のgetStatsDataとは中身の形が違うため、別のキーで保存する
+        key = ResponseCache.make_key(f"getStatsFrame:{stats_data_id}", params)
+        if self.cache is None:
+            columns = self._coalescer.run(key, lambda: self._stream_frame(params).data)
+        else:
+            columns, _ = self._coalescer.run(
+                key, lambda: self.cache.get_or_fetch(key, lambda previous: self._stream_frame(params, previous))
+            )
+
+        with metrics.span("estat.frame", logger):
+            return pd.DataFrame(columns)
+
+    def _stream_frame(self, params: Dict, previous: Optional[CacheEntry] = None) -> Optional[CacheEntry]:
+        """
+        全ページを逐次解析し、列名 -> 値のリストをキャッシュのエントリとして返す
+
+        previousがあれば最初のページを条件付きリクエストにし、304ならNoneを返す
+        （キャッシュ側で前回のエントリを延命する）。ETag・Last-Modifiedは最初のページのものを保存する。
+        """
+        buffer = ColumnBuffer()
+        first = self._stream_page(params, buffer, self._conditional_headers(previous))
+        if first is None:
+            return None
+        page, headers = first
+        while page.next_key is not None:
+            # メタ情報は最初のページだけで十分
+            params = {**params, "metaGetFlg": "N", "startPosition": page.next_key}
+            page, _ = self._stream_page(params, buffer)
+        return CacheEntry(
+            data=buffer.to_dict(),
+            stored_at=time.time(),
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified")
+        )
+
+    def _stream_page(
+        self,
+        params: Dict,
+        buffer: ColumnBuffer,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Optional[Tuple[StreamedPage, Mapping[str, str]]]:
+        """
+        getStatsDataを1ページ取得し、VALUEを逐次解析してbufferに追記する
+
+        Returns:
+            (解析結果, レスポンスヘッダー)。条件付きリクエストで304が返った場合はNone
+        """
+        with metrics.span("estat.request", logger):
+            response = self.transport.get(
+                f"{self.base_url}/getStatsData",
+                params={"appId": self.app_id, **params},
+                headers=headers or {},
+                timeout=self.timeout,
+                stream=True
+            )
+
+        with response:
+            metrics.incr("estat.requests")
+            if response.status_code == 304 and headers:
+                logger.debug("getStatsData %s -> 304（更新なし）", params)
+                return None
+            response.raise_for_status()
+            response.raw.decode_content = True
+            with metrics.span("estat.parse", logger):
+                page = parse_stats_data_stream(response.raw, buffer)
+            metrics.incr("estat.bytes", response.raw.tell())
+        logger.debug("getStatsData %s -> %d行（累計）", params, buffer.rows)
+
+        if page.status >= 100:
+            raise EStatError(f"e-Stat APIエラー（STATUS {page.status}）: {page.error_msg}")
+        return page, response.headers
+
+    def _iter_pages_concurrently(
+        self,
+        stats_data_id: str,
+        positions: List[int],
+        max_workers: int,
+        filters: Dict
+    ) -> Iterator[Dict]:
+        """ページを並列取得し、順序を保ったまま返す（先読みはmax_workersページまで）"""
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = []
+            for position in positions:
+                pending.append(executor.submit(
+                    self.get_stats_data_page, stats_data_id, start_position=position, **filters
+                ))
+                if len(pending) >= max_workers:
+                    page = pending.pop(0).result()
+                    yield from as_list(page.get("DATA_INF", {}).get("VALUE"))
+            for future in pending:
+                page = future.result()
+                yield from as_list(page.get("DATA_INF", {}).get("VALUE"))
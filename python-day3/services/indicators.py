@@ -0,0 +1,78 @@
+"""経済指標の登録と並列取得"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class Indicator:
+    """ダッシュボードに表示する経済指標"""
+    key: str
+    title: str
+    fetch: Callable[[], Tuple[Any, Optional[str]]]  # () -> (データ, エラーメッセージ)
+    render: Optional[Callable[[Any], None]] = None  # バッチ出力など表示しない場合はNone
+    timeout: float = 60  # この秒数を過ぎたら待たずに他の指標を表示する
+
+
+class IndicatorRegistry:
+    def __init__(self):
+        self._indicators: Dict[str, Indicator] = {}
+
+    def register(self, indicator: Indicator) -> Indicator:
+        """指標を登録（登録順が表示順になる）"""
+        if indicator.key in self._indicators:
+            raise ValueError(f"指標キーが重複しています: {indicator.key}")
+        self._indicators[indicator.key] = indicator
+        return indicator
+
+    def get(self, key: str) -> Indicator:
+        return self._indicators[key]
+
+    def __iter__(self) -> Iterator[Indicator]:
+        return iter(list(self._indicators.values()))
+
+    def __len__(self) -> int:
+        return len(self._indicators)
+
+
+def load_concurrently(
+    indicators: List[Indicator],
+    max_workers: Optional[int] = None
+) -> Iterator[Tuple[Indicator, Tuple[Any, Optional[str]]]]:
+    """
+    全指標を並列に取得し、取得できたものから順に返す
+
+    指標ごとのtimeoutを過ぎたものは (None, エラーメッセージ) を返して待つのをやめる。
+    取得処理自体はバックグラウンドで続くため、ディスクキャッシュは次回までに温まる。
+
+    Yields:
+        tuple[Indicator, tuple]: (指標, (データ, エラーメッセージ))
+    """
+    if not indicators:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(indicators))
+    started = time.monotonic()
+    pending = {executor.submit(indicator.fetch): indicator for indicator in indicators}
+
+    try:
+        while pending:
+            now = time.monotonic()
+            next_deadline = min(started + indicator.timeout for indicator in pending.values())
+            done, _ = wait(pending, timeout=max(0, next_deadline - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                indicator = pending.pop(future)
+                try:
+                    yield indicator, future.result()
+                except Exception as e:
+                    yield indicator, (None, f"エラー: 予期しないエラーが発生しました - {type(e).__name__}: {str(e)}")
+
+            now = time.monotonic()
+            for future, indicator in list(pending.items()):
+                if now - started >= indicator.timeout:
+                    del pending[future]
+                    yield indicator, (None, f"エラー: {indicator.timeout:g}秒以内にデータを取得できませんでした")
+    finally:
+        executor.shutdown(wait=False)
@@ -0,0 +1,90 @@
+"""ダッシュボードの計測（レベル付きログ・処理時間の計測・件数/バイト数のカウンタ）"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+# DASHBOARD_LOG_LEVEL=DEBUG でレスポンスやデータフレームのサンプルも出力する
+LOG_LEVEL = os.getenv("DASHBOARD_LOG_LEVEL", "INFO").upper()
+# DASHBOARD_METRICS=0 で計測自体を無効化（時刻の取得も行わない）
+METRICS_ENABLED = os.getenv("DASHBOARD_METRICS", "1") != "0"
+
+LOGGER_NAME = "dashboard"
+
+
+def get_logger(name: str) -> logging.Logger:
+    """dashboard配下のロガーを返す"""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def configure_logging(level: str = LOG_LEVEL) -> None:
+    """dashboardロガーの出力先とレベルを設定（Streamlitの再実行で重複しないよう1回だけ）"""
+    root = logging.getLogger(LOGGER_NAME)
+    root.setLevel(level)
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+        root.addHandler(handler)
+        root.propagate = False
+
+
+class Metrics:
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        """
+        Args:
+            enabled: Falseなら計測・集計をすべて省略する
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._spans: Dict[str, Dict[str, float]] = {}
+        self._counters: Dict[str, int] = {}
+
+    @contextmanager
+    def span(self, name: str, logger: Optional[logging.Logger] = None) -> Iterator[None]:
+        """
+        処理時間を計測する区間
+
+        例: with metrics.span("cpi.request"): ...
+        """
+        if not self.enabled:
+            yield
+            return
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                stats = self._spans.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+                stats["count"] += 1
+                stats["total"] += elapsed
+                stats["max"] = max(stats["max"], elapsed)
+            if logger is not None and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s: %.1fms", name, elapsed * 1000)
+
+    def incr(self, name: str, value: int = 1) -> None:
+        """カウンタを加算（例: 受信バイト数・行数）"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """現在の集計結果のコピー"""
+        with self._lock:
+            return {
+                "spans": {name: dict(stats) for name, stats in self._spans.items()},
+                "counters": dict(self._counters),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+
+# プロセス全体で共有する計測器
+metrics = Metrics()
@@ -0,0 +1,167 @@
+"""e-Statメタ情報（getMetaInfo）のキャッシュとコード検索用インデックス"""
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from services.estat_client import EStatClient, as_list
+from services.instrumentation import get_logger
+
+logger = get_logger("metadata")
+
+DEFAULT_META_PATH = os.getenv(
+    "ESTAT_META_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "estat_meta.json")
+)
+# 分類コードや表題はめったに変わらないため長めに保持する
+DEFAULT_META_TTL = int(os.getenv("ESTAT_META_TTL", str(30 * 24 * 60 * 60)))  # 30日
+# 取得に失敗した統計表は、この秒数が過ぎるまで再試行しない（オフライン時に毎回待たされないように）
+RETRY_AFTER_FAILURE = 10 * 60
+
+
+def _text(value) -> str:
+    """{"$": "..."} 形式と文字列の両方から文字列を取り出す"""
+    if isinstance(value, dict):
+        return str(value.get("$", ""))
+    return "" if value is None else str(value)
+
+
+def parse_meta_info(data: Dict) -> Dict:
+    """getMetaInfoのレスポンスをインデックス用の形式に変換"""
+    metadata_inf = data["GET_META_INFO"]["METADATA_INF"]
+    table_inf = metadata_inf.get("TABLE_INF", {})
+
+    classes = {}
+    for class_obj in as_list(metadata_inf.get("CLASS_INF", {}).get("CLASS_OBJ")):
+        classes[class_obj["@id"]] = {
+            "name": class_obj.get("@name", ""),
+            "codes": {item["@code"]: item.get("@name", "") for item in as_list(class_obj.get("CLASS"))},
+        }
+
+    time_codes = sorted(classes.get("time", {}).get("codes", {}))
+    return {
+        "title": _text(table_inf.get("TITLE")),
+        "stat_name": _text(table_inf.get("STAT_NAME")),
+        "classes": classes,
+        "time_range": [time_codes[0], time_codes[-1]] if time_codes else None,
+        "fetched_at": time.time(),
+    }
+
+
+def parse_table_inf(table: Dict) -> Dict:
+    """getStatsListのTABLE_INF 1件を検索用の形式に変換"""
+    return {
+        "id": table.get("@id", ""),
+        "title": _text(table.get("TITLE")),
+        "stat_name": _text(table.get("STAT_NAME")),
+        "gov_org": _text(table.get("GOV_ORG")),
+        "statistics_name": _text(table.get("STATISTICS_NAME")),
+        "cycle": _text(table.get("CYCLE")),
+        "total_number": table.get("OVERALL_TOTAL_NUMBER"),
+        "updated_date": _text(table.get("UPDATED_DATE")),
+    }
+
+
+class MetadataIndex:
+    def __init__(
+        self,
+        client: EStatClient,
+        path: str = DEFAULT_META_PATH,
+        ttl: int = DEFAULT_META_TTL
+    ):
+        """
+        Args:
+            client: e-Stat APIクライアント
+            path: インデックスを保存するJSONファイル
+            ttl: メタ情報を再取得するまでの秒数
+        """
+        self.client = client
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._index = self._load()
+        self._failed_at: Dict[str, float] = {}
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            index.setdefault("tables", {})
+            index.setdefault("meta", {})
+            return index
+        except (OSError, ValueError):
+            return {"tables": {}, "meta": {}}
+
+    def _save(self) -> None:
+        """一時ファイルに書いてから置き換え（呼び出し側でロックを取得済み）"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def lookup(self, stats_data_id: str) -> Optional[Dict]:
+        """ローカルのインデックスだけを参照（ネットワークにはアクセスしない）"""
+        with self._lock:
+            return self._index["meta"].get(stats_data_id)
+
+    def get(self, stats_data_id: str, refresh: bool = False) -> Optional[Dict]:
+        """
+        メタ情報を返す（未取得・期限切れの場合だけgetMetaInfoを呼ぶ）
+
+        取得に失敗した場合は期限切れでも保存済みのメタ情報を返す
+        """
+        cached = self.lookup(stats_data_id)
+        if cached is not None and not refresh and time.time() - cached["fetched_at"] <= self.ttl:
+            return cached
+        if time.time() - self._failed_at.get(stats_data_id, 0) < RETRY_AFTER_FAILURE:
+            return cached
+
+        try:
+            data = self.client.get_json("getMetaInfo", {"statsDataId": stats_data_id})
+            meta = parse_meta_info(data)
+        except Exception as e:
+            logger.warning("メタ情報の取得に失敗しました（%s）: %s", stats_data_id, e)
+            self._failed_at[stats_data_id] = time.time()
+            return cached
+
+        with self._lock:
+            self._index["meta"][stats_data_id] = meta
+            self._save()
+        return meta
+
+    def code_labels(self, stats_data_id: str, class_id: str, fetch: bool = True) -> Dict[str, str]:
+        """分類コード -> 名称（例: cat01の "0001" -> "総合"）。fetch=Falseならローカルのみ参照"""
+        meta = self.get(stats_data_id) if fetch else self.lookup(stats_data_id)
+        if meta is None:
+            return {}
+        return meta["classes"].get(class_id, {}).get("codes", {})
+
+    def time_range(self, stats_data_id: str) -> Optional[Tuple[str, str]]:
+        """統計表に含まれる時間軸コードの最小値・最大値"""
+        meta = self.get(stats_data_id)
+        if meta is None or not meta["time_range"]:
+            return None
+        return tuple(meta["time_range"])
+
+    def add_tables(self, tables: List[Dict]) -> List[Dict]:
+        """getStatsListの検索結果をインデックスに登録し、変換後の一覧を返す"""
+        parsed = [parse_table_inf(table) for table in tables]
+        with self._lock:
+            for table in parsed:
+                if table["id"]:
+                    self._index["tables"][table["id"]] = table
+            self._save()
+        return parsed
+
+    def search(self, word: str) -> List[Dict]:
+        """登録済みの統計表から表題・統計名にすべての単語を含むものを探す（ローカル検索）"""
+        words = word.split()
+        with self._lock:
+            tables = list(self._index["tables"].values())
+        return [
+            table for table in tables
+            if all(w in f"{table['title']} {table['stat_name']} {table['statistics_name']}" for w in words)
+        ]
@@ -0,0 +1,85 @@
+"""e-Statデータフレームの正規化（時間軸の解析・型変換・並べ替え）"""
+from typing import Dict, Optional
+
+import pandas as pd
+
+from services.instrumentation import get_logger, metrics
+
+logger = get_logger("normalize")
+
+TIME_COLUMN = '@time'
+VALUE_COLUMN = '$'
+
+# 正規化後に追加する列
+PERIOD_COLUMN = '時点'  # 月初日のdatetime（並べ替え・グラフ用）
+LABEL_COLUMN = '年月'  # 表示用の文字列（例: 1985年01月）
+
+
+def parse_time_codes(codes: pd.Series) -> pd.Series:
+    """
+    e-Statの時間軸コードを期間の最初の月の月初日のdatetimeに変換（ベクトル演算）
+
+    コードは 年4桁 + 種別2桁 + 開始月2桁 + 終了月2桁。
+    例: 1985000101（月次）-> 1985-01-01、1985000406（四半期）-> 1985-04-01、
+    1985000000（年次）-> 1985-01-01
+    年度（種別が00以外）や解析できないコードはNaTになる
+    """
+    codes = codes.astype(str)
+    month = codes.str.slice(6, 8)
+    month = month.mask((month == '00') & (codes.str.slice(4, 10) == '000000'), '01')
+    year_month = codes.str.slice(0, 4) + month
+    year_month = year_month.where(codes.str.slice(4, 6) == '00')
+    return pd.to_datetime(year_month, format='%Y%m', errors='coerce')
+
+
+def normalize_stats_frame(
+    df: pd.DataFrame,
+    column_mapping: Dict[str, str],
+    dedupe: bool = True
+) -> pd.DataFrame:
+    """
+    e-StatのVALUEから作ったデータフレームを表示用に正規化
+
+    - 時間軸コードを解析して「時点」（datetime）と「年月」（表示用）を追加し、indexを時点にする
+    - 値はfloat32、@tab・@cat01・@areaなどの分類コードはcategoryにしてメモリを節約
+    - 時点の新しい順に並べ替え（dedupe=Trueなら同じ時間軸の重複は最新の1件だけ残す）
+
+    Args:
+        df: pd.DataFrame(VALUE) そのままのデータフレーム
+        column_mapping: e-Statの列名 -> 日本語列名
+        dedupe: 時間軸の重複を削除するか
+    """
+    df = df.copy()
+
+    # 各工程の処理時間はベンチマーク（benchmark.py）で工程ごとに集計する
+    periods: Optional[pd.Series] = None
+    if TIME_COLUMN in df.columns:
+        with metrics.span("normalize.time", logger):
+            periods = parse_time_codes(df[TIME_COLUMN])
+
+    if VALUE_COLUMN in df.columns:
+        with metrics.span("normalize.numeric", logger):
+            df[VALUE_COLUMN] = pd.to_numeric(df[VALUE_COLUMN], errors='coerce').astype('float32')
+
+    with metrics.span("normalize.category", logger):
+        for column in df.columns:
+            if column.startswith('@') and column != TIME_COLUMN:
+                df[column] = df[column].astype('category')
+
+    with metrics.span("normalize.rename", logger):
+        df = df.rename(columns=column_mapping)
+
+    if periods is None:
+        return df
+
+    with metrics.span("normalize.sort", logger):
+        df[PERIOD_COLUMN] = periods
+        df[LABEL_COLUMN] = periods.dt.strftime('%Y年%m月')
+        df = df.sort_values(PERIOD_COLUMN, ascending=False, kind='stable')
+
+    if dedupe:
+        with metrics.span("normalize.dedupe", logger):
+            time_column = column_mapping.get(TIME_COLUMN, TIME_COLUMN)
+            df = df.drop_duplicates(subset=[time_column], keep='first')
+
+    return df.set_index(PERIOD_COLUMN)
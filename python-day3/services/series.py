@@ -0,0 +1,222 @@
+"""系列カタログにもとづく取得・変換エンジン（同じ統計表の系列はまとめて1回で取得）"""
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import requests
+
+from services.cache import ResponseCache
+from services.catalog import SeriesSpec
+from services.estat_client import EStatClient, EStatError
+from services.instrumentation import get_logger, metrics
+from services.metadata import MetadataIndex
+from services.normalize import normalize_stats_frame
+from services.store import SeriesStore, fetch_incremental
+
+logger = get_logger("series")
+
+CATEGORY_PARAM = 'cdCat01'
+CATEGORY_COLUMN = '@cat01'
+
+# e-Statの絞り込み条件に一度に指定できるコード数の上限
+MAX_CODES_PER_REQUEST = 100
+
+
+@dataclass
+class _FetchGroup:
+    """1回のリクエストでまとめて取得する系列のグループ"""
+    stats_data_id: str
+    base_filters: Dict[str, str]
+    codes: List[str] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    raw: Optional[pd.DataFrame] = None
+    fetched_at: float = 0.0
+
+    @property
+    def filters(self) -> Dict[str, str]:
+        # 分類名などのメタ情報はMetadataIndexから引くため、データ取得では毎回受け取らない
+        filters = {**self.base_filters, "metaGetFlg": "N"}
+        if self.codes:
+            filters[CATEGORY_PARAM] = ','.join(self.codes)
+        return filters
+
+
+def _base_key(spec: SeriesSpec) -> Tuple:
+    """統計表IDとcdCat01以外の絞り込み条件"""
+    return spec.stats_data_id, tuple(sorted((k, v) for k, v in spec.filters.items() if k != CATEGORY_PARAM))
+
+
+class SeriesEngine:
+    def __init__(
+        self,
+        client: EStatClient,
+        store: SeriesStore,
+        specs: List[SeriesSpec],
+        metadata: Optional[MetadataIndex] = None,
+        share_seconds: float = 60,
+        offline: bool = False
+    ):
+        """
+        Args:
+            client: e-Stat APIクライアント
+            store: 取得済みデータのストア
+            specs: 扱う系列の一覧（カタログ）
+            metadata: 分類コードを名称に変換するためのメタ情報インデックス（Noneならコードのまま表示）
+            share_seconds: まとめて取得した結果を同じグループの系列で共有する秒数
+            offline: Trueならe-Statにアクセスせず、ストアに保存済みのデータだけを使う
+        """
+        self.client = client
+        self.store = store
+        self.specs = {spec.key: spec for spec in specs}
+        self.metadata = metadata
+        self.share_seconds = share_seconds
+        self.offline = offline
+        self._groups: Dict[Tuple, _FetchGroup] = {}
+        self._spec_groups: Dict[str, Tuple] = {}
+        self._build_groups(specs)
+
+    def _build_groups(self, specs: List[SeriesSpec]) -> None:
+        """統計表IDとcdCat01以外の条件が同じ系列を1つのグループにまとめる"""
+        members_by_base: Dict[Tuple, List[SeriesSpec]] = {}
+        for spec in specs:
+            members_by_base.setdefault(_base_key(spec), []).append(spec)
+
+        for base_key, members in members_by_base.items():
+            stats_data_id = members[0].stats_data_id
+            base_filters = dict(base_key[1])
+            codes = list(dict.fromkeys(
+                spec.filters[CATEGORY_PARAM] for spec in members if CATEGORY_PARAM in spec.filters
+            ))
+
+            # コード数の上限ごとに分割（分類を指定しない系列は全分類を取得する別グループ）
+            for i in range(0, len(codes), MAX_CODES_PER_REQUEST):
+                chunk = codes[i:i + MAX_CODES_PER_REQUEST]
+                self._groups[(base_key, i // MAX_CODES_PER_REQUEST)] = _FetchGroup(stats_data_id, base_filters, chunk)
+
+            for spec in members:
+                code = spec.filters.get(CATEGORY_PARAM)
+                if code is None:
+                    group_key = (base_key, None)
+                    self._groups.setdefault(group_key, _FetchGroup(stats_data_id, base_filters))
+                else:
+                    group_key = (base_key, codes.index(code) // MAX_CODES_PER_REQUEST)
+                self._spec_groups[spec.key] = group_key
+
+    @property
+    def request_count(self) -> int:
+        """全系列を取得するのに必要なリクエスト数（ページングを除く）"""
+        return len(self._groups)
+
+    def _fetch_group_raw(self, group: _FetchGroup) -> pd.DataFrame:
+        """グループの生データを取得（同時に呼ばれても1回だけ取得する）"""
+        with group.lock:
+            if group.raw is not None and time.monotonic() - group.fetched_at < self.share_seconds:
+                return group.raw
+            if self.offline:
+                with metrics.span(f"{group.stats_data_id}.load", logger):
+                    stored = self.store.load(group.stats_data_id, group.filters)
+                group.raw = stored if stored is not None else pd.DataFrame()
+            else:
+                with metrics.span(f"{group.stats_data_id}.fetch", logger):
+                    group.raw = fetch_incremental(self.client, self.store, group.stats_data_id, group.filters)
+            group.fetched_at = time.monotonic()
+            return group.raw
+
+    def _apply_labels(self, spec: SeriesSpec, df: pd.DataFrame) -> None:
+        """分類コードの列をメタ情報の名称に置き換える（名称がないコードはそのまま）"""
+        if self.metadata is None:
+            return
+        for raw_column, column in spec.category_columns.items():
+            labels = self.metadata.code_labels(spec.stats_data_id, raw_column.lstrip('@'), fetch=not self.offline)
+            if column not in df.columns or not labels:
+                continue
+            codes = df[column].astype(object)
+            df[column] = codes.map(labels).fillna(codes).astype('category')
+
+    def fetch_series(self, key: str) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+        """
+        系列を取得して表示用に正規化する
+
+        Returns:
+            tuple: (データフレーム, エラーメッセージ) のどちらか一方がNone
+        """
+        spec = self.specs[key]
+        group = self._groups[self._spec_groups[key]]
+        logger.info("%sデータの取得を開始します", spec.name)
+        logger.debug("統計表ID: %s パラメータ: %s", spec.stats_data_id, spec.filters)
+
+        try:
+            df = self._fetch_group_raw(group)
+
+            # まとめて取得した場合は自分の分類コードの行だけを取り出す
+            code = spec.filters.get(CATEGORY_PARAM)
+            if code and len(group.codes) > 1 and CATEGORY_COLUMN in df.columns:
+                df = df[df[CATEGORY_COLUMN] == code]
+
+            # データが存在するか確認
+            if df.empty:
+                error_msg = "保存済みのデータがありません（先にexport.pyで取得してください）" if self.offline else "データが見つかりませんでした"
+                logger.warning(error_msg)
+                return None, error_msg
+
+            metrics.incr(f"{key}.rows", len(df))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("データフレームの形状: %s\n%s", df.shape, df.head().to_string())
+
+            # 列名を日本語に変換し、時間軸の解析・型変換・重複削除をまとめて行う（最新順）
+            with metrics.span(f"{key}.transform", logger):
+                df = normalize_stats_frame(df, spec.column_mapping, dedupe=spec.dedupe)
+                self._apply_labels(spec, df)
+
+            logger.info("%sデータ取得成功: %d件", spec.name, len(df))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("変換後のデータフレームのサンプル（最新順）:\n%s", df.head(15).to_string())
+
+            return df, None
+
+        except requests.exceptions.Timeout:
+            error_msg = "エラー: APIリクエストがタイムアウトしました"
+            logger.error(error_msg)
+            return None, error_msg
+
+        except EStatError as e:
+            error_msg = f"エラー: {str(e)}"
+            logger.error(error_msg)
+            return None, error_msg
+
+        except requests.exceptions.HTTPError as e:
+            error_msg = f"APIリクエストエラー: ステータスコード {e.response.status_code}"
+            logger.error(error_msg)
+            logger.debug("レスポンス本文:\n%s", e.response.text[:500])
+            return None, error_msg
+
+        except requests.exceptions.RequestException as e:
+            error_msg = f"エラー: リクエスト中に問題が発生しました - {str(e)}"
+            logger.error(error_msg)
+            return None, error_msg
+
+        except json.JSONDecodeError as e:
+            error_msg = f"エラー: JSONの解析に失敗しました - {str(e)}"
+            logger.error(error_msg)
+            return None, error_msg
+
+        except Exception as e:
+            error_msg = f"エラー: 予期しないエラーが発生しました - {type(e).__name__}: {str(e)}"
+            logger.exception(error_msg)
+            return None, error_msg
+
+
+def build_engine(app_id: str, specs: List[SeriesSpec], offline: bool = False) -> SeriesEngine:
+    """
+    ダッシュボード・バッチ出力で共通の構成のエンジンを作成
+
+    レスポンスはプロセス再起動・レプリカ間で共有するディスクキャッシュ経由で取得し、
+    取得済みデータは列指向ストアに保存して2回目以降は新しい月だけを取得する。
+    分類名などのメタ情報は別途キャッシュしたインデックスから引く（データ取得時は取得しない）。
+    """
+    client = EStatClient(app_id, cache=ResponseCache())
+    return SeriesEngine(client, SeriesStore(), specs, metadata=MetadataIndex(client), offline=offline)
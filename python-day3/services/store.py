@@ -0,0 +1,144 @@
+"""取得済み統計データのローカル列指向ストア（Arrow形式・差分追記）"""
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+import pandas as pd
+
+from services.instrumentation import get_logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    PYARROW_AVAILABLE = True
+except ImportError:  # pyarrowがなければストアを使わず毎回全件取得する
+    PYARROW_AVAILABLE = False
+
+logger = get_logger("store")
+
+DEFAULT_STORE_DIR = os.getenv(
+    "ESTAT_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "estat")
+)
+
+TIME_COLUMN = '@time'
+VALUE_COLUMN = '$'
+# 以前の形式（全列をastype(str)で保存）で欠損値が変換されていた文字列
+_LEGACY_NULLS = ('None', 'nan')
+
+
+def storage_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    ストアに保存する形にそろえる（読み込んだ側で型を推測し直さなくてよいようにする）
+
+    - 値（$）は数値（e-Statの "-"・"…" などの記号と欠損はNaN）
+    - 分類・時間軸のコードなど文字列の列は、欠損をNoneのまま残して文字列にそろえる
+    - それ以外の列（数値・日時・カテゴリ）は元の型のまま
+    """
+    df = df.copy()
+    for column in df.columns:
+        values = df[column]
+        if column == VALUE_COLUMN:
+            df[column] = pd.to_numeric(values, errors='coerce').astype('float64')
+        elif pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values):
+            df[column] = values.where(values.isna(), values.astype(str))
+    return df
+
+
+class SeriesStore:
+    def __init__(self, store_dir: str = DEFAULT_STORE_DIR):
+        """
+        Args:
+            store_dir: Arrowファイルの保存ディレクトリ（統計表ID・絞り込み条件ごとに1ファイル）
+        """
+        self.store_dir = store_dir
+        self.enabled = PYARROW_AVAILABLE
+        if self.enabled:
+            os.makedirs(store_dir, exist_ok=True)
+
+    def _path(self, stats_data_id: str, filters: Dict) -> str:
+        # 差分取得用のcdTimeFrom・メタ情報フラグは系列の同一性に関係しない
+        key_filters = {k: v for k, v in filters.items() if k not in ("cdTimeFrom", "metaGetFlg")}
+        digest = hashlib.sha256(
+            json.dumps(key_filters, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:12]
+        return os.path.join(self.store_dir, f"{stats_data_id}_{digest}.arrow")
+
+    def load(self, stats_data_id: str, filters: Dict) -> Optional[pd.DataFrame]:
+        """保存済みのデータを読み込む（メモリマップで読むのでコピーが発生しにくい）"""
+        if not self.enabled:
+            return None
+        path = self._path(stats_data_id, filters)
+        if not os.path.exists(path):
+            return None
+        try:
+            table = feather.read_table(path, memory_map=True)
+        except (OSError, pa.ArrowInvalid):
+            return None
+        df = table.to_pandas()
+        for column in df.columns:
+            if column != VALUE_COLUMN and pd.api.types.is_string_dtype(df[column]):
+                df[column] = df[column].mask(df[column].isin(_LEGACY_NULLS))
+        return storage_frame(df)
+
+    def latest_time(self, stored: Optional[pd.DataFrame]) -> Optional[str]:
+        """保存済みデータの最新の時間軸コード"""
+        if stored is None or stored.empty or TIME_COLUMN not in stored.columns:
+            return None
+        return str(stored[TIME_COLUMN].max())
+
+    def append(self, stats_data_id: str, filters: Dict, stored: Optional[pd.DataFrame], new: pd.DataFrame) -> pd.DataFrame:
+        """
+        新しく取得した行を追記して保存し、全期間のデータを返す
+
+        同じ分類・時間軸の行は新しく取得した値で上書きする（速報値の改訂に対応）
+        """
+        new = storage_frame(new)
+        if stored is None or stored.empty:
+            combined = new
+        elif new.empty:
+            return stored
+        else:
+            combined = pd.concat([stored, new], ignore_index=True)
+            key_columns = [c for c in combined.columns if c.startswith('@')]
+            combined = combined.drop_duplicates(subset=key_columns, keep='last')
+            combined = combined.sort_values(TIME_COLUMN, kind='stable').reset_index(drop=True)
+
+        if self.enabled and not combined.empty:
+            self._write(self._path(stats_data_id, filters), combined)
+        return combined
+
+    def _write(self, path: str, df: pd.DataFrame) -> None:
+        """一時ファイルに書いてから置き換え（読み込み中の他プロセスを壊さない）"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        # 型と欠損値をそのまま保存する（文字列にすると欠損が 'None'・'nan' になり元に戻せない）
+        table = pa.Table.from_pandas(storage_frame(df), preserve_index=False)
+        feather.write_feather(table, tmp_path, compression="uncompressed")  # メモリマップで読むため非圧縮
+        os.replace(tmp_path, path)
+
+
+def fetch_incremental(client, store: SeriesStore, stats_data_id: str, filters: Dict) -> pd.DataFrame:
+    """
+    ストアにある最新の時間軸以降だけをe-Statから取得して追記し、全期間のデータを返す
+
+    最新月は改訂されることがあるため、cdTimeFromには保存済みの最新コードをそのまま指定する。
+    e-Statに接続できない場合は保存済みのデータを返す（オフラインでも表示できる）。
+    """
+    stored = store.load(stats_data_id, filters)
+    latest = store.latest_time(stored)
+
+    request_filters = dict(filters)
+    if latest is not None:
+        request_filters["cdTimeFrom"] = latest
+        logger.info("保存済みデータ: %d件（最新: %s）→ 差分のみ取得します", len(stored), latest)
+
+    try:
+        new = client.get_stats_frame(stats_data_id, **request_filters)
+    except Exception as e:
+        if stored is None:
+            raise
+        logger.warning("e-Statに接続できないため保存済みデータを使用します: %s: %s", type(e).__name__, e)
+        return stored
+
+    return store.append(stats_data_id, filters, stored, new)
@@ -0,0 +1,116 @@
+"""getStatsDataレスポンスの逐次解析（VALUEを辞書のリストにせず列ごとのリストに直接格納）
+
+JSON全体をresponse.json()で辞書にしてからpd.DataFrame(VALUE)で作り直すと、
+大きな統計表ではVALUE 1件ごとの辞書とデータフレームの両方がメモリに載る。
+ijsonで読みながら列ごとのリストに詰めれば、ピークメモリはほぼ列のリスト分だけになる。
+"""
+import io
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, List, Optional
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+_ROOT = "GET_STATS_DATA"
+_RESULT = f"{_ROOT}.RESULT"
+_RESULT_INF = f"{_ROOT}.STATISTICAL_DATA.RESULT_INF"
+_DATA_INF = f"{_ROOT}.STATISTICAL_DATA.DATA_INF"
+_VALUE = f"{_DATA_INF}.VALUE"
+
+
+@dataclass
+class ColumnBuffer:
+    """VALUEを列ごとに格納したもの（複数ページ分を追記できる）"""
+    columns: Dict[str, List] = field(default_factory=dict)
+    rows: int = 0
+
+    def append_row(self, item: Dict) -> None:
+        """VALUE 1件を追加（その行にない列はNoneで埋める）"""
+        for key, value in item.items():
+            values = self.columns.get(key)
+            if values is None:
+                values = self.columns[key] = [None] * self.rows
+            elif len(values) < self.rows:
+                values.extend([None] * (self.rows - len(values)))
+            values.append(value)
+        self.rows += 1
+
+    def to_dict(self) -> Dict[str, List]:
+        for values in self.columns.values():
+            if len(values) < self.rows:
+                values.extend([None] * (self.rows - len(values)))
+        return self.columns
+
+
+@dataclass
+class StreamedPage:
+    """1ページ分の解析結果のうち、ページングとエラー判定に必要な部分"""
+    status: int = 0
+    error_msg: str = ""
+    total_number: Optional[int] = None
+    next_key: Optional[int] = None
+
+
+class _HeadRecorder:
+    """最初のVALUEが出てくるまでに読んだバイト列（RESULT・RESULT_INFなどの先頭部分）を記録する"""
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.chunks: List[bytes] = []
+        self.recording = True
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.stream.read(size)
+        if self.recording:
+            self.chunks.append(chunk)
+        return chunk
+
+
+def _parse_head(head: bytes) -> StreamedPage:
+    """レスポンスの先頭部分からSTATUS・NEXT_KEYなどを取り出す（DATA_INFに入ったら打ち切る）"""
+    page = StreamedPage()
+    try:
+        for prefix, event, value in ijson.parse(io.BytesIO(head)):
+            if prefix == _DATA_INF:
+                break
+            if prefix == f"{_RESULT}.STATUS":
+                page.status = int(value)
+            elif prefix == f"{_RESULT}.ERROR_MSG":
+                page.error_msg = value
+            elif prefix == f"{_RESULT_INF}.TOTAL_NUMBER":
+                page.total_number = int(value)
+            elif prefix == f"{_RESULT_INF}.NEXT_KEY":
+                page.next_key = int(value)
+    except ijson.IncompleteJSONError:
+        pass  # 先頭部分だけなので途中で切れている
+    return page
+
+
+def parse_stats_data_stream(stream: BinaryIO, buffer: ColumnBuffer) -> StreamedPage:
+    """
+    getStatsDataのレスポンスを読みながら、VALUEをbufferに追記する
+
+    VALUEの各要素はijson（Cバックエンド）で1件ずつ辞書にして列に移すため、
+    同時にメモリに載る辞書は1件分だけになる。
+    ページングに必要な情報はVALUEより前にあるので、先頭部分だけを記録しておき後から解析する。
+
+    Args:
+        stream: レスポンス本文（readできるバイト列のストリーム）
+        buffer: VALUEの格納先
+    """
+    recorder = _HeadRecorder(stream)
+    rows_before = buffer.rows
+    for item in ijson.items(recorder, f"{_VALUE}.item", use_float=True):
+        recorder.recording = False
+        buffer.append_row(item)
+
+    head = b"".join(recorder.chunks)
+    if buffer.rows == rows_before and head:
+        # VALUEが1件だけだとe-Statはリストではなく辞書で返す（この場合は全体を記録済み）
+        for item in ijson.items(io.BytesIO(head), _VALUE, use_float=True):
+            if isinstance(item, dict):
+                buffer.append_row(item)
+    return _parse_head(head)
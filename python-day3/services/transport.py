@@ -0,0 +1,249 @@
+"""e-Stat APIへのHTTP通信（リトライ・レート制限・同一リクエストの集約・サーキットブレーカー）"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, Hashable, Optional
+
+import requests
+
+from services.instrumentation import get_logger, metrics
+
+logger = get_logger("transport")
+
+# 全セッション・全スレッドで共有するe-Statへのリクエストレート（秒あたり）とバースト数
+DEFAULT_RATE = float(os.getenv("ESTAT_RATE_LIMIT", "5"))
+DEFAULT_BURST = int(os.getenv("ESTAT_RATE_BURST", "10"))
+# 連続でこの回数失敗したら、一定時間e-Statへのリクエストを止める
+DEFAULT_FAILURE_THRESHOLD = int(os.getenv("ESTAT_BREAKER_THRESHOLD", "5"))
+DEFAULT_RESET_TIMEOUT = float(os.getenv("ESTAT_BREAKER_RESET", "60"))
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """サーキットブレーカーが開いているためリクエストを送らなかった場合の例外"""
+
+
+class RateLimitTimeout(requests.exceptions.Timeout):
+    """レート制限の待ち時間がタイムアウトを超えた場合の例外"""
+
+
+@dataclass
+class RetryPolicy:
+    """一時的なエラーのリトライ方法（指数バックオフ＋フルジッター）"""
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    retry_statuses: FrozenSet[int] = field(default_factory=lambda: frozenset({429, 500, 502, 503, 504}))
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        attempt回目（1始まり）の失敗後に待つ秒数
+
+        Retry-Afterヘッダー（秒数）があればそれを優先する。
+        ジッターを入れて、同時に失敗した複数のリクエストが同じ瞬間に再送しないようにする。
+        """
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_delay)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class TokenBucket:
+    def __init__(self, rate: float = DEFAULT_RATE, capacity: int = DEFAULT_BURST):
+        """
+        Args:
+            rate: 1秒あたりに補充するトークン数（= 平均リクエスト数）
+            capacity: ためておけるトークンの上限（= 連続して送れるリクエスト数）
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """トークンを1つ取得する（足りなければ待つ）。timeout秒以内に取れなければFalse"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+
+            if deadline is not None and now + wait > deadline:
+                return False
+            metrics.incr("transport.throttled")
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        """
+        Args:
+            failure_threshold: 連続失敗がこの回数に達したらリクエストを止める
+            reset_timeout: 止めてから試しに1件だけ送るまでの秒数
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """リクエストを送ってよいか（開いている間は、期限後に1件だけ試験的に通す）"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def release(self) -> None:
+        """許可されたリクエストを送らなかった場合に、試験的なリクエストの枠を戻す"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("e-Statへの接続が回復しました")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(
+                        "e-Statへのリクエストが%d回連続で失敗したため、%g秒間停止します",
+                        self._failures, self.reset_timeout
+                    )
+                    metrics.incr("transport.circuit_opened")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class RequestCoalescer:
+    """同じキーの処理が実行中なら、新たに実行せずその結果を待って共有する"""
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: Hashable, func: Callable):
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not leader:
+            metrics.incr("transport.coalesced")
+            return future.result()
+
+        try:
+            result = func()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+
+# Streamlitの全セッション・バッチ処理で共有する（ユーザーが増えてもe-Statへの負荷は一定）
+shared_rate_limiter = TokenBucket()
+shared_circuit_breaker = CircuitBreaker()
+
+
+class Transport:
+    def __init__(
+        self,
+        session: requests.Session,
+        retry: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        """
+        Args:
+            session: 接続を使い回すHTTPセッション
+            retry: リトライ方法（Noneなら既定の設定）
+            rate_limiter: レート制限（Noneならプロセス全体で共有するもの）
+            breaker: サーキットブレーカー（Noneならプロセス全体で共有するもの）
+        """
+        self.session = session
+        self.retry = retry or RetryPolicy()
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.breaker = breaker or shared_circuit_breaker
+
+    def get(self, url: str, timeout: float, **kwargs) -> requests.Response:
+        """
+        GETリクエストを送信する（一時的なエラーはリトライ）
+
+        ブレーカーが開いている間はCircuitOpenErrorを送出する。呼び出し側（ResponseCache）は
+        接続エラーと同じく扱い、キャッシュ済みのデータを返す。
+        """
+        if not self.breaker.allow():
+            metrics.incr("transport.short_circuited")
+            raise CircuitOpenError("e-Statへの接続が連続して失敗しているため、リクエストを一時停止しています")
+
+        attempt = 0
+        while True:
+            attempt += 1
+            if not self.rate_limiter.acquire(timeout=timeout):
+                self.breaker.release()
+                raise RateLimitTimeout(f"レート制限の待ち時間が{timeout:g}秒を超えました")
+
+            retry_after = None
+            try:
+                response = self.session.get(url, timeout=timeout, **kwargs)
+                if response.status_code not in self.retry.retry_statuses:
+                    # 4xxなどはe-Statが応答できているので失敗に数えない
+                    self.breaker.record_success()
+                    return response
+                retry_after = response.headers.get("Retry-After")
+                if attempt >= self.retry.max_attempts:
+                    self.breaker.record_failure()
+                    return response
+                reason = f"ステータスコード {response.status_code}"
+                # 読まずに捨てるレスポンスは閉じて、接続をプールに戻す（stream=Trueでは閉じないと接続が残る）
+                response.close()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.retry.max_attempts:
+                    self.breaker.record_failure()
+                    raise
+                reason = f"{type(e).__name__}: {e}"
+            except requests.exceptions.RequestException:
+                # URL不正などリトライしても直らないエラー
+                self.breaker.record_failure()
+                raise
+
+            delay = self.retry.delay(attempt, retry_after)
+            metrics.incr("transport.retries")
+            logger.warning("リクエストに失敗しました（%s）。%.1f秒後に再試行します（%d/%d）",
+                           reason, delay, attempt, self.retry.max_attempts - 1)
+            time.sleep(delay)
@@ -1,101 +1,76 @@
-import requests
-import json
+"""
+統計表の検索（メタ情報インデックスのローカル検索）
+
+    python test_estat.py "消費者物価指数 2020年基準"
+    python test_estat.py 景気動向指数
+
+まずローカルのインデックス（MetadataIndex.search）を探し、見つからないときだけ
+getStatsListで検索してインデックスに登録する（次回からはネットワークにアクセスしない）。
+"""
 import os
+import sys
+
 from dotenv import load_dotenv
 
-# 環境変数の読み込み
-load_dotenv()
-ESTAT_API_KEY = os.getenv("ESTAT_API_KEY")
-
-print("=" * 80)
-print("e-Stat API テスト: 消費者物価指数の統計表を検索")
-print("=" * 80)
-
-# 統計表情報を検索
-url = "https://api.e-stat.go.jp/rest/3.0/app/json/getStatsList"
-params = {
-    "appId": ESTAT_API_KEY,
-    "searchWord": "消費者物価指数 2020年基準",
-    "limit": 10
-}
-
-print(f"\n検索ワード: 消費者物価指数")
-print(f"リクエストURL: {url}")
-print(f"\nAPIリクエストを送信中...\n")
-
-try:
-    response = requests.get(url, params=params, timeout=30)
-    print(f"ステータスコード: {response.status_code}\n")
-
-    if response.status_code == 200:
-        data = response.json()
-
-        print("レスポンスの構造:")
-        print(json.dumps(data, indent=2, ensure_ascii=False)[:1000])
-        print("\n" + "=" * 80)
-
-        if "GET_STATS_LIST" in data:
-            datalist_inf = data["GET_STATS_LIST"]["DATALIST_INF"]
-
-            # TABLE_INFを取得
-            if "TABLE_INF" in datalist_inf:
-                table_inf = datalist_inf["TABLE_INF"]
-                # リストでない場合はリストに変換
-                stats_list = table_inf if isinstance(table_inf, list) else [table_inf]
-            else:
-                print("TABLE_INFが見つかりません")
-                print(f"DATALIST_INFのキー: {list(datalist_inf.keys())}")
-                stats_list = []
-
-            print(f"\n検索結果: {len(stats_list)}件\n")
-            print("=" * 80)
-
-            for i, stat in enumerate(stats_list, 1):
-                print(f"\n【統計 {i}】")
-                print(f"統計表ID: {stat.get('@id', 'N/A')}")
-                print(f"統計名: {stat.get('STAT_NAME', {}).get('$', 'N/A')}")
-                print(f"政府組織: {stat.get('GOV_ORG', {}).get('$', 'N/A')}")
-                print(f"タイトル: {stat.get('TITLE', {}).get('$', stat.get('TITLE', 'N/A'))}")
-                print(f"統計名称: {stat.get('STATISTICS_NAME', 'N/A')}")
-
-                # この統計表IDでデータを取得してみる
-                stats_id = stat.get('@id', '')
-                if stats_id:
-                    print(f"\n  → この統計表IDでデータ取得を試行: {stats_id}")
-
-                    data_url = "https://api.e-stat.go.jp/rest/3.0/app/json/getStatsData"
-                    data_params = {
-                        "appId": ESTAT_API_KEY,
-                        "statsDataId": stats_id,
-                        "limit": 3
-                    }
-
-                    data_response = requests.get(data_url, params=data_params, timeout=30)
-                    if data_response.status_code == 200:
-                        result = data_response.json()
-                        if "GET_STATS_DATA" in result:
-                            stat_data = result["GET_STATS_DATA"]["STATISTICAL_DATA"]
-                            if "DATA_INF" in stat_data and "VALUE" in stat_data["DATA_INF"]:
-                                values = stat_data["DATA_INF"]["VALUE"]
-                                print(f"  ✓ データ取得成功! ({len(values)}件)")
-                                print(f"  サンプル: {json.dumps(values[0], ensure_ascii=False)[:200]}...")
-                            else:
-                                print(f"  ✗ データが見つかりません")
-                                print(f"  利用可能なキー: {list(stat_data.keys())}")
-                    else:
-                        print(f"  ✗ データ取得失敗 (ステータス: {data_response.status_code})")
-
-                print("-" * 80)
-        else:
-            print("検索結果が見つかりませんでした")
-            print(f"レスポンス: {json.dumps(data, indent=2, ensure_ascii=False)[:500]}")
-    else:
-        print(f"エラー: ステータスコード {response.status_code}")
-        print(f"レスポンス: {response.text[:500]}")
-
-except Exception as e:
-    print(f"エラーが発生しました: {type(e).__name__}: {str(e)}")
-    import traceback
-    print(traceback.format_exc())
-
-print("\n" + "=" * 80)
+from services.estat_client import EStatClient, as_list
+from services.metadata import MetadataIndex
+
+DEFAULT_SEARCH_WORD = "消費者物価指数 2020年基準"
+
+
+def fetch_tables(client: EStatClient, metadata: MetadataIndex, word: str) -> None:
+    """getStatsListで検索して結果をインデックスに登録する"""
+    data = client.get_json("getStatsList", {"searchWord": word, "limit": 10})
+    datalist_inf = data.get("GET_STATS_LIST", {}).get("DATALIST_INF", {})
+    metadata.add_tables(as_list(datalist_inf.get("TABLE_INF")))
+
+
+def main() -> None:
+    word = " ".join(sys.argv[1:]) or DEFAULT_SEARCH_WORD
+
+    # 環境変数の読み込み
+    load_dotenv()
+    client = EStatClient(os.getenv("ESTAT_API_KEY"))
+    metadata = MetadataIndex(client)
+
+    print("=" * 80)
+    print(f"統計表の検索: {word}")
+    print("=" * 80)
+
+    tables = metadata.search(word)
+    if not tables:
+        print("\nローカルのインデックスに該当がないため、getStatsListで検索します...")
+        try:
+            fetch_tables(client, metadata, word)
+        except Exception as e:
+            print(f"エラーが発生しました: {type(e).__name__}: {e}")
+            return
+        tables = metadata.search(word)
+
+    print(f"\n検索結果: {len(tables)}件\n")
+    print("=" * 80)
+
+    for i, table in enumerate(tables, 1):
+        print(f"\n【統計 {i}】")
+        print(f"統計表ID: {table['id']}")
+        print(f"統計名: {table['stat_name'] or 'N/A'}")
+        print(f"政府組織: {table['gov_org'] or 'N/A'}")
+        print(f"タイトル: {table['title'] or 'N/A'}")
+        print(f"統計名称: {table['statistics_name'] or 'N/A'}")
+        print(f"データ件数: {table['total_number'] or 'N/A'}件 / 周期: {table['cycle'] or 'N/A'} / 更新日: {table['updated_date'] or 'N/A'}")
+
+        # 分類コードはキャッシュ済みのメタ情報があればそこから表示
+        meta = metadata.lookup(table["id"])
+        if meta is not None:
+            for class_id, class_info in meta["classes"].items():
+                print(f"  {class_id}（{class_info['name']}）: {len(class_info['codes'])}コード")
+            if meta["time_range"]:
+                print(f"  時間軸: {meta['time_range'][0]} 〜 {meta['time_range'][1]}")
+
+        print("-" * 80)
+
+    print("\n" + "=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""python-day3 直下のservices・benchmarksをimportできるようにする"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
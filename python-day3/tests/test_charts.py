@@ -0,0 +1,79 @@
+"""LTTBによる間引きと、ブラウザへ送る図のJSONの大きさ"""
+import numpy as np
+import pandas as pd
+
+from services.charts import ChartConfig, FigureCache, build_line_figure, downsample, figure_key, lttb_indices
+
+
+def random_walk(points: int) -> pd.Series:
+    index = pd.date_range("1900-01-01", periods=points, freq="D")
+    return pd.Series(np.random.default_rng(0).normal(0, 1, points).cumsum(), index=index)
+
+
+def config(max_points):
+    return ChartConfig(title="テスト", value_column="値", name="系列", color="#1f77b4", max_points=max_points)
+
+
+def test_lttb_keeps_endpoints_and_order():
+    series = random_walk(2000)
+    x = series.index.values.astype("datetime64[ns]").astype(np.int64)
+    indices = lttb_indices(x, series.to_numpy(), 100)
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == len(series) - 1
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_keeps_extremes():
+    series = random_walk(2000)
+    series.iloc[777] = 1000.0  # 目立つ外れ値は間引いても残る
+    assert 1000.0 in downsample(series, 100).to_numpy()
+
+
+def test_downsampling_shrinks_figure_payload():
+    # Streamlitは再実行のたびに図のJSONを送り直すため、その大きさを間引きの前後で比べる
+    series = random_walk(20000)
+    full = len(build_line_figure(series, config(None)).to_json())
+    reduced = len(build_line_figure(series, config(500)).to_json())
+    print(f"図のJSON: 間引きなし {full:,}バイト -> 500点 {reduced:,}バイト")
+    assert reduced * 10 < full
+    assert reduced < 50_000
+
+
+def test_short_series_is_not_downsampled():
+    series = random_walk(300)
+    assert len(downsample(series, 500)) == 300
+
+
+def test_figure_cache_reuses_figure_for_same_data():
+    cache = FigureCache()
+    series = random_walk(1000)
+    first = cache.get_figure(series, config(500))
+    assert cache.get_figure(series.copy(), config(500)) is first
+    assert cache.get_figure(series, config(200)) is not first
+    changed = series.copy()
+    changed.iloc[-1] += 1
+    assert cache.get_figure(changed, config(500)) is not first
+
+
+def test_rows_without_time_or_value_are_not_plotted():
+    series = random_walk(1000)
+    index = series.index.to_list()
+    index[10] = pd.NaT
+    series.index = pd.DatetimeIndex(index)
+    series.iloc[20] = np.nan
+
+    # NaTをint64にすると最小値になり、先頭に残るうえ間引きの計算が崩れる
+    plotted = downsample(series, 100)
+    assert len(plotted) == 100
+    assert plotted.index.notna().all() and plotted.notna().all()
+    assert plotted.index.is_monotonic_increasing
+    assert "998点中100点" in build_line_figure(series, config(100)).layout.title.text
+
+
+def test_figure_key_follows_data_and_config():
+    series = random_walk(100)
+    assert figure_key(series, config(500)) == figure_key(series.copy(), config(500))
+    assert figure_key(series, config(200)) != figure_key(series, config(500))
+    changed = series.copy()
+    changed.iloc[0] += 1
+    assert figure_key(changed, config(500)) != figure_key(series, config(500))
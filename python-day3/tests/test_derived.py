@@ -0,0 +1,74 @@
+"""派生指標（前年比・前月比・移動平均）の計算と、欠けた月の扱い"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.derived import DerivedMetricsCache, compute_catalog, to_monthly_wide
+
+
+def monthly(values, start="2020-01-01"):
+    """月初日をindexにした系列（normalize_stats_frameと同じく新しい順）"""
+    index = pd.date_range(start, periods=len(values), freq='MS')
+    return pd.Series(values, index=index, dtype='float32').iloc[::-1]
+
+
+def test_year_over_year_and_month_over_month():
+    series = monthly([100 + i for i in range(14)])
+    result = compute_catalog({'cpi': series})['cpi']
+
+    assert result.index.is_monotonic_increasing
+    assert result['前年比（%）'].iloc[:12].isna().all()
+    assert result['前年比（%）'].iloc[12] == pytest.approx(12 / 100 * 100)
+    assert result['前年比（%）'].iloc[13] == pytest.approx(12 / 101 * 100)
+    assert np.isnan(result['前月比（%）'].iloc[0])
+    assert result['前月比（%）'].iloc[1] == pytest.approx(1.0)
+
+
+def test_moving_averages():
+    result = compute_catalog({'cpi': monthly([1, 2, 3, 4, 5, 6])})['cpi']
+    assert result['3ヶ月移動平均'].tolist()[2:] == [2.0, 3.0, 4.0, 5.0]
+    assert result['3ヶ月移動平均'].iloc[:2].isna().all()
+    assert result['6ヶ月移動平均'].iloc[-1] == pytest.approx(3.5)
+    assert result['12ヶ月移動平均'].isna().all()
+
+
+def test_missing_month_keeps_twelve_rows_as_twelve_months():
+    values = [100 + i for i in range(16)]
+    series = monthly(values).drop(pd.Timestamp("2020-03-01"))
+    result = compute_catalog({'cpi': series})['cpi']
+
+    # 欠けた月は行として残り、前年比は暦の上で12ヶ月前と比べる
+    assert len(result) == 16
+    assert np.isnan(result.loc["2020-03-01", '前年比（%）'])
+    assert np.isnan(result.loc["2021-03-01", '前年比（%）'])
+    assert result.loc["2021-02-01", '前年比（%）'] == pytest.approx(12 / 101 * 100)
+    assert result.loc["2021-04-01", '前年比（%）'] == pytest.approx(12 / 103 * 100)
+    # 欠けた月をまたぐ前月比・移動平均は計算しない
+    assert np.isnan(result.loc["2020-04-01", '前月比（%）'])
+    assert result.loc["2020-04-01":"2020-05-01", '3ヶ月移動平均'].isna().all()
+    assert result.loc["2020-06-01", '3ヶ月移動平均'] == pytest.approx(104.0)
+
+
+def test_wide_frame_aligns_series_and_drops_bad_index():
+    first = monthly([1, 2, 3])
+    second = pd.Series([10.0, 11.0, 99.0, 12.0], index=pd.to_datetime(
+        ["2020-02-01", "2020-04-01", "2020-04-01", None]
+    ))
+    wide = to_monthly_wide({'a': first, 'b': second})
+    assert wide.index.tolist() == list(pd.date_range("2020-01-01", "2020-04-01", freq='MS'))
+    assert wide['a'].tolist()[:3] == [1.0, 2.0, 3.0] and np.isnan(wide['a'].iloc[3])
+    # 同じ時点の重複は最初の1件、時点のない行は除く
+    assert wide['b'].iloc[1] == 10.0 and np.isnan(wide['b'].iloc[2]) and wide['b'].iloc[3] == 11.0
+
+
+def test_constant_series_has_no_z_score():
+    result = compute_catalog({'flat': monthly([5, 5, 5])})['flat']
+    assert result['zスコア'].isna().all()
+
+
+def test_cache_reuses_results_for_same_data():
+    cache = DerivedMetricsCache()
+    series = monthly([1, 2, 3])
+    first = cache.get('cpi', series)
+    assert cache.get('cpi', series.copy()) is first
+    assert cache.get('cpi', monthly([1, 2, 4])) is not first
@@ -0,0 +1,134 @@
+"""EStatClient.get_stats_frame（逐次解析）のキャッシュ・同時リクエストの集約"""
+import os
+import threading
+
+import pytest
+
+from benchmarks.fixtures import FIXTURE_STATS_DATA_ID, generate_fixture
+from benchmarks.stub_server import StubEStatServer
+from services.cache import ResponseCache
+from services.estat_client import EStatClient
+from services.streaming import IJSON_AVAILABLE
+from services.transport import CircuitBreaker, TokenBucket, Transport
+
+pytestmark = pytest.mark.skipif(not IJSON_AVAILABLE, reason="逐次解析にはijsonが必要")
+
+
+@pytest.fixture
+def server():
+    with StubEStatServer({FIXTURE_STATS_DATA_ID: generate_fixture(250)}) as server:
+        yield server
+
+
+def make_client(server, cache=None, page_size=100):
+    client = EStatClient("test", cache=cache, base_url=server.base_url, page_size=page_size, streaming=True)
+    client.transport = Transport(client.session, rate_limiter=TokenBucket(1e9, 10 ** 9), breaker=CircuitBreaker())
+    calls = []
+    get = client.session.get
+
+    def counting_get(url, **kwargs):
+        calls.append(kwargs.get("params"))
+        return get(url, **kwargs)
+
+    client.session.get = counting_get
+    return client, calls
+
+
+def test_streamed_frame_reads_all_pages(server):
+    client, calls = make_client(server)
+    df = client.get_stats_frame(FIXTURE_STATS_DATA_ID)
+    assert len(df) == 250
+    assert len(calls) == 3  # 100件ずつ3ページ
+
+
+def test_second_frame_within_ttl_makes_no_request(server, tmp_path):
+    client, calls = make_client(server, cache=ResponseCache(str(tmp_path)))
+    first = client.get_stats_frame(FIXTURE_STATS_DATA_ID)
+    requests_after_first = len(calls)
+
+    second = client.get_stats_frame(FIXTURE_STATS_DATA_ID)
+    assert len(calls) == requests_after_first
+    assert second.equals(first)
+
+
+def test_cached_frame_is_shared_across_clients(server, tmp_path):
+    # プロセス再起動・別レプリカでも同じディスクキャッシュから返す
+    first, _ = make_client(server, cache=ResponseCache(str(tmp_path)))
+    first.get_stats_frame(FIXTURE_STATS_DATA_ID)
+
+    second, calls = make_client(server, cache=ResponseCache(str(tmp_path)))
+    assert len(second.get_stats_frame(FIXTURE_STATS_DATA_ID)) == 250
+    assert calls == []
+
+
+def test_concurrent_frames_are_coalesced(server):
+    client, calls = make_client(server)
+    started = threading.Barrier(4)
+    results = []
+
+    def fetch():
+        started.wait()
+        results.append(len(client.get_stats_frame(FIXTURE_STATS_DATA_ID)))
+
+    # 最初のページを遅らせて、全スレッドが同じ取得を待つようにする
+    get = client.session.get
+
+    def slow_get(url, **kwargs):
+        threading.Event().wait(0.2)
+        return get(url, **kwargs)
+
+    client.session.get = slow_get
+    threads = [threading.Thread(target=fetch) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [250] * 4
+    assert len(calls) == 3
+
+
+def expire(cache):
+    """保存済みのエントリをすべてTTL切れ（stale_ttlも過ぎた状態）にする"""
+    for name in os.listdir(cache.cache_dir):
+        key = name[:-len(".json")]
+        entry = cache.get(key)
+        entry.stored_at -= cache.ttl + cache.stale_ttl + 1
+        cache.set(key, entry)
+
+
+def test_expired_frame_is_revalidated_with_etag(server, tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    client, calls = make_client(server, cache=cache)
+    first = client.get_stats_frame(FIXTURE_STATS_DATA_ID)
+    expire(cache)
+
+    headers = []
+    get = client.session.get
+
+    def recording_get(url, **kwargs):
+        headers.append(kwargs.get("headers"))
+        return get(url, **kwargs)
+
+    client.session.get = recording_get
+    calls.clear()
+    second = client.get_stats_frame(FIXTURE_STATS_DATA_ID)
+
+    # 更新がなければ最初のページの304だけで、保存済みのデータフレームを返す
+    assert headers == [{"If-None-Match": server.etag(FIXTURE_STATS_DATA_ID)}]
+    assert second.equals(first)
+    # 304で延命したエントリはTTL内になる
+    assert len(client.get_stats_frame(FIXTURE_STATS_DATA_ID)) == 250
+    assert len(calls) == 1
+
+
+def test_revised_table_is_fetched_again(server, tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    client, calls = make_client(server, cache=cache)
+    client.get_stats_frame(FIXTURE_STATS_DATA_ID)
+    expire(cache)
+
+    server.revise(FIXTURE_STATS_DATA_ID, generate_fixture(120))
+    calls.clear()
+    assert len(client.get_stats_frame(FIXTURE_STATS_DATA_ID)) == 120
+    assert len(calls) == 2
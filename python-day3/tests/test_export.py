@@ -0,0 +1,83 @@
+"""export.py（終了コードと出力ファイルの中身）をスタブサーバーと合成フィクスチャで確認する"""
+import json
+
+import pandas as pd
+import pytest
+
+import export
+from benchmarks.fixtures import FIXTURE_STATS_DATA_ID, load_fixture
+from benchmarks.stub_server import StubEStatServer
+from services.cache import ResponseCache
+from services.estat_client import EStatClient
+from services.series import SeriesEngine
+from services.store import SeriesStore
+from services.streaming import IJSON_AVAILABLE
+from services.transport import CircuitBreaker, TokenBucket, Transport
+
+pytestmark = pytest.mark.skipif(not IJSON_AVAILABLE, reason="逐次解析にはijsonが必要")
+
+# フィクスチャは景気動向指数（keiki）と同じ統計表ID。CPIの統計表はスタブにないのでエラーになる
+FIXTURE = load_fixture("small")
+VALUES = FIXTURE["GET_STATS_DATA"]["STATISTICAL_DATA"]["DATA_INF"]["VALUE"]
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    """スタブサーバーに接続するエンジンでexport.mainを実行し、(終了コード, 出力先)を返す"""
+    monkeypatch.setenv("ESTAT_API_KEY", "test")
+
+    with StubEStatServer({FIXTURE_STATS_DATA_ID: FIXTURE}) as server:
+        def build_engine(app_id, specs, offline=False):
+            client = EStatClient(app_id, cache=ResponseCache(str(tmp_path / "cache")), base_url=server.base_url)
+            client.transport = Transport(client.session, rate_limiter=TokenBucket(1e9, 10 ** 9), breaker=CircuitBreaker())
+            return SeriesEngine(client, SeriesStore(str(tmp_path / "store")), specs, offline=offline)
+
+        monkeypatch.setattr(export, "build_engine", build_engine)
+        output_dir = tmp_path / "exports"
+
+        def main(*args):
+            return export.main([*args, "--output-dir", str(output_dir)]), output_dir
+
+        yield main
+
+
+def test_success_writes_csv_and_json(run):
+    code, output_dir = run("--series", "keiki")
+    assert code == 0
+    assert sorted(path.name for path in output_dir.iterdir()) == ["keiki.csv", "keiki.json"]
+
+    # 同じ時間軸の重複は1件にまとめ、新しい順に出力する
+    times = sorted({value["@time"] for value in VALUES}, reverse=True)
+    csv = pd.read_csv(output_dir / "keiki.csv", encoding="utf-8-sig", dtype={"時間軸": str})
+    assert csv["時間軸"].tolist() == times
+    assert csv.columns[0] == "時点"
+
+    records = json.loads((output_dir / "keiki.json").read_text(encoding="utf-8"))
+    assert len(records) == len(times)
+    assert records[0]["時間軸"] == times[0]
+    assert records[0]["年月"] == f"{times[0][:4]}年{times[0][6:8]}月"
+
+
+def test_derived_columns_are_added(run):
+    code, output_dir = run("--series", "keiki", "--derived", "--format", "csv")
+    assert code == 0
+    csv = pd.read_csv(output_dir / "keiki.csv", encoding="utf-8-sig")
+    assert {"前年比（%）", "3ヶ月移動平均"} <= set(csv.columns)
+
+
+def test_fetch_failure_exits_with_error_and_keeps_other_series(run):
+    code, output_dir = run("--series", "cpi", "keiki")
+    assert code == 1
+    assert sorted(path.name for path in output_dir.iterdir()) == ["keiki.csv", "keiki.json"]
+
+
+def test_unknown_series_is_rejected(run):
+    with pytest.raises(SystemExit) as exc_info:
+        run("--series", "unknown")
+    assert exc_info.value.code == 2
+
+
+def test_missing_api_key_exits_with_error(run, monkeypatch):
+    monkeypatch.delenv("ESTAT_API_KEY")
+    monkeypatch.setattr(export, "load_dotenv", lambda: None)
+    assert run("--series", "keiki")[0] == 1
@@ -0,0 +1,111 @@
+"""MetadataIndex の統計表のローカル検索・メタ情報のキャッシュ"""
+import pytest
+
+from services.metadata import MetadataIndex
+
+# getStatsListのTABLE_INF（必要な項目だけ）
+TABLES = [
+    {
+        "@id": "0003427113",
+        "STAT_NAME": {"@code": "00200573", "$": "消費者物価指数"},
+        "GOV_ORG": {"@code": "00200", "$": "総務省"},
+        "STATISTICS_NAME": "2020年基準消費者物価指数 全国 月次",
+        "TITLE": {"@no": "1", "$": "品目別価格指数 全国 月次"},
+        "CYCLE": "月次",
+        "OVERALL_TOTAL_NUMBER": 1234567,
+        "UPDATED_DATE": "2025-01-24",
+    },
+    {
+        "@id": "0003427114",
+        "STAT_NAME": {"@code": "00200573", "$": "消費者物価指数"},
+        "GOV_ORG": {"@code": "00200", "$": "総務省"},
+        "STATISTICS_NAME": "2015年基準消費者物価指数 全国 年次",
+        "TITLE": "品目別価格指数 全国 年次",  # 表題が文字列のこともある
+        "CYCLE": "年次",
+    },
+    {
+        "@id": "0003446461",
+        "STAT_NAME": {"@code": "00100405", "$": "景気動向指数"},
+        "GOV_ORG": {"@code": "00100", "$": "内閣府"},
+        "STATISTICS_NAME": "景気動向指数 長期系列",
+        "TITLE": {"$": "CI 一致指数"},
+        "CYCLE": "月次",
+    },
+]
+
+META_INFO = {
+    "GET_META_INFO": {
+        "METADATA_INF": {
+            "TABLE_INF": {"TITLE": {"$": "CI 一致指数"}, "STAT_NAME": {"$": "景気動向指数"}},
+            "CLASS_INF": {
+                "CLASS_OBJ": [
+                    {"@id": "cat01", "@name": "系列", "CLASS": {"@code": "100", "@name": "CI一致指数"}},
+                    {"@id": "time", "@name": "時間軸", "CLASS": [
+                        {"@code": "1985000101", "@name": "1985年1月"},
+                        {"@code": "2024001212", "@name": "2024年12月"},
+                    ]},
+                ]
+            },
+        }
+    }
+}
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+
+    def get_json(self, endpoint, params):
+        self.calls.append((endpoint, params))
+        return META_INFO
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "estat_meta.json")
+
+
+@pytest.fixture
+def index(path):
+    index = MetadataIndex(FakeClient(), path=path)
+    index.add_tables(TABLES)
+    return index
+
+
+def ids(tables):
+    return sorted(table["id"] for table in tables)
+
+
+def test_search_matches_all_words(index):
+    assert ids(index.search("消費者物価指数")) == ["0003427113", "0003427114"]
+    assert ids(index.search("消費者物価指数 2020年基準")) == ["0003427113"]
+    assert ids(index.search("消費者物価指数 景気")) == []
+
+
+def test_search_covers_title_and_statistics_name(index):
+    assert ids(index.search("CI")) == ["0003446461"]  # 表題
+    assert ids(index.search("長期系列")) == ["0003446461"]  # 統計名称
+    assert ids(index.search("年次")) == ["0003427114"]
+
+
+def test_search_returns_parsed_tables(index):
+    [table] = index.search("2020年基準")
+    assert table["title"] == "品目別価格指数 全国 月次"
+    assert table["gov_org"] == "総務省"
+    assert table["total_number"] == 1234567
+    assert index.client.calls == []  # 検索はネットワークにアクセスしない
+
+
+def test_index_is_saved_and_reloaded(index, path):
+    reloaded = MetadataIndex(FakeClient(), path=path)
+    assert ids(reloaded.search("景気動向指数")) == ["0003446461"]
+
+
+def test_meta_info_is_fetched_once(index, path):
+    assert index.code_labels("0003446461", "cat01") == {"100": "CI一致指数"}
+    assert index.time_range("0003446461") == ("1985000101", "2024001212")
+    assert len(index.client.calls) == 1
+
+    reloaded = MetadataIndex(FakeClient(), path=path)
+    assert reloaded.code_labels("0003446461", "cat01") == {"100": "CI一致指数"}
+    assert reloaded.client.calls == []
@@ -0,0 +1,74 @@
+"""normalize_stats_frame（時間軸コードの解析・欠損値・重複の削除・型）"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.normalize import normalize_stats_frame, parse_time_codes
+
+MAPPING = {'@tab': '表番号', '@cat01': '指標分類', '@time': '時間軸', '@unit': '単位', '$': '値'}
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=['@tab', '@cat01', '@time', '@unit', '$'])
+
+
+@pytest.mark.parametrize("code, expected", [
+    ("1985000101", "1985-01-01"),  # 月次
+    ("1985001212", "1985-12-01"),
+    ("1985000103", "1985-01-01"),  # 四半期（1-3月期）
+    ("1985001012", "1985-10-01"),  # 四半期（10-12月期）
+    ("1985000000", "1985-01-01"),  # 年次
+])
+def test_time_codes(code, expected):
+    assert parse_time_codes(pd.Series([code]))[0] == pd.Timestamp(expected)
+
+
+@pytest.mark.parametrize("code", ["1985100000", "1985001313", "abc", ""])
+def test_unparsable_time_codes_are_nat(code):
+    # 年度（1985100000）は月初日に対応しないのでNaT
+    assert pd.isna(parse_time_codes(pd.Series([code]))[0])
+
+
+def test_missing_value_markers_are_nan():
+    df = normalize_stats_frame(frame([
+        ['01', '100', '2020000101', '', '101.5'],
+        ['01', '100', '2020000202', '', '-'],
+        ['01', '100', '2020000303', '', '…'],
+    ]), MAPPING)
+    assert df['値'].dtype == np.float32
+    assert df['値'].isna().tolist() == [True, True, False]
+
+
+def test_sorted_newest_first_with_labels():
+    df = normalize_stats_frame(frame([
+        ['01', '100', '2020000101', '', '1'],
+        ['01', '100', '2020000303', '', '3'],
+        ['01', '100', '2020000202', '', '2'],
+    ]), MAPPING)
+    assert df.index.name == '時点'
+    assert df.index.tolist() == [pd.Timestamp(f"2020-0{m}-01") for m in (3, 2, 1)]
+    assert df['年月'].tolist() == ['2020年03月', '2020年02月', '2020年01月']
+
+
+def test_duplicate_times_keep_first_row():
+    rows = [
+        ['01', '100', '2020000101', '', '1'],
+        ['01', '100', '2020000101', '', '9'],
+        ['01', '100', '2020000202', '', '2'],
+    ]
+    df = normalize_stats_frame(frame(rows), MAPPING)
+    assert df['値'].tolist() == [2.0, 1.0]
+
+    kept = normalize_stats_frame(frame(rows), MAPPING, dedupe=False)
+    assert len(kept) == 3
+
+
+def test_code_columns_are_categories():
+    df = normalize_stats_frame(frame([
+        ['01', '100', '2020000101', '', '1'],
+        ['01', '200', '2020000202', '', '2'],
+    ]), MAPPING)
+    for column in ('表番号', '指標分類', '単位'):
+        assert isinstance(df[column].dtype, pd.CategoricalDtype)
+    # 時間軸コードは並べ替え・表示に使うのでカテゴリにしない
+    assert not isinstance(df['時間軸'].dtype, pd.CategoricalDtype)
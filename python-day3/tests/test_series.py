@@ -0,0 +1,66 @@
+"""SeriesEngineのグループ化（同じ統計表の系列を1回のリクエストで取得して分ける）"""
+import pandas as pd
+import pytest
+
+from services.catalog import SeriesSpec
+from services.series import SeriesEngine
+from services.store import SeriesStore
+
+STATS_DATA_ID = "0003446461"
+
+
+def spec(key, code, **filters):
+    return SeriesSpec(
+        key=key, name=key, title=key, chart_title=key, stats_data_id=STATS_DATA_ID,
+        filters={'cdCat01': code, **filters}, value_column='値', category_columns={'@cat01': '指標分類'}
+    )
+
+
+class RecordingClient:
+    """get_stats_frameの呼び出しを記録し、指定された分類コードの行を返すクライアント"""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_stats_frame(self, stats_data_id, **filters):
+        self.calls.append((stats_data_id, filters))
+        codes = filters['cdCat01'].split(',')
+        return pd.DataFrame([
+            {'@tab': '01', '@cat01': code, '@time': f"2020000{month}0{month}", '@unit': '', '$': str(int(code) + month)}
+            for code in codes for month in (1, 2)
+        ])
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SeriesStore(str(tmp_path / "estat"))
+
+
+def test_specs_sharing_a_table_are_fetched_once(store):
+    client = RecordingClient()
+    engine = SeriesEngine(client, store, [spec('leading', '100'), spec('coincident', '200')])
+    assert engine.request_count == 1
+
+    leading, error = engine.fetch_series('leading')
+    assert error is None
+    coincident, error = engine.fetch_series('coincident')
+    assert error is None
+
+    assert client.calls == [(STATS_DATA_ID, {'cdCat01': '100,200', 'metaGetFlg': 'N'})]
+    assert leading['指標分類'].unique().tolist() == ['100']
+    assert leading['値'].tolist() == [102.0, 101.0]
+    assert coincident['指標分類'].unique().tolist() == ['200']
+    assert coincident['値'].tolist() == [202.0, 201.0]
+
+
+def test_different_filters_are_separate_requests(store):
+    client = RecordingClient()
+    engine = SeriesEngine(client, store, [spec('national', '100'), spec('tokyo', '100', cdArea='13000')])
+    assert engine.request_count == 2
+
+    engine.fetch_series('national')
+    engine.fetch_series('tokyo')
+    assert [filters for _, filters in client.calls] == [
+        {'cdCat01': '100', 'metaGetFlg': 'N'},
+        {'cdArea': '13000', 'cdCat01': '100', 'metaGetFlg': 'N'},
+    ]
@@ -0,0 +1,51 @@
+"""Transport.get のリトライ"""
+from services.transport import CircuitBreaker, RetryPolicy, TokenBucket, Transport
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    """決まった順番のステータスコードを返すセッション"""
+
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.responses = []
+
+    def get(self, url, **kwargs):
+        response = FakeResponse(self.statuses.pop(0))
+        self.responses.append(response)
+        return response
+
+
+def make_transport(session, max_attempts=3):
+    return Transport(
+        session,
+        retry=RetryPolicy(max_attempts=max_attempts, base_delay=0, max_delay=0),
+        rate_limiter=TokenBucket(1e9, 10 ** 9),
+        breaker=CircuitBreaker(),
+    )
+
+
+def test_retried_responses_are_closed():
+    session = FakeSession([503, 502, 200])
+    response = make_transport(session).get("http://example.invalid", timeout=1)
+
+    assert response.status_code == 200
+    assert [r.closed for r in session.responses] == [True, True, False]
+
+
+def test_last_response_is_returned_open():
+    session = FakeSession([503, 503])
+    response = make_transport(session, max_attempts=2).get("http://example.invalid", timeout=1)
+
+    # リトライを使い切ったレスポンスは呼び出し側が読むので閉じない
+    assert response.status_code == 503
+    assert [r.closed for r in session.responses] == [True, False]
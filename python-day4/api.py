@@ -0,0 +1,79 @@
+"""スコアのJSON APIサーバー（モバイルアプリなどからスコアを取得するため）
+
+使い方:
+    python api.py                          # http://127.0.0.1:8000 で起動
+    python api.py --host 0.0.0.0 --port 8080
+    python api.py --no-worker              # 事前計算せず保存済みの結果だけを返す
+
+起動すると全スポット・全スキルレベルの7日分のスコアをバックグラウンドで計算し、
+予報が更新されるたび（1時間ごと）に計算し直す。APIは計算済みの結果を返すだけなので、
+リクエストの数に関係なく応答時間は一定になる。
+
+    curl 'http://127.0.0.1:8000/api/scores?spot=湘南（鵠沼）&date=2025-01-01&skill=初心者'
+"""
+import argparse
+import logging
+import os
+import sys
+from typing import List
+
+from dotenv import load_dotenv
+
+from services.api import ScoreAPIServer
+from services.forecast import ForecastClient
+from services.forecast_cache import ForecastCache
+from services.moon import MoonTable
+from services.prescoring import FORECAST_DAYS, PrescoreWorker, ScoreStore
+from services.spots import get_registry
+
+logger = logging.getLogger("api")
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="サーフィン適性スコアのJSON APIを起動します")
+    parser.add_argument("--host", default="127.0.0.1", help="待ち受けるアドレス")
+    parser.add_argument("--port", type=int, default=8000, help="待ち受けるポート")
+    parser.add_argument("--days", type=int, default=FORECAST_DAYS, help="今日から何日分のスコアを計算するか")
+    parser.add_argument("--interpolate", action="store_true", help="波データを天気の時刻に合わせて補間する")
+    parser.add_argument("--hourly", action="store_true", help="1時間ごとの時間帯で計算する（風・気温を補間）")
+    parser.add_argument("--no-worker", action="store_true", help="事前計算をせず保存済みの結果だけを返す")
+    parser.add_argument("--access-log", action="store_true", help="アクセスログを出力する")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    args = parse_args(argv)
+
+    registry = get_registry()
+    store = ScoreStore()
+    if store.load():
+        logger.info("保存済みのスコアを読み込みました（%d件）", store.status()["entries"])
+
+    worker = None
+    if not args.no_worker:
+        api_key = os.getenv("OPENWEATHER_API_KEY", "")
+        if not api_key:
+            logger.warning("OPENWEATHER_API_KEYが未設定のため、天気データを取得できずスコアを計算できません")
+        client = ForecastClient(api_key, cache=ForecastCache())
+        spots = {spot.name: spot for spot in registry}
+        worker = PrescoreWorker(client, spots, store, MoonTable(), days=args.days,
+                                interpolate=args.interpolate, hourly=args.hourly)
+        worker.start()
+
+    server = ScoreAPIServer(store, registry, (args.host, args.port), access_log=args.access_log)
+    logger.info("APIを起動しました: %s", server.base_url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if worker is not None:
+            worker.stop()
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
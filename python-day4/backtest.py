@@ -0,0 +1,97 @@
+"""過去の波・風データによるスコアのバックテスト（Streamlitを起動せずに全スポットを集計）
+
+使い方:
+    python backtest.py                                  # archive/ 以下の全スポットを集計
+    python backtest.py --spots '湘南（鵠沼）' '千葉（一宮）' --start 2015-01-01 --end 2024-12-31
+    python backtest.py --processes 4 --output-dir backtest_results
+
+アーカイブは スポット名ごとのディレクトリにOpen-MeteoのCSV（またはJSON）を置く:
+    archive/湘南（鵠沼）/marine_2015-2024.csv    # Marine API: wave_height, wave_period, wave_direction[, swell_wave_height, swell_wave_period]
+    archive/湘南（鵠沼）/weather_2015-2024.csv   # Historical Weather API: wind_speed_10m, wind_direction_10m, precipitation
+
+全スポットの集計に成功すれば終了コード0、1つでも失敗すれば1を返す。
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+from typing import List
+
+import pandas as pd
+
+from services.backtest import DEFAULT_ARCHIVE_DIR, SKILL_LEVELS, combine, run_backtest
+from services.spots import get_registry
+
+
+def write_csv(df: pd.DataFrame, output_dir: str, name: str) -> str:
+    """集計結果を1ファイルに書き出す（一時ファイルに書いてから置き換える）"""
+    path = os.path.join(output_dir, f"{name}.csv")
+    tmp_path = f"{path}.tmp"
+    df.to_csv(tmp_path, index=False, encoding="utf-8-sig")  # Excelで文字化けしないようBOM付き
+    os.replace(tmp_path, path)
+    return path
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    registry = get_registry()
+    parser = argparse.ArgumentParser(description="過去の波・風データでサーフィン適性スコアを集計します")
+    parser.add_argument("--archive-dir", default=DEFAULT_ARCHIVE_DIR, help="スポットごとのアーカイブのディレクトリ")
+    parser.add_argument("--spots", nargs="+", choices=registry.names(), help="集計するスポット（省略時は全スポット）")
+    parser.add_argument("--skill-levels", nargs="+", choices=SKILL_LEVELS, default=list(SKILL_LEVELS), help="スキルレベル")
+    parser.add_argument("--start", type=date.fromisoformat, help="対象期間の最初の日（YYYY-MM-DD）")
+    parser.add_argument("--end", type=date.fromisoformat, help="対象期間の最後の日（YYYY-MM-DD）")
+    parser.add_argument("--processes", type=int, default=None, help="並列に計算するプロセス数（省略時はCPU数）")
+    parser.add_argument("--output-dir", help="集計結果のCSVを出力するディレクトリ")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    registry = get_registry()
+    spots = [registry[name] for name in (args.spots or registry.names())]
+
+    started = time.perf_counter()
+    results = run_backtest(
+        spots, args.archive_dir, args.skill_levels, start=args.start, end=args.end, processes=args.processes
+    )
+    elapsed = time.perf_counter() - started
+
+    failed = [result for result in results if result.error]
+    for result in failed:
+        print(f"{result.spot}: {result.error}", file=sys.stderr)
+
+    succeeded = [result for result in results if not result.error]
+    if not succeeded:
+        return 1
+
+    total = combine(succeeded, args.skill_levels)
+    scores = pd.concat(
+        [result.stats.score_summary().assign(spot=result.spot) for result in succeeded]
+        + [total.score_summary().assign(spot="全スポット")],
+        ignore_index=True
+    )
+    scores = scores[["spot", *scores.columns.drop("spot")]]
+    factors = total.factor_summary()
+
+    pd.set_option("display.width", 200)
+    print(f"{len(succeeded)}スポット・{total.hours:,}時間を{elapsed:.1f}秒で集計しました"
+          f"（{total.hours / max(elapsed, 1e-9):,.0f}時間/秒、欠損で除いた時間: {total.dropped:,}）")
+    print("\n■ スコアの分布")
+    print(scores.to_string(index=False, float_format="{:.2f}".format))
+    print("\n■ 要素ごとの加点・減点（全スポット）")
+    print(factors.to_string(index=False, float_format="{:.2f}".format))
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        histogram = pd.DataFrame(
+            total.histogram.T, columns=list(total.skill_levels)
+        ).rename_axis("score").reset_index()
+        for name, df in (("scores", scores), ("factors", factors), ("histogram", histogram)):
+            print(f"出力しました -> {write_csv(df, args.output_dir, name)}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,294 @@
+"""スポット詳細・全スポットランキングのベンチマーク（ローカルのスタブサーバーに対してオフラインで実行）
+
+使い方:
+    python benchmark.py                                # スポット詳細と全スポットランキングを計測
+    python benchmark.py --scenarios ranking --spots-count 200 --days 7
+    python benchmark.py --latency 0.2 --jitter 0.1     # 実際のAPIに近い応答時間で計測
+    python benchmark.py --error-rate 0.1               # 1割のリクエストをエラーにする
+    python benchmark.py --hourly                       # 1時間ごとの時間帯で計測
+    python benchmark.py --output bench.json            # 結果をJSONで保存
+    python benchmark.py --baseline bench.json          # 保存した結果より25%以上遅ければ終了コード1
+    python benchmark.py --record                       # 実際の予報をフィクスチャとして記録（APIキーが必要）
+
+画面と同じ処理（ForecastClient → merge_slots/merge_spots → スコア計算 → 表の作成）を
+工程ごとに計測し、1回の分析にかかる時間（中央値・95パーセンタイル）と、
+全スポットランキングの1秒あたりのスポット数・時間帯数を出力する。
+表の作成はStreamlitに渡す前の表・評価理由の作成まで（画面への描画は含まない）。
+リポジトリのフィクスチャ（benchmarks/fixtures/）は合成データ。ファイルがなければ同じ形の合成データを作って保存する。
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from dataclasses import replace
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from benchmarks.fixtures import load_fixtures, record_fixtures
+from benchmarks.stub_server import StubOpenMeteoServer, StubOpenWeatherServer
+from services.alignment import merge_slots
+from services.display import ranking_table, slot_rows
+from services.forecast import ForecastClient
+from services.forecast_cache import ForecastCache
+from services.moon import MoonTable
+from services.ranking import merge_spots, rank_spots, score_day, score_merged, session_windows
+from services.sessions import find_windows
+from services.spots import Spot, get_registry
+
+STAGES = {
+    "fetch": "取得",
+    "merge": "時刻合わせ",
+    "score": "スコア計算",
+    "render": "表の作成",
+}
+SCENARIOS = {
+    "detail": "スポット詳細",
+    "ranking": "全スポットランキング",
+}
+
+
+def synthetic_spots(spots: List[Spot], count: int) -> Dict[str, Spot]:
+    """
+    登録済みのスポットをずらして増やしたスポット（スポット数を増やしたときの計測用）
+
+    予報の格子セルが重ならないよう、複製は0.15°ずつ北にずらす。
+    """
+    result = {}
+    for i in range(count):
+        spot = spots[i % len(spots)]
+        copy = i // len(spots)
+        if copy:
+            spot = replace(spot, name=f"{spot.name}#{copy}", lat=spot.lat + 0.15 * copy)
+        result[spot.name] = spot
+    return result
+
+
+def analyze_spot(
+    client: ForecastClient,
+    spot: Spot,
+    target_date: date,
+    skill_level: str,
+    moon_table: MoonTable,
+    hourly: bool,
+    interpolate: bool
+) -> Dict:
+    """スポット詳細と同じ処理を1回実行し、工程ごとの時間を返す（取得に失敗したらerrorに理由を入れる）"""
+    timings = {stage: 0.0 for stage in STAGES}
+    started = time.perf_counter()
+    try:
+        weather_data = client.get_weather(spot.lat, spot.lon)
+        wave_data = client.get_waves(
+            spot.lat, spot.lon, target_date.isoformat(), (target_date + timedelta(days=1)).isoformat()
+        )
+    except Exception as e:
+        timings["fetch"] = time.perf_counter() - started
+        return {"stages": timings, "slots": 0, "error": str(e), "failed_spots": 1}
+    timings["fetch"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    day_slots = merge_slots(weather_data, wave_data, [target_date], hourly=hourly, interpolate=interpolate)
+    timings["merge"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scored = score_day(day_slots, spot, moon_table.lookup(target_date), skill_level)
+    timings["score"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    rows = slot_rows(day_slots, scored)
+    pd.DataFrame([{k: v for k, v in row.items() if k not in ('index', 'datetime')} for row in rows])
+    for row in rows:
+        scored.reasons(row['index'])
+    find_windows(day_slots['datetime'], scored.score, step=timedelta(hours=1 if hourly else 3))
+    timings["render"] = time.perf_counter() - started
+    return {"stages": timings, "slots": len(rows), "error": None, "failed_spots": 0}
+
+
+def rank_all(
+    client: ForecastClient,
+    spots: Dict[str, Spot],
+    dates: List[date],
+    skill_level: str,
+    moon_table: MoonTable,
+    hourly: bool,
+    interpolate: bool
+) -> Dict:
+    """全スポットランキングと同じ処理を1回実行し、工程ごとの時間を返す（取得に失敗したスポットはerrorsに数える）"""
+    timings = {}
+    started = time.perf_counter()
+    fetched = client.fetch_spots(
+        {name: spot.as_beach_info() for name, spot in spots.items()},
+        dates[0].isoformat(),
+        (dates[-1] + timedelta(days=1)).isoformat()
+    )
+    timings["fetch"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    slots = merge_spots(spots, fetched, dates, hourly=hourly, interpolate=interpolate)
+    timings["merge"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    moon = moon_table.lookup_many(dates)
+    moon_by_date = {
+        d: {'phase': str(moon['phase'][i]), 'is_spring_tide': bool(moon['is_spring_tide'][i])}
+        for i, d in enumerate(dates)
+    }
+    spot_scores = score_merged(slots, moon_by_date, skill_level, timedelta(hours=1) if hourly else timedelta(hours=3))
+    ranking = rank_spots(spot_scores)
+    windows_by_spot = session_windows(spot_scores)
+    timings["score"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    ranking_table(spot_scores, ranking, windows_by_spot)
+    for row in ranking['row']:
+        spot_scores.reasons(int(row))
+    timings["render"] = time.perf_counter() - started
+
+    errors = [data['error'] for data in fetched.values() if data['error']]
+    return {"stages": timings, "slots": len(slots), "error": errors[0] if errors else None, "failed_spots": len(errors)}
+
+
+def summarize(runs: List[Dict], spots: int) -> Dict:
+    """計測結果の中央値（時間は1スポット以上の取得に成功した回だけで集計する）"""
+    succeeded = [run for run in runs if run["failed_spots"] < spots]
+    walls = [sum(run["stages"].values()) for run in succeeded]
+    wall = statistics.median(walls) if walls else 0.0
+    slots = statistics.median(run["slots"] for run in succeeded) if succeeded else 0
+    return {
+        "spots": spots,
+        "slots": slots,
+        "runs": len(runs),
+        "failed_runs": len(runs) - len(succeeded),
+        "failed_spots": sum(run["failed_spots"] for run in runs),
+        "wall": wall,
+        "wall_p95": float(np.percentile(walls, 95)) if walls else 0.0,
+        "spots_per_sec": spots / wall if wall else 0.0,
+        "slots_per_sec": slots / wall if wall else 0.0,
+        "stages": {
+            stage: statistics.median(run["stages"].get(stage, 0.0) for run in succeeded) if succeeded else 0.0
+            for stage in STAGES
+        },
+        "last_error": next((run["error"] for run in reversed(runs) if run["error"]), None),
+    }
+
+
+def print_report(results: Dict[str, Dict]) -> None:
+    for name, result in results.items():
+        print(f"\n[{SCENARIOS[name]}] {result['spots']:,}スポット・{result['slots']:,.0f}時間帯")
+        print(f"  合計: {result['wall'] * 1000:.1f}ms（95%: {result['wall_p95'] * 1000:.1f}ms）  "
+              f"{result['spots_per_sec']:,.1f}スポット/秒  {result['slots_per_sec']:,.0f}時間帯/秒")
+        for stage, label in STAGES.items():
+            print(f"    {result['stages'][stage] * 1000:8.1f}ms  {label}")
+        if result["failed_runs"] or result["failed_spots"]:
+            print(f"  失敗: {result['failed_runs']}/{result['runs']}回・のべ{result['failed_spots']}スポット"
+                  f"（最後のエラー: {result['last_error']}）")
+
+
+def compare_with_baseline(results: Dict[str, Dict], baseline: Dict[str, Dict], max_regression: float) -> List[str]:
+    """基準より max_regression 以上遅いシナリオの一覧"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for field, label in (("wall", "処理時間"), ("wall_p95", "処理時間（95%）")):
+            if base.get(field) and result[field] > base[field] * (1 + max_regression):
+                regressions.append(f"{SCENARIOS[name]}: {label}が{(result[field] / base[field] - 1) * 100:.0f}%悪化しました")
+    return regressions
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    registry = get_registry()
+    parser = argparse.ArgumentParser(description="サーフィン情報アドバイザーのベンチマーク")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS), help="計測する画面")
+    parser.add_argument("--spot", choices=registry.names(), default=registry.names()[0], help="スポット詳細で計測するスポット")
+    parser.add_argument("--spots-count", type=int, default=len(registry.names()),
+                        help="全スポットランキングのスポット数（登録数より多ければずらした複製を加える）")
+    parser.add_argument("--days", type=int, choices=[1, 7], default=7, help="全スポットランキングの日数")
+    parser.add_argument("--skill-level", choices=["初心者", "中級者", "上級者"], default="中級者", help="スキルレベル")
+    parser.add_argument("--hourly", action="store_true", help="1時間ごとの時間帯で計測する")
+    parser.add_argument("--interpolate", action="store_true", help="波データを天気の時刻に合わせて補間する")
+    parser.add_argument("--cache", action="store_true", help="予報キャッシュ（メモリのみ）を使う（2回目以降は取得しない）")
+    parser.add_argument("--repeat", type=int, default=10, help="計測回数（中央値を採用）")
+    parser.add_argument("--latency", type=float, default=0.0, help="スタブサーバーの応答の遅延（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="遅延のばらつき（0〜指定秒を加える）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="スタブサーバーがエラーを返す割合（0〜1）")
+    parser.add_argument("--error-status", type=int, default=500, help="エラーのときのHTTPステータス")
+    parser.add_argument("--seed", type=int, default=0, help="遅延のばらつき・エラーの乱数の種")
+    parser.add_argument("--output", help="結果を保存するJSONファイル")
+    parser.add_argument("--baseline", help="比較する過去の結果（JSONファイル）")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="許容する悪化の割合（0.25 = 25%%）")
+    parser.add_argument("--record", action="store_true", help="実際の予報をフィクスチャとして記録する")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    load_dotenv()
+    args = parse_args(argv)
+    registry = get_registry()
+
+    if args.record:
+        api_key = os.getenv("OPENWEATHER_API_KEY")
+        if not api_key:
+            print("エラー: OPENWEATHER_API_KEYが設定されていません。.envファイルを確認してください。", file=sys.stderr)
+            return 1
+        weather_count, wave_count = record_fixtures(ForecastClient(api_key), registry[args.spot])
+        print(f"記録しました: 天気{weather_count}件・波{wave_count}件（{args.spot}）")
+        return 0
+
+    weather_fixture, marine_fixture = load_fixtures()
+    moon_table = MoonTable()
+    today = datetime.now().date()
+    spots = synthetic_spots(list(registry), args.spots_count)
+    dates = [today + timedelta(days=i) for i in range(args.days)]
+
+    stub_options = dict(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                        error_status=args.error_status, seed=args.seed)
+    with StubOpenWeatherServer(weather_fixture, **stub_options) as weather_server, \
+            StubOpenMeteoServer(marine_fixture, **stub_options) as marine_server:
+        cache: Optional[ForecastCache] = ForecastCache(cache_dir=None) if args.cache else None
+        client = ForecastClient("benchmark", cache=cache, openweather_url=weather_server.base_url,
+                                open_meteo_url=marine_server.base_url)
+
+        def run(name: str) -> Dict:
+            if name == "detail":
+                return analyze_spot(client, registry[args.spot], today, args.skill_level, moon_table,
+                                    args.hourly, args.interpolate)
+            return rank_all(client, spots, dates, args.skill_level, moon_table, args.hourly, args.interpolate)
+
+        results = {}
+        for name in args.scenarios:
+            run(name)  # ウォームアップ（接続の確立・レスポンスのシリアライズ）
+            weather_server.reset_counts()
+            marine_server.reset_counts()
+            runs = [run(name) for _ in range(args.repeat)]
+            results[name] = summarize(runs, 1 if name == "detail" else len(spots))
+            results[name]["requests"] = weather_server.requests + marine_server.requests
+            results[name]["injected_errors"] = weather_server.errors + marine_server.errors
+
+    print(f"時間帯: {'1時間ごと' if args.hourly else '3時間ごと'}  遅延: {args.latency * 1000:.0f}ms"
+          f"（+0〜{args.jitter * 1000:.0f}ms）  エラー率: {args.error_rate:.0%}  キャッシュ: {'あり' if args.cache else 'なし'}")
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.max_regression)
+        for message in regressions:
+            print(message, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
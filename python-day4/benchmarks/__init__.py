@@ -0,0 +1 @@
+"""サーフィン情報アドバイザーのベンチマーク用フィクスチャとスタブサーバー"""
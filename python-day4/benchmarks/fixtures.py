@@ -0,0 +1,134 @@
+"""ベンチマーク用の予報レスポンス（フィクスチャ）の記録・生成・読み込み
+
+OpenWeatherMapの5日間予報（3時間ごと）とOpen-Meteo Marine（1時間ごと）のレスポンスを
+1地点分ずつ保存し、スタブサーバーが時刻をずらして返す。
+
+リポジトリに含めているopenweather.json・marine.jsonは generate_openweather・generate_marine で
+作った合成データ（実際の予報ではない）。`python benchmark.py --record` で実際の予報に上書きする。
+"""
+import json
+import math
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Tuple
+
+from services.forecast import ForecastClient, WAVE_VARIABLES
+from services.spots import Spot
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+OPENWEATHER_FIXTURE = "openweather"
+OPEN_METEO_FIXTURE = "marine"
+MARINE_FORECAST_DAYS = 8  # Open-Meteo Marineの予報期間の既定値
+
+# 記録済みのレスポンスの時刻の起点（生成データもこの時刻から始める）
+FIXTURE_START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+WEATHER_DESCRIPTIONS = ["晴天", "薄い雲", "曇りがち", "厚い雲", "小雨"]
+
+
+def _path(name: str) -> str:
+    return os.path.join(FIXTURE_DIR, f"{name}.json")
+
+
+def generate_openweather(seed: int = 0) -> Dict:
+    """
+    OpenWeatherMapの5日間予報と同じ形の合成データ（同じ引数なら常に同じ内容）
+
+    風は日中に海風が強まる日変化と、数日周期の向きの変化を持たせる。
+    """
+    rng = random.Random(seed)
+    items = []
+    for i in range(40):
+        dt = FIXTURE_START + timedelta(hours=3 * i)
+        hour = (dt.hour + 9) % 24  # 日本時間
+        diurnal = math.sin((hour - 9) / 24 * 2 * math.pi)
+        rain = rng.random() * 4 if rng.random() < 0.15 else 0.0
+        item = {
+            "dt": int(dt.timestamp()),
+            "main": {"temp": round(12 + 5 * diurnal + rng.gauss(0, 1), 2), "humidity": rng.randint(40, 90)},
+            "weather": [{"id": 800, "main": "Clouds", "description": WEATHER_DESCRIPTIONS[4 if rain else rng.randint(0, 3)]}],
+            "wind": {
+                "speed": round(max(0.0, 3 + 2.5 * diurnal + rng.gauss(0, 1.2)), 2),
+                "deg": int((200 + 120 * math.sin(i / 13) + rng.gauss(0, 20)) % 360),
+                "gust": round(5 + rng.random() * 5, 2),
+            },
+            "dt_txt": dt.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        if rain:
+            item["rain"] = {"3h": round(rain, 2)}
+        items.append(item)
+    return {"cod": "200", "message": 0, "cnt": len(items), "list": items, "city": {"name": "fixture", "timezone": 32400}}
+
+
+def generate_marine(seed: int = 0, days: int = MARINE_FORECAST_DAYS) -> Dict:
+    """Open-Meteo Marineと同じ形の合成データ（うねりが数日かけて発達・減衰する）"""
+    rng = random.Random(seed)
+    hours = 24 * days
+    hourly: Dict[str, list] = {"time": []}
+    for variable in WAVE_VARIABLES:
+        hourly[variable] = []
+    start = FIXTURE_START.astimezone(timezone(timedelta(hours=9))).replace(hour=0, tzinfo=None)
+    for i in range(hours):
+        swell = 0.8 + 0.6 * math.sin(i / 40)
+        wind_sea = abs(rng.gauss(0.3, 0.2))
+        hourly["time"].append((start + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M"))
+        hourly["swell_wave_height"].append(round(swell, 2))
+        hourly["swell_wave_period"].append(round(9 + 3 * math.sin(i / 50) + rng.gauss(0, 0.3), 2))
+        hourly["wave_height"].append(round(math.hypot(swell, wind_sea), 2))
+        hourly["wave_period"].append(round(7 + 3 * math.sin(i / 50) + rng.gauss(0, 0.5), 2))
+        hourly["wave_direction"].append(int((150 + 40 * math.sin(i / 30) + rng.gauss(0, 10)) % 360))
+    return {
+        "latitude": 35.3,
+        "longitude": 139.475,
+        "utc_offset_seconds": 32400,
+        "timezone": "Asia/Tokyo",
+        "hourly_units": {"time": "iso8601", "wave_height": "m", "wave_period": "s", "wave_direction": "°",
+                         "swell_wave_height": "m", "swell_wave_period": "s"},
+        "hourly": hourly,
+    }
+
+
+def record_fixtures(client: ForecastClient, spot: Spot) -> Tuple[int, int]:
+    """
+    OpenWeatherMap・Open-Meteoから1地点分の実データを取得してフィクスチャとして保存
+
+    Returns:
+        tuple: (天気の時間帯数, 波の時刻数)
+    """
+    weather = client._request_json(client.openweather_url, client._weather_params(spot.lat, spot.lon))
+    today = datetime.now().date()
+    marine = client._request_json(client.open_meteo_url, client._wave_params(
+        [(spot.lat, spot.lon)], today.isoformat(), (today + timedelta(days=MARINE_FORECAST_DAYS - 1)).isoformat()
+    ))
+    _save(OPENWEATHER_FIXTURE, weather)
+    _save(OPEN_METEO_FIXTURE, marine)
+    return len(weather["list"]), len(marine["hourly"]["time"])
+
+
+def _save(name: str, fixture: Dict) -> None:
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    tmp_path = f"{_path(name)}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(fixture, f, ensure_ascii=False)
+    os.replace(tmp_path, _path(name))
+
+
+def _load(name: str, generate) -> Dict:
+    try:
+        with open(_path(name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        fixture = generate()
+        _save(name, fixture)
+        return fixture
+
+
+def load_fixtures() -> Tuple[Dict, Dict]:
+    """
+    記録済みのフィクスチャを読み込む（未記録なら合成データを作って保存）
+
+    Returns:
+        tuple: (OpenWeatherMapのレスポンス, Open-Meteo Marineのレスポンス)
+    """
+    return _load(OPENWEATHER_FIXTURE, generate_openweather), _load(OPEN_METEO_FIXTURE, generate_marine)
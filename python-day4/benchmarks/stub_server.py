@@ -0,0 +1,208 @@
+"""記録済みのレスポンスを返すOpenWeatherMap・Open-Meteo Marineのスタブサーバー
+
+APIキーやネットワークなしで画面の処理を計測・確認するため、フィクスチャの時刻を
+リクエストされた期間（天気は今の発表時刻から）にずらして返す。応答の遅延とエラーを指定できる。
+
+    with StubOpenWeatherServer(weather_fixture, latency=0.2, error_rate=0.1) as weather_server:
+        client = ForecastClient("stub", openweather_url=weather_server.base_url)
+"""
+import json
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from services.forecast import WAVE_VARIABLES
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "StubForecastServer"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != self.server.endpoint:
+            self._send(404, json.dumps({"error": f"未対応のエンドポイントです: {url.path}"}).encode("utf-8"))
+            return
+
+        status, payload = self.server.serve_query({k: v[0] for k, v in parse_qs(url.query).items()})
+        self._send(status, payload)
+
+    def _send(self, status: int, payload: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # 計測結果の出力にアクセスログを混ぜない
+
+
+class StubForecastServer(ThreadingHTTPServer):
+    daemon_threads = True
+    endpoint = "/"
+
+    def __init__(
+        self,
+        fixture: Dict,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        seed: int = 0
+    ):
+        """
+        Args:
+            fixture: 記録済みのレスポンス（1地点分）
+            latency: 1リクエストあたりの応答の遅延（秒）
+            jitter: 遅延に加えるばらつき（0〜jitter秒の一様乱数）
+            error_rate: エラーを返す割合（0〜1）
+            error_status: エラーのときのHTTPステータス
+            seed: 遅延のばらつき・エラーの乱数の種（同じ種なら同じ順番でエラーになる）
+        """
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.fixture = fixture
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._payloads: Dict[Tuple, bytes] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{self.endpoint}"
+
+    def serve_query(self, query: Dict[str, str]) -> Tuple[int, bytes]:
+        """遅延・エラーを加えてレスポンスを返す（ハンドラのスレッドで呼ばれる）"""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if delay:
+            time.sleep(delay)
+        if failed:
+            return self.error_status, self.error_body(self.error_status)
+        return self.respond(query)
+
+    def cached(self, key: Tuple, build) -> bytes:
+        """作ったレスポンスを使い回す（計測にサーバー側の処理時間が混ざらないようにする）"""
+        with self._lock:
+            if key in self._payloads:
+                return self._payloads[key]
+        payload = json.dumps(build(), ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            self._payloads[key] = payload
+        return payload
+
+    def respond(self, query: Dict[str, str]) -> Tuple[int, bytes]:
+        raise NotImplementedError
+
+    def error_body(self, status: int) -> bytes:
+        raise NotImplementedError
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+
+    def __enter__(self) -> "StubForecastServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class StubOpenWeatherServer(StubForecastServer):
+    """OpenWeatherMapの5日間予報（/data/2.5/forecast）のスタブ"""
+    endpoint = "/data/2.5/forecast"
+    CADENCE = 3 * 60 * 60
+
+    def respond(self, query: Dict[str, str]) -> Tuple[int, bytes]:
+        if not query.get("appid"):
+            return 401, json.dumps({"cod": 401, "message": "Invalid API key."}).encode("utf-8")
+        if "lat" not in query or "lon" not in query:
+            return 400, json.dumps({"cod": "400", "message": "Nothing to geocode"}).encode("utf-8")
+
+        # 予報は3時間ごとの発表時刻から始まる（地点によらず同じ内容を返す）
+        run = int(time.time()) // self.CADENCE * self.CADENCE
+        return 200, self.cached(("forecast", run), lambda: self._shift(run))
+
+    def _shift(self, run: int) -> Dict:
+        items = self.fixture["list"]
+        offset = run - items[0]["dt"]
+        shifted = []
+        for item in items:
+            dt = item["dt"] + offset
+            shifted.append({
+                **item,
+                "dt": dt,
+                "dt_txt": datetime.fromtimestamp(dt, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            })
+        return {**self.fixture, "cnt": len(shifted), "list": shifted}
+
+    def error_body(self, status: int) -> bytes:
+        return json.dumps({"cod": status, "message": "Internal error"}).encode("utf-8")
+
+
+class StubOpenMeteoServer(StubForecastServer):
+    """Open-Meteo Marine（/v1/marine）のスタブ（複数地点のカンマ区切りにも対応）"""
+    endpoint = "/v1/marine"
+
+    def respond(self, query: Dict[str, str]) -> Tuple[int, bytes]:
+        try:
+            lats = [float(v) for v in query["latitude"].split(",")]
+            lons = [float(v) for v in query["longitude"].split(",")]
+            start = date.fromisoformat(query["start_date"])
+            end = date.fromisoformat(query["end_date"])
+        except (KeyError, ValueError) as e:
+            return 400, self._error(f"Parameter error: {e}")
+        if len(lats) != len(lons):
+            return 400, self._error("Parameter 'latitude' and 'longitude' must have the same number of elements")
+        if end < start:
+            return 400, self._error("Parameter 'start_date' must be before 'end_date'")
+
+        key = ("marine", query["latitude"], query["longitude"], start, end)
+        return 200, self.cached(key, lambda: self._replay(lats, lons, start, end))
+
+    def _replay(self, lats: List[float], lons: List[float], start: date, end: date) -> object:
+        """
+        記録済みの1時間ごとの値を、リクエストされた期間（end_dateの日を含む）に並べ直す
+
+        全地点が同じ値にならないよう、地点ごとに記録のどこから使うかをずらす。
+        """
+        recorded = self.fixture["hourly"]
+        count = len(recorded["time"])
+        hours = ((end - start).days + 1) * 24
+        first = datetime.combine(start, datetime.min.time())
+        times = [(first + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M") for i in range(hours)]
+
+        locations = []
+        for lat, lon in zip(lats, lons):
+            shift = int(round((lat * 7 + lon * 3) * 10)) % count
+            hourly = {"time": times}
+            for variable in WAVE_VARIABLES:
+                values = recorded.get(variable)
+                if values is not None:
+                    hourly[variable] = [values[(shift + i) % count] for i in range(hours)]
+            locations.append({**self.fixture, "latitude": lat, "longitude": lon, "hourly": hourly})
+        return locations[0] if len(locations) == 1 else locations
+
+    @staticmethod
+    def _error(reason: str) -> bytes:
+        return json.dumps({"error": True, "reason": reason}).encode("utf-8")
+
+    def error_body(self, status: int) -> bytes:
+        return self._error("Internal error")
@@ -0,0 +1 @@
+"""サーフィン情報アドバイザー用サービス"""
@@ -0,0 +1,167 @@
+"""天気（3時間ごと）と波（1時間ごと）の時刻合わせ（ソート済みの時刻配列を二分探索）"""
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+# 角度なので線形補間ではなく円周上で補間する列
+CIRCULAR_COLUMNS = {'wave_direction', 'wind_deg'}
+WAVE_COLUMNS = ('wave_height', 'wave_period', 'wave_direction', 'swell_wave_height', 'swell_wave_period')
+WEATHER_COLUMNS = ('datetime', 'wind_speed', 'wind_deg', 'rain', 'weather', 'temp')
+
+
+def to_epoch_seconds(times: Sequence[datetime]) -> np.ndarray:
+    """datetimeの列をUNIX秒の配列に変換（タイムゾーンなしはそのまま同じ基準で比較する）"""
+    return np.array([time.timestamp() for time in times], dtype=float)
+
+
+def interp_degrees(x: np.ndarray, xp: np.ndarray, fp: np.ndarray) -> np.ndarray:
+    """角度（度）を円周上で補間（350°と10°の間は0°になる）"""
+    radians = np.deg2rad(fp)
+    sin = np.interp(x, xp, np.sin(radians))
+    cos = np.interp(x, xp, np.cos(radians))
+    # 丸めないと-0.0000001° が 360° になる
+    return np.round(np.rad2deg(np.arctan2(sin, cos)), 6) % 360
+
+
+def nearest_indices(targets: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """
+    targetsの各時刻に最も近いtimesの位置（timesは昇順）
+
+    ちょうど中間の場合は早い方を選ぶ（min()で探していたときと同じ）
+    """
+    right = np.clip(np.searchsorted(times, targets, side='left'), 1, len(times) - 1)
+    left = right - 1
+    use_right = np.abs(times[right] - targets) < np.abs(targets - times[left])
+    return np.where(use_right, right, left)
+
+
+def align_to(
+    targets: Sequence[datetime],
+    times: Sequence[datetime],
+    columns: Dict[str, Sequence[float]],
+    interpolate: bool = False
+) -> Dict[str, np.ndarray]:
+    """
+    時系列（times, columns）をtargetsの時刻に合わせる
+
+    Args:
+        targets: 合わせる先の時刻（天気データの時刻など）
+        times: 元データの時刻
+        columns: 列名 -> 値の配列（timesと同じ長さ）
+        interpolate: Trueなら前後の値から時刻ちょうどの値を補間、Falseなら最も近い時刻の値
+    """
+    target_seconds = to_epoch_seconds(targets)
+    seconds = to_epoch_seconds(times)
+    order = np.argsort(seconds, kind='stable')
+    seconds = seconds[order]
+
+    if len(seconds) == 1:
+        return {name: np.full(len(target_seconds), np.asarray(values, dtype=float)[0]) for name, values in columns.items()}
+
+    if not interpolate:
+        indices = order[nearest_indices(target_seconds, seconds)]
+        return {name: np.asarray(values, dtype=float)[indices] for name, values in columns.items()}
+
+    # 範囲外の時刻は端の値になる（np.interpの仕様）
+    aligned = {}
+    for name, values in columns.items():
+        values = np.asarray(values, dtype=float)[order]
+        if name in CIRCULAR_COLUMNS:
+            aligned[name] = interp_degrees(target_seconds, seconds, values)
+        else:
+            aligned[name] = np.interp(target_seconds, seconds, values)
+    return aligned
+
+
+def align_waves(weather_data: List[Dict], wave_data: List[Dict], interpolate: bool = False) -> Dict[str, np.ndarray]:
+    """天気データの各時刻に対応する波データ（WAVE_COLUMNSの各列。ない列はNaN）"""
+    return align_to(
+        [weather['datetime'] for weather in weather_data],
+        [wave['datetime'] for wave in wave_data],
+        {column: [wave.get(column, np.nan) for wave in wave_data] for column in WAVE_COLUMNS},
+        interpolate=interpolate
+    )
+
+
+def hourly_slots(weather_data: List[Dict], wave_data: List[Dict]) -> Dict[str, list]:
+    """
+    波データ（1時間ごと）の各時刻に天気データを合わせた1時間ごとの時間帯
+
+    風速・気温は前後の値から線形に、風向は円周上で補間する。降水量（3時間量）と天気は最も近い時刻の値。
+    天気データの最初の時刻より前・最後の時刻より後の時間帯は補間できないため含めない。
+
+    Returns:
+        dict: 列名 -> 時刻順の値（datetime・weatherはリスト、それ以外は配列）
+    """
+    weather_data = sorted(weather_data, key=lambda weather: weather['datetime'])
+    if weather_data:
+        first, last = weather_data[0]['datetime'], weather_data[-1]['datetime']
+        wave_data = sorted(
+            (wave for wave in wave_data if first <= wave['datetime'] <= last),
+            key=lambda wave: wave['datetime']
+        )
+    else:
+        wave_data = []
+
+    slots: Dict[str, list] = {
+        'datetime': [wave['datetime'] for wave in wave_data],
+        **{column: np.array([wave.get(column, np.nan) for wave in wave_data], dtype=float) for column in WAVE_COLUMNS},
+    }
+    if not wave_data:
+        slots.update({column: np.array([], dtype=float) for column in ('wind_speed', 'wind_deg', 'temp', 'rain')})
+        slots['weather'] = []
+        return slots
+
+    times = [weather['datetime'] for weather in weather_data]
+    slots.update(align_to(
+        slots['datetime'], times,
+        {column: [weather[column] for weather in weather_data] for column in ('wind_speed', 'wind_deg', 'temp')},
+        interpolate=True
+    ))
+    nearest = align_to(
+        slots['datetime'], times,
+        {'rain': [weather['rain'] for weather in weather_data], 'index': np.arange(len(weather_data))}
+    )
+    slots['rain'] = nearest['rain']
+    slots['weather'] = [weather_data[int(i)]['weather'] for i in nearest['index']]
+    return slots
+
+
+def merge_slots(
+    weather_data: List[Dict],
+    wave_data: List[Dict],
+    dates: Iterable[date],
+    hourly: bool = False,
+    interpolate: bool = False
+) -> Dict[str, list]:
+    """
+    対象日の時間帯ごとに天気と波をまとめる（スポット詳細・ランキング共通）
+
+    Args:
+        weather_data: 天気データ（parse_weatherの結果）
+        wave_data: 波データ（parse_wavesの結果）
+        dates: 対象の日付
+        hourly: Trueなら波データの1時間ごとの時刻で、風・気温を補間する（interpolateは使わない）
+        interpolate: 3時間ごとの場合に、波データを天気の時刻に合わせて補間するか
+
+    Returns:
+        dict: WEATHER_COLUMNS・WAVE_COLUMNSの列名 -> 時刻順の値（天気か波がなければ空）
+    """
+    target_dates = set(dates)
+    if hourly:
+        # 日付の境目の前後の天気も補間に使うため、時間帯を作ってから対象日で絞る
+        slots = hourly_slots(weather_data, wave_data)
+        keep = np.array([dt.date() in target_dates for dt in slots['datetime']], dtype=bool)
+        return {
+            key: [value for value, kept in zip(values, keep) if kept] if isinstance(values, list) else values[keep]
+            for key, values in slots.items()
+        }
+
+    weather_data = [weather for weather in weather_data if weather['datetime'].date() in target_dates]
+    if not weather_data or not wave_data:
+        return {column: [] for column in WEATHER_COLUMNS + WAVE_COLUMNS}
+    slots = {column: [weather[column] for weather in weather_data] for column in WEATHER_COLUMNS}
+    # 各時刻の波データ（ソート済みの時刻を二分探索。補間する場合は前後の値から計算）
+    slots.update(align_waves(weather_data, wave_data, interpolate=interpolate))
+    return slots
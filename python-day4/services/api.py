@@ -0,0 +1,119 @@
+"""スコアのJSON API（事前計算の結果を引いて返すだけのHTTPサーバー）
+
+エンドポイント:
+    GET /api/spots                                   スポットの一覧
+    GET /api/scores?spot=...&date=YYYY-MM-DD&skill=... 時間帯ごとのスコアと評価理由
+    GET /api/health                                  事前計算の状態
+"""
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from services.prescoring import SKILL_LEVELS, ScoreStore
+from services.spots import BREAK_TYPES, TIDE_PREFERENCES, SpotRegistry
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "ScoreAPIServer"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/api/scores":
+            self._scores({k: v[0] for k, v in parse_qs(url.query).items()})
+        elif url.path == "/api/spots":
+            self._send_bytes(200, self.server.spots_payload)
+        elif url.path == "/api/health":
+            self._send(200, self.server.store.status())
+        else:
+            self._send(404, {"error": f"未対応のエンドポイントです: {url.path}"})
+
+    def _scores(self, query: Dict[str, str]) -> None:
+        spot, day, skill_level = query.get("spot"), query.get("date"), query.get("skill", "中級者")
+        if not spot or not day:
+            self._send(400, {"error": "spotとdateを指定してください"})
+            return
+        if spot not in self.server.registry:
+            self._send(404, {"error": f"スポットが見つかりません: {spot}"})
+            return
+        if skill_level not in SKILL_LEVELS:
+            self._send(400, {"error": f"skillは{'/'.join(SKILL_LEVELS)}のいずれかを指定してください"})
+            return
+
+        found = self.server.store.get(spot, day, skill_level)
+        if found is None:
+            if self.server.store.run is None:
+                self._send(503, {"error": "スコアを計算中です。しばらくしてから再度お試しください"})
+            else:
+                self._send(404, {"error": f"{spot}の{day}の予報はありません"})
+            return
+
+        # 同じ予報の結果ならクライアントのキャッシュをそのまま使える（ETagは結果と同時に読んだ発表時刻から作る）
+        run, payload = found
+        etag = f'"{run}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self._send_bytes(200, payload, {"ETag": etag})
+
+    def _send(self, status: int, body: Dict) -> None:
+        self._send_bytes(status, json.dumps(body, ensure_ascii=False).encode("utf-8"))
+
+    def _send_bytes(self, status: int, payload: bytes, headers: Dict[str, str] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if self.server.access_log:
+            super().log_message(format, *args)
+
+
+class ScoreAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        store: ScoreStore,
+        registry: SpotRegistry,
+        address: Tuple[str, int] = ("127.0.0.1", 8000),
+        access_log: bool = False
+    ):
+        """
+        Args:
+            store: 事前計算の結果（PrescoreWorkerが更新する）
+            registry: スポットの一覧
+            address: 待ち受けるアドレスとポート（ポート0なら空いているポート）
+            access_log: アクセスログを標準エラーに出力するか
+        """
+        super().__init__(address, _Handler)
+        self.store = store
+        self.registry = registry
+        self.access_log = access_log
+        self.spots_payload = json.dumps([
+            {
+                "name": spot.name,
+                "lat": spot.lat,
+                "lon": spot.lon,
+                "facing": spot.facing,
+                "break_type": spot.break_type,
+                "break_type_label": BREAK_TYPES[spot.break_type],
+                "swell_direction": spot.optimal_swell_direction,
+                "swell_window": spot.swell_window,
+                "tide_preference": spot.tide_preference,
+                "tide_preference_label": TIDE_PREFERENCES[spot.tide_preference],
+                "description": spot.description,
+            }
+            for spot in registry
+        ], ensure_ascii=False).encode("utf-8")
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
@@ -0,0 +1,412 @@
+"""過去の波・風データでスコアを再計算するバックテスト（スコアの配点が妥当かを確かめる）
+
+Open-Meteoのアーカイブ（Marine APIの波、Historical Weather APIの風・降水量）を
+スポットごとのディレクトリに置き、全時間帯・全スキルレベルをscore_slotsでまとめて計算する。
+スポットごとの集計（スコアのヒストグラム、要素ごとの加点・減点の合計）は足し合わせられる形で持つため、
+スポットはプロセスに分けて並列に計算し、結果だけを親プロセスで合算する。
+"""
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.moon import DEFAULT_TABLE_DIR, MoonTable
+from services.scoring import SKILL_RANGES, ScoreResult, score_slots
+from services.spots import Spot
+
+DEFAULT_ARCHIVE_DIR = os.getenv(
+    "SURF_ARCHIVE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "archive")
+)
+DEFAULT_BATCH_SIZE = 200_000  # 1回のscore_slotsで計算する時間数（メモリの上限の目安）
+
+SKILL_LEVELS = tuple(SKILL_RANGES)
+FACTORS = ('波の高さ', '波の周期', '風向', '風速', '天気', '月齢', 'うねりの向き', 'うねりの質')
+MAX_SCORE = 100
+
+# アーカイブの列名 -> score_slotsの引数名
+COLUMN_ALIASES = {
+    'wave_height': 'wave_height',
+    'wave_period': 'wave_period',
+    'wave_direction': 'wave_direction',
+    'swell_wave_height': 'swell_wave_height',
+    'swell_wave_period': 'swell_wave_period',
+    'wind_speed_10m': 'wind_speed',
+    'windspeed_10m': 'wind_speed',
+    'wind_direction_10m': 'wind_deg',
+    'winddirection_10m': 'wind_deg',
+    'precipitation': 'rain',
+    'rain': 'rain',
+}
+REQUIRED_COLUMNS = ('wave_height', 'wave_period', 'wind_speed', 'wind_deg')
+# ない場合はNaN（うねりの向き・質は評価しない）
+OPTIONAL_COLUMNS = ('wave_direction', 'swell_wave_height', 'swell_wave_period')
+
+# 風速の単位 -> m/sへの倍率（Open-Meteoの既定はkm/h）
+WIND_SPEED_UNITS = {'m/s': 1.0, 'km/h': 1 / 3.6, 'kn': 0.514444, 'mp/h': 0.44704, 'mph': 0.44704}
+
+
+def _split_unit(column: str) -> Tuple[str, Optional[str]]:
+    """CSVの列名 "wind_speed_10m (km/h)" を名前と単位に分ける"""
+    name, _, unit = column.partition(' (')
+    return name.strip(), unit.rstrip(')') or None
+
+
+def _normalize_columns(frame: pd.DataFrame, units: Dict[str, str]) -> pd.DataFrame:
+    """列名をscore_slotsの引数名にそろえ、風速をm/sに換算する"""
+    renamed = {}
+    for column in frame.columns:
+        name = COLUMN_ALIASES.get(column)
+        if name is None:
+            continue
+        values = pd.to_numeric(frame[column], errors='coerce')
+        if name == 'wind_speed':
+            unit = units.get(column, 'km/h')
+            if unit not in WIND_SPEED_UNITS:
+                raise ValueError(f"未対応の風速の単位です: {unit}")
+            values = values * WIND_SPEED_UNITS[unit]
+        renamed[name] = values.to_numpy(dtype=float)
+    return pd.DataFrame(renamed, index=frame.index)
+
+
+def _read_csv(path: str) -> pd.DataFrame:
+    """Open-MeteoのCSV（先頭に地点情報の行があり、"time,..."の行からが時系列）"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for skiprows, line in enumerate(f):
+            if line.startswith('time'):
+                break
+        else:
+            raise ValueError(f"時系列の見出し（time,...）が見つかりません: {path}")
+
+    frame = pd.read_csv(path, skiprows=skiprows, encoding='utf-8-sig')
+    units = {}
+    for column in frame.columns:
+        name, unit = _split_unit(column)
+        units[name] = unit
+    frame.columns = [_split_unit(column)[0] for column in frame.columns]
+    frame.index = pd.DatetimeIndex(pd.to_datetime(frame.pop('time')), name='time')
+    return _normalize_columns(frame, units)
+
+
+def _read_json(path: str) -> pd.DataFrame:
+    """Open-MeteoのAPIレスポンス（{"hourly": {...}, "hourly_units": {...}}）を保存したJSON"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    hourly = dict(data['hourly'])
+    frame = pd.DataFrame(hourly, index=pd.DatetimeIndex(pd.to_datetime(hourly.pop('time')), name='time'))
+    return _normalize_columns(frame, data.get('hourly_units', {}))
+
+
+def load_archive(paths: Sequence[str]) -> pd.DataFrame:
+    """
+    1スポット分のアーカイブファイルを読み込み、時刻でまとめた1時間ごとの表にする
+
+    波（Marine API）と風（Historical Weather API）のように列の違うファイルは時刻で結合し、
+    年ごとに分かれたファイルはつなげる。
+
+    Args:
+        paths: CSVまたはJSONのファイルパス
+
+    Returns:
+        pd.DataFrame: 時刻（昇順）を索引に wave_height・wave_period・wind_speed（m/s）・wind_deg・rain を持つ表。
+        rainは天気予報（3時間降水量）に合わせて直近3時間（その時刻を含む）の合計。欠けている値はNaNのまま
+    """
+    merged: Optional[pd.DataFrame] = None
+    for path in sorted(paths):
+        frame = _read_json(path) if path.lower().endswith('.json') else _read_csv(path)
+        frame = frame[~frame.index.duplicated(keep='last')]
+        merged = frame if merged is None else merged.combine_first(frame)
+
+    if merged is None:
+        return pd.DataFrame(columns=[*REQUIRED_COLUMNS, 'rain'], index=pd.DatetimeIndex([], name='time'))
+
+    missing = [column for column in REQUIRED_COLUMNS if column not in merged.columns]
+    if missing:
+        raise ValueError(f"アーカイブに必要な列がありません: {', '.join(missing)}")
+
+    merged = merged.sort_index()
+    if 'rain' in merged.columns:
+        # 行数ではなく時刻で数える（欠けた時刻があっても3時間より前の雨を含めない）
+        merged['rain'] = merged['rain'].fillna(0).rolling('3h').sum()
+    else:
+        merged['rain'] = 0.0
+    return merged
+
+
+def archive_files(archive_dir: str, spot: str) -> List[str]:
+    """スポットのアーカイブファイル（archive_dir/スポット名/ 以下のCSV・JSON）"""
+    spot_dir = os.path.join(archive_dir, spot)
+    return sorted(
+        glob.glob(os.path.join(spot_dir, '*.csv')) + glob.glob(os.path.join(spot_dir, '*.json'))
+    )
+
+
+@dataclass
+class BacktestStats:
+    """
+    スコアの集計（スキルレベルごと）。スポット同士・期間同士でmergeして合算できる
+
+    histogramは0〜100点の各点数の時間数、factor_sum・factor_squaresは要素ごとの加点・減点の合計と2乗和、
+    factor_positive・factor_negativeは加点・減点になった時間数（いずれも行がスキルレベル）。
+    """
+    skill_levels: Tuple[str, ...]
+    hours: int = 0
+    dropped: int = 0
+    start: Optional[pd.Timestamp] = None
+    end: Optional[pd.Timestamp] = None
+    histogram: Optional[np.ndarray] = None
+    factor_sum: Optional[np.ndarray] = None
+    factor_squares: Optional[np.ndarray] = None
+    factor_positive: Optional[np.ndarray] = None
+    factor_negative: Optional[np.ndarray] = None
+
+    def __post_init__(self):
+        skills, factors = len(self.skill_levels), len(FACTORS)
+        if self.histogram is None:
+            self.histogram = np.zeros((skills, MAX_SCORE + 1), dtype=np.int64)
+        for name in ('factor_sum', 'factor_squares'):
+            if getattr(self, name) is None:
+                setattr(self, name, np.zeros((skills, factors), dtype=float))
+        for name in ('factor_positive', 'factor_negative'):
+            if getattr(self, name) is None:
+                setattr(self, name, np.zeros((skills, factors), dtype=np.int64))
+
+    def add(self, result: ScoreResult) -> None:
+        """score_slotsの結果（スキルレベル × 時間帯）を集計に加える"""
+        scores = result.score.astype(np.int64)
+        offsets = np.arange(len(self.skill_levels))[:, None] * (MAX_SCORE + 1)
+        self.histogram += np.bincount(
+            (scores + offsets).ravel(), minlength=self.histogram.size
+        ).reshape(self.histogram.shape)
+
+        contributions = result.contributions()
+        for j, factor in enumerate(FACTORS):
+            points = contributions[factor]
+            self.factor_sum[:, j] += points.sum(axis=1)
+            self.factor_squares[:, j] += np.square(points, dtype=float).sum(axis=1)
+            self.factor_positive[:, j] += (points > 0).sum(axis=1)
+            self.factor_negative[:, j] += (points < 0).sum(axis=1)
+        self.hours += scores.shape[1]
+
+    def merge(self, other: 'BacktestStats') -> 'BacktestStats':
+        """2つの集計を合算した新しい集計"""
+        if self.skill_levels != other.skill_levels:
+            raise ValueError("スキルレベルの異なる集計は合算できません")
+        starts = [t for t in (self.start, other.start) if t is not None]
+        ends = [t for t in (self.end, other.end) if t is not None]
+        return BacktestStats(
+            skill_levels=self.skill_levels,
+            hours=self.hours + other.hours,
+            dropped=self.dropped + other.dropped,
+            start=min(starts) if starts else None,
+            end=max(ends) if ends else None,
+            histogram=self.histogram + other.histogram,
+            factor_sum=self.factor_sum + other.factor_sum,
+            factor_squares=self.factor_squares + other.factor_squares,
+            factor_positive=self.factor_positive + other.factor_positive,
+            factor_negative=self.factor_negative + other.factor_negative,
+        )
+
+    def percentiles(self, qs: Sequence[float]) -> np.ndarray:
+        """スコアのパーセンタイル（ヒストグラムから求める。行がスキルレベル、列がqs。集計がなければ0）"""
+        cumulative = np.cumsum(self.histogram, axis=1)
+        totals = cumulative[:, -1:]
+        targets = np.asarray(qs, dtype=float)[None, :] / 100 * np.maximum(totals, 1)
+        found = np.array([
+            np.searchsorted(row, target, side='left') for row, target in zip(cumulative, targets)
+        ])
+        # 時間数が0の行はどの点数にも届かず範囲外（MAX_SCORE + 1）になるため、平均と同じく0にする
+        return np.where(totals > 0, found, 0)
+
+    def score_summary(self) -> pd.DataFrame:
+        """スキルレベルごとのスコア分布（平均・パーセンタイル・おすすめ以上の割合）"""
+        points = np.arange(MAX_SCORE + 1)
+        hours = np.maximum(self.hours, 1)
+        p10, p50, p90 = self.percentiles([10, 50, 90]).T
+        return pd.DataFrame({
+            'skill_level': self.skill_levels,
+            'hours': self.hours,
+            'mean': (self.histogram * points).sum(axis=1) / hours,
+            'p10': p10,
+            'p50': p50,
+            'p90': p90,
+            'good_ratio': self.histogram[:, 60:].sum(axis=1) / hours,  # 60点以上（おすすめ）
+            'best_ratio': self.histogram[:, 75:].sum(axis=1) / hours,  # 75点以上（最高）
+        })
+
+    def factor_summary(self) -> pd.DataFrame:
+        """スキルレベル・要素ごとの加点・減点の平均・標準偏差と、加点・減点になった割合"""
+        hours = np.maximum(self.hours, 1)
+        mean = self.factor_sum / hours
+        std = np.sqrt(np.maximum(self.factor_squares / hours - mean ** 2, 0))
+        return pd.DataFrame({
+            'skill_level': np.repeat(self.skill_levels, len(FACTORS)),
+            'factor': np.tile(FACTORS, len(self.skill_levels)),
+            'mean': mean.ravel(),
+            'std': std.ravel(),
+            'positive_ratio': (self.factor_positive / hours).ravel(),
+            'negative_ratio': (self.factor_negative / hours).ravel(),
+        })
+
+
+@dataclass
+class SpotBacktest:
+    """1スポット分のバックテスト結果"""
+    spot: str
+    stats: BacktestStats
+    error: Optional[str] = None
+
+
+# ワーカープロセスごとに月齢表を1回だけ読み込む（ディレクトリ・最初の年・最後の年ごと）
+_moon_tables: Dict[Tuple[Optional[str], int, int], MoonTable] = {}
+
+
+def _moon_table(table_dir: Optional[str], index: pd.DatetimeIndex) -> MoonTable:
+    """
+    アーカイブの期間（indexの最初の年の初めから最後の年の終わりまで）の月齢表
+
+    年単位にそろえて、期間の近いスポットが同じファイルを使えるようにする。
+    複数のワーカーが同時に作っても、書き込みは一時ファイルからの置き換えなので壊れない。
+    """
+    key = (table_dir, index.min().year, index.max().year)
+    if key not in _moon_tables:
+        _moon_tables[key] = MoonTable(table_dir, start=date(key[1], 1, 1), end=date(key[2], 12, 31))
+    return _moon_tables[key]
+
+
+def score_archive(
+    frame: pd.DataFrame,
+    spot: Spot,
+    skill_levels: Sequence[str] = SKILL_LEVELS,
+    moon_table: Optional[MoonTable] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    table_dir: Optional[str] = DEFAULT_TABLE_DIR
+) -> BacktestStats:
+    """
+    load_archiveの表を全スキルレベルでスコア計算して集計
+
+    batch_size時間ずつscore_slotsに渡し、（スキルレベル × 時間帯）の配列を1回で計算する。
+    moon_tableがNoneなら、アーカイブの期間の月齢表をtable_dirに作って使う。
+    """
+    stats = BacktestStats(tuple(skill_levels))
+    # 波・風のどれかが欠けている時刻は数えるだけで計算しない
+    valid = frame[list(REQUIRED_COLUMNS)].notna().all(axis=1).to_numpy()
+    stats.dropped = int((~valid).sum())
+    frame = frame[valid]
+    if frame.empty:
+        return stats
+    stats.start, stats.end = frame.index[0], frame.index[-1]
+    moon_table = moon_table or _moon_table(table_dir, frame.index)
+
+    # 月齢は日付ごとに1回だけ引く
+    days, day_index = np.unique(frame.index.values.astype('datetime64[D]'), return_inverse=True)
+    is_spring_tide = moon_table.lookup_many(list(days.astype(object)))['is_spring_tide'][day_index.ravel()]
+
+    skills = np.array(skill_levels)[:, None]
+    columns = {name: frame[name].to_numpy(dtype=float) for name in ('wave_height', 'wave_period', 'wind_speed', 'wind_deg', 'rain')}
+    for name in OPTIONAL_COLUMNS:
+        columns[name] = frame[name].to_numpy(dtype=float) if name in frame.columns else np.full(len(frame), np.nan)
+    for start in range(0, len(frame), batch_size):
+        batch = slice(start, start + batch_size)
+        stats.add(score_slots(
+            wave_height=columns['wave_height'][batch],
+            wave_period=columns['wave_period'][batch],
+            wind_speed=columns['wind_speed'][batch],
+            wind_deg=columns['wind_deg'][batch],
+            rain=columns['rain'][batch],
+            beach_facing=spot.facing,
+            is_spring_tide=is_spring_tide[batch],
+            moon_phase='',  # 評価理由は作らないので月相の名前は不要
+            skill_level=skills,
+            wave_direction=columns['wave_direction'][batch],
+            swell_direction=spot.optimal_swell_direction,
+            swell_window=spot.swell_window,
+            swell_wave_height=columns['swell_wave_height'][batch],
+            swell_wave_period=columns['swell_wave_period'][batch]
+        ))
+    return stats
+
+
+def backtest_spot(
+    spot: Spot,
+    paths: Sequence[str],
+    skill_levels: Sequence[str] = SKILL_LEVELS,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    table_dir: Optional[str] = DEFAULT_TABLE_DIR,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> SpotBacktest:
+    """1スポット分のアーカイブを読み込んでスコアを集計（ワーカープロセスで実行する）"""
+    try:
+        frame = load_archive(paths)
+        if start is not None:
+            frame = frame[frame.index >= pd.Timestamp(start)]
+        if end is not None:
+            frame = frame[frame.index < pd.Timestamp(end) + pd.Timedelta(days=1)]
+        stats = score_archive(frame, spot, skill_levels, batch_size=batch_size, table_dir=table_dir)
+        return SpotBacktest(spot.name, stats)
+    except (OSError, ValueError, KeyError) as e:
+        return SpotBacktest(spot.name, BacktestStats(tuple(skill_levels)), f"{type(e).__name__}: {e}")
+
+
+def run_backtest(
+    spots: Sequence[Spot],
+    archive_dir: str = DEFAULT_ARCHIVE_DIR,
+    skill_levels: Sequence[str] = SKILL_LEVELS,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    processes: Optional[int] = None,
+    table_dir: Optional[str] = DEFAULT_TABLE_DIR,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> List[SpotBacktest]:
+    """
+    全スポットのバックテストをプロセスに分けて並列に実行
+
+    Args:
+        spots: 集計するスポット
+        archive_dir: スポットごとのアーカイブのディレクトリ（archive_dir/スポット名/*.csv|*.json）
+        skill_levels: 集計するスキルレベル
+        start: 対象期間の最初の日（Noneならアーカイブの最初から）
+        end: 対象期間の最後の日（Noneならアーカイブの最後まで）
+        processes: ワーカープロセス数（Noneならos.cpu_count()、1ならこのプロセスで順に実行）
+        table_dir: 月齢表のディレクトリ
+        batch_size: 1回のスコア計算で扱う時間数
+
+    Returns:
+        list: スポットごとの結果（spotsと同じ順番）。アーカイブのないスポットはerrorに理由が入る
+    """
+    tasks = [
+        (spot, archive_files(archive_dir, spot.name), tuple(skill_levels), start, end, table_dir, batch_size)
+        for spot in spots
+    ]
+
+    results = []
+    runnable = [task for task in tasks if task[1]]
+    if processes == 1 or len(runnable) <= 1:
+        finished = {task[0].name: backtest_spot(*task) for task in runnable}
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = {task[0].name: executor.submit(backtest_spot, *task) for task in runnable}
+            finished = {name: future.result() for name, future in futures.items()}
+
+    for spot, *_ in tasks:
+        if spot.name in finished:
+            results.append(finished[spot.name])
+        else:
+            error = f"アーカイブが見つかりません: {os.path.join(archive_dir, spot.name)}"
+            results.append(SpotBacktest(spot.name, BacktestStats(tuple(skill_levels)), error))
+    return results
+
+
+def combine(results: Sequence[SpotBacktest], skill_levels: Sequence[str] = SKILL_LEVELS) -> BacktestStats:
+    """全スポットの集計を合算"""
+    total = BacktestStats(tuple(skill_levels))
+    for result in results:
+        total = total.merge(result.stats)
+    return total
@@ -0,0 +1,73 @@
+"""画面に表示する表の作成（Streamlitの画面とベンチマークで同じ処理を使う）"""
+from typing import Dict, List
+
+import pandas as pd
+
+from services.ranking import SpotScores
+from services.scoring import ScoreResult, get_wind_direction_name
+from services.sessions import SessionWindow
+
+
+def slot_rows(slots: Dict[str, list], scored: ScoreResult) -> List[Dict]:
+    """
+    スポット詳細の時間帯ごとの行（スコアの高い順）
+
+    Args:
+        slots: merge_slotsの結果
+        scored: slotsをscore_slotsで計算した結果
+
+    Returns:
+        list: 表示用の辞書のリスト（datetime・indexは表には出さない列。indexはslotsの位置）
+    """
+    rows = []
+    for i, slot_time in enumerate(slots['datetime']):
+        wave_direction = slots['wave_direction'][i]
+        rows.append({
+            '時刻': slot_time.strftime('%H:%M'),
+            'datetime': slot_time,
+            'スコア': int(scored.score[i]),
+            '波高': f"{slots['wave_height'][i]:.1f}m",
+            '周期': f"{slots['wave_period'][i]:.0f}秒",
+            '波向': get_wind_direction_name(wave_direction) if not pd.isna(wave_direction) else '-',
+            '風速': f"{slots['wind_speed'][i]:.1f}m/s",
+            '風向': get_wind_direction_name(slots['wind_deg'][i]),
+            '天気': slots['weather'][i],
+            '気温': f"{slots['temp'][i]:.1f}°C",
+            'index': i
+        })
+    return sorted(rows, key=lambda row: row['スコア'], reverse=True)
+
+
+def ranking_table(
+    spot_scores: SpotScores,
+    ranking: pd.DataFrame,
+    windows_by_spot: Dict[str, List[SessionWindow]]
+) -> pd.DataFrame:
+    """
+    全スポットランキングの表
+
+    Args:
+        spot_scores: score_spotsの結果
+        ranking: rank_spotsの結果
+        windows_by_spot: session_windowsの結果（各スポットの最も長い区間を表示する）
+    """
+    slots = spot_scores.slots
+    best_slots = slots.loc[ranking['row']]
+    # スポットごとに最も長く続くセッション向きの時間帯（同じ長さなら平均スコアの高い方）
+    longest = {name: max(windows, key=lambda window: (window.hours, window.mean_score))
+               for name, windows in windows_by_spot.items()}
+    return pd.DataFrame({
+        '順位': range(1, len(ranking) + 1),
+        'スポット': ranking['spot'],
+        '最高スコア': ranking['best_score'],
+        '平均スコア': ranking['mean_score'].round(1),
+        'おすすめ時間': [pd.Timestamp(t).strftime('%m/%d %H:%M') for t in ranking['best_time']],
+        '波高': [f"{h:.1f}m" for h in best_slots['wave_height']],
+        '周期': [f"{p:.0f}秒" for p in best_slots['wave_period']],
+        '風': [f"{d} {s:.1f}m/s" for d, s in zip(best_slots['wind_direction'], best_slots['wind_speed'])],
+        'セッション': [
+            f"{longest[name].start.strftime('%m/%d %H:%M')}〜{longest[name].end.strftime('%H:%M')}（{longest[name].hours:g}時間）"
+            if name in longest else '-'
+            for name in ranking['spot']
+        ],
+    })
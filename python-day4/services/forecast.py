@@ -0,0 +1,218 @@
+"""OpenWeatherMap（天気・風）とOpen-Meteo Marine（波）の取得"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.forecast_cache import OPEN_METEO, OPENWEATHER, ForecastCache, forecast_run, grid_cell, group_by_cell
+
+OPENWEATHER_URL = 'https://api.openweathermap.org/data/2.5/forecast'
+
+# Open-Meteo（完全無料、APIキー不要）
+OPEN_METEO_URL = 'https://marine-api.open-meteo.com/v1/marine'
+# 合成波（向きはうねりの向きの評価に使う）と、そのうちのうねり成分
+WAVE_VARIABLES = ['wave_height', 'wave_period', 'wave_direction', 'swell_wave_height', 'swell_wave_period']
+
+
+def parse_weather(data: Dict) -> List[Dict]:
+    """OpenWeatherMapの5日間予報（3時間ごと）を時間帯ごとの辞書に変換"""
+    weather_data = []
+    for item in data['list']:
+        weather_data.append({
+            'datetime': datetime.fromtimestamp(item['dt']),
+            'temp': item['main']['temp'],
+            'weather': item['weather'][0]['description'],
+            'wind_speed': item['wind']['speed'],
+            'wind_deg': item['wind'].get('deg', 0),
+            'rain': item.get('rain', {}).get('3h', 0)
+        })
+    return weather_data
+
+
+def parse_waves(data: Dict) -> List[Dict]:
+    """Open-Meteo Marineの1時間ごとの波情報を時刻ごとの辞書に変換（欠損値は0、向きの欠損値はNaN）"""
+    if 'hourly' not in data:
+        return []
+
+    hourly = data['hourly']
+    wave_data = []
+    for i in range(len(hourly['time'])):
+        wave = {'datetime': datetime.fromisoformat(hourly['time'][i])}
+        for variable in WAVE_VARIABLES:
+            values = hourly.get(variable)
+            if variable == 'wave_direction':
+                # 0°（北）は正しい値なので、欠損値と区別する
+                wave[variable] = float('nan') if not values or values[i] is None else values[i]
+            else:
+                wave[variable] = values[i] if values and values[i] else 0
+        wave_data.append(wave)
+    return wave_data
+
+
+class ForecastClient:
+    def __init__(
+        self,
+        openweather_api_key: str = '',
+        timeout: float = 10,
+        pool_size: int = 16,
+        cache: Optional[ForecastCache] = None,
+        openweather_url: str = OPENWEATHER_URL,
+        open_meteo_url: str = OPEN_METEO_URL
+    ):
+        """
+        Args:
+            openweather_api_key: OpenWeatherMapのAPIキー（空なら天気データは取得しない）
+            timeout: 1リクエストあたりのタイムアウト秒数
+            pool_size: 使い回すHTTP接続（keep-alive）の最大数（全スポットの同時取得に使う）
+            cache: 予報データのキャッシュ（Noneなら毎回取得）
+            openweather_url: OpenWeatherMapの5日間予報のURL（スタブサーバーで計測する場合などに変更）
+            open_meteo_url: Open-Meteo MarineのURL
+        """
+        self.openweather_api_key = openweather_api_key
+        self.openweather_url = openweather_url
+        self.open_meteo_url = open_meteo_url
+        self.cache = cache
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _request_json(self, url: str, params: Dict) -> Dict:
+        response = self.session.get(url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _weather_params(self, lat: float, lon: float) -> Dict:
+        return {
+            'lat': lat,
+            'lon': lon,
+            'appid': self.openweather_api_key,
+            'units': 'metric',
+            'lang': 'ja'
+        }
+
+    def _wave_params(self, coords: Sequence[Tuple[float, float]], start_date: str, end_date: str) -> Dict:
+        return {
+            'latitude': ','.join(str(lat) for lat, _ in coords),
+            'longitude': ','.join(str(lon) for _, lon in coords),
+            'start_date': start_date,
+            'end_date': end_date,
+            'hourly': ','.join(WAVE_VARIABLES),
+            'timezone': 'Asia/Tokyo'
+        }
+
+    def get_weather(self, lat: float, lon: float) -> List[Dict]:
+        """OpenWeatherMapから天気・風データを取得"""
+        if self.cache is None:
+            return parse_weather(self._request_json(self.openweather_url, self._weather_params(lat, lon)))
+
+        # 同じ格子セル・同じ発表時刻の予報は全セッションで共有する
+        cell = grid_cell(lat, lon, OPENWEATHER.grid)
+        run = forecast_run(OPENWEATHER)
+        data = self.cache.get_or_fetch(
+            ForecastCache.make_key(OPENWEATHER, cell, run),
+            run + OPENWEATHER.cadence,
+            lambda: self._request_json(self.openweather_url, self._weather_params(*cell))
+        )
+        return parse_weather(data)
+
+    def get_waves(self, lat: float, lon: float, start_date: str, end_date: str) -> List[Dict]:
+        """Open-Meteoから波情報を取得（完全無料）"""
+        return self.get_waves_multi([(lat, lon)], start_date, end_date)[0]
+
+    def get_waves_multi(self, coords: Sequence[Tuple[float, float]], start_date: str, end_date: str) -> List[List[Dict]]:
+        """
+        複数地点の波情報を1回のリクエストで取得（Open-Meteoは緯度・経度のカンマ区切りに対応）
+
+        キャッシュがある場合は、キャッシュにない格子セルだけをまとめて取得する。
+
+        Returns:
+            list: coordsと同じ順番の波情報のリスト
+        """
+        # 同じ格子セルの地点はセルの中心で1回だけ取得する
+        cells = [grid_cell(lat, lon, OPEN_METEO.grid) for lat, lon in coords]
+        if self.cache is None:
+            unique = list(dict.fromkeys(cells))
+            fetched = dict(zip(unique, self._fetch_wave_locations(unique, start_date, end_date)))
+            return [parse_waves(fetched[cell]) for cell in cells]
+
+        run = forecast_run(OPEN_METEO)
+        expires_at = run + OPEN_METEO.cadence
+        keys = {
+            cell: ForecastCache.make_key(OPEN_METEO, cell, run, start_date=start_date, end_date=end_date)
+            for cell in cells
+        }
+
+        found = {cell: self.cache.get(key) for cell, key in keys.items()}
+        missing = [cell for cell, data in found.items() if data is None]
+        if len(missing) == 1:
+            # 1セルだけなら同時アクセスをまとめられるget_or_fetchを使う
+            cell = missing[0]
+            found[cell] = self.cache.get_or_fetch(
+                keys[cell], expires_at, lambda: self._fetch_wave_locations([cell], start_date, end_date)[0]
+            )
+        elif missing:
+            for cell, data in zip(missing, self._fetch_wave_locations(missing, start_date, end_date)):
+                self.cache.set(keys[cell], data, expires_at)
+                found[cell] = data
+
+        return [parse_waves(found[cell]) for cell in cells]
+
+    def _fetch_wave_locations(self, coords: Sequence[Tuple[float, float]], start_date: str, end_date: str) -> List[Dict]:
+        data = self._request_json(self.open_meteo_url, self._wave_params(coords, start_date, end_date))
+        # 1地点なら辞書、複数地点ならリストで返ってくる
+        return data if isinstance(data, list) else [data]
+
+    def fetch_spots(
+        self,
+        spots: Dict[str, Tuple[float, float, float]],
+        start_date: str,
+        end_date: str
+    ) -> Dict[str, Dict]:
+        """
+        全スポットの天気・波を同時に取得
+
+        波は全スポット分を1回のリクエストで、天気（1地点ずつしか取得できない）は
+        スレッドで同時に取得するため、待ち時間は1スポット分とほぼ同じになる。
+        同じ格子セルにあるスポットは1回の取得結果を共有する。
+
+        Returns:
+            dict: スポット名 -> {'weather': [...], 'waves': [...], 'error': エラーメッセージ or None}
+        """
+        names = list(spots)
+        results: Dict[str, Dict] = {name: {'weather': [], 'waves': [], 'error': None} for name in names}
+        if not names:
+            return results
+
+        def fetch_weather(cell: Tuple[float, float]) -> Tuple[Tuple[float, float], List[Dict], Optional[str]]:
+            try:
+                return cell, self.get_weather(*cell), None
+            except Exception as e:
+                return cell, [], f"天気データ取得エラー: {e}"
+
+        weather_cells = group_by_cell({name: spots[name][:2] for name in names}, OPENWEATHER)
+        max_workers = min(self.pool_size, len(weather_cells) + 1)  # 天気は格子セルごと、波は全スポットで1件
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            weather_futures = [executor.submit(fetch_weather, cell) for cell in weather_cells] if self.openweather_api_key else []
+            waves_future = executor.submit(
+                self.get_waves_multi, [spots[name][:2] for name in names], start_date, end_date
+            )
+
+            try:
+                for name, waves in zip(names, waves_future.result()):
+                    results[name]['waves'] = waves
+            except Exception as e:
+                for name in names:
+                    results[name]['error'] = f"波データ取得エラー: {e}"
+
+            for future in weather_futures:
+                cell, weather, error = future.result()
+                for name in weather_cells[cell]:
+                    results[name]['weather'] = weather
+                    results[name]['error'] = results[name]['error'] or error
+
+        return results
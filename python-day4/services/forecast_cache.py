@@ -0,0 +1,176 @@
+"""予報データのキャッシュ（格子セル×予報の発表時刻ごと。全セッションで共有し、ディスクにも保存）
+
+同じ格子セル（緯度・経度を丸めた範囲）のスポットは同じ予報を共有する。
+キャッシュは予報の更新間隔（OpenWeatherMapは3時間、Open-Meteoは1時間）の区切りで切り替わるため、
+新しい予報が出るまでは何人が見ても上流へのリクエストは1回だけになる。
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+# SURF_CACHE_DIRはキャッシュ全体のディレクトリ（予報・月齢表・事前計算の結果をその下に分けて保存する）
+DEFAULT_CACHE_DIR = os.path.join(
+    os.getenv("SURF_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")),
+    "forecast"
+)
+# このキャッシュが書き込むファイル（キーのJSONと書き込み途中の一時ファイル）。これ以外は削除しない
+_CACHE_FILE = re.compile(r"^[0-9a-f]{64}(\.json|\..*\.tmp)$")
+
+
+@dataclass(frozen=True)
+class Provider:
+    """予報の提供元ごとの格子の大きさと更新間隔"""
+    name: str
+    grid: float  # 格子の大きさ（度）
+    cadence: int  # 予報の更新間隔（秒）
+
+
+OPENWEATHER = Provider("openweather", grid=0.1, cadence=3 * 60 * 60)
+OPEN_METEO = Provider("open_meteo", grid=0.05, cadence=60 * 60)
+
+
+def grid_cell(lat: float, lon: float, grid: float) -> Tuple[float, float]:
+    """緯度・経度を格子の中心に丸める（同じセルのスポットは同じ座標でリクエストする）"""
+    return (
+        round(round(lat / grid) * grid, 4),
+        round(round(lon / grid) * grid, 4),
+    )
+
+
+def group_by_cell(coords: Dict[str, Tuple[float, float]], provider: Provider) -> Dict[Tuple[float, float], List[str]]:
+    """
+    地点を格子セルごとにまとめる（同じセルの地点は1回の取得を共有する）
+
+    Args:
+        coords: 地点名 -> (緯度, 経度)
+
+    Returns:
+        dict: セルの中心 (緯度, 経度) -> 地点名のリスト（coordsの順番）
+    """
+    cells: Dict[Tuple[float, float], List[str]] = {}
+    for name, (lat, lon) in coords.items():
+        cells.setdefault(grid_cell(lat, lon, provider.grid), []).append(name)
+    return cells
+
+
+def forecast_run(provider: Provider, now: Optional[float] = None) -> int:
+    """現在の予報の発表時刻（更新間隔の区切り、UNIX秒）"""
+    now = time.time() if now is None else now
+    return int(now // provider.cadence * provider.cadence)
+
+
+class ForecastCache:
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+        """
+        Args:
+            cache_dir: 保存先ディレクトリ（Noneならメモリのみ）
+        """
+        self.cache_dir = cache_dir
+        self._memory: Dict[str, Tuple[float, Dict]] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(provider: Provider, cell: Tuple[float, float], run: int, **params) -> str:
+        raw = json.dumps(
+            {"provider": provider.name, "cell": cell, "run": run, "params": params},
+            sort_keys=True
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """期限内のデータを返す（メモリ → ディスクの順に探す）"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, data = entry
+            return data if now < expires_at else None
+
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if now >= stored["expires_at"]:
+            return None
+
+        with self._lock:
+            self._memory[key] = (stored["expires_at"], stored["data"])
+        return stored["data"]
+
+    def set(self, key: str, data: Dict, expires_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (expires_at, data)
+            self._prune_memory()
+
+        if not self.cache_dir:
+            return
+        # 一時ファイルに書いてから置き換え（他のプロセスが読みかけのファイルを壊さない）
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{key}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"expires_at": expires_at, "data": data}, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._prune_disk()
+
+    def _prune_memory(self) -> None:
+        """期限切れのデータをメモリから削除（呼び出し側でロックを取得済み）"""
+        now = time.time()
+        for key in [key for key, (expires_at, _) in self._memory.items() if now >= expires_at]:
+            del self._memory[key]
+
+    def _prune_disk(self) -> None:
+        """
+        次の予報が出た後も残っている古いファイルを削除（最終更新から1日以上）
+
+        同じディレクトリに他のファイルが置かれていても消さないよう、このキャッシュが書き込んだファイルだけを対象にする。
+        """
+        cutoff = time.time() - 24 * 60 * 60
+        for name in os.listdir(self.cache_dir):
+            if not _CACHE_FILE.match(name):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def get_or_fetch(self, key: str, expires_at: float, fetch: Callable[[], Dict]) -> Dict:
+        """
+        キャッシュになければfetchで取得して保存
+
+        同じキーを同時に取得しようとした場合は、最初の1件の取得を待って結果を共有する。
+        """
+        data = self.get(key)
+        if data is not None:
+            return data
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            data = self.get(key)
+            if data is None:
+                data = fetch()
+                self.set(key, data, expires_at)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return data
@@ -0,0 +1,142 @@
+"""月齢表（日ごとの月齢・輝面比を事前に計算してファイルに保存し、日付から直接引く）
+
+ephemの計算は日付ごとに数十マイクロ秒かかるため、多くの日付・スポットを評価すると積み重なる。
+起動時に月齢表をメモリマップで読み込めば、日付からの検索は配列の添字1回で済む。
+"""
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Sequence
+
+import ephem
+import numpy as np
+
+# SURF_CACHE_DIRはキャッシュ全体のディレクトリ（予報・月齢表・事前計算の結果をその下に分けて保存する）
+DEFAULT_TABLE_DIR = os.path.join(
+    os.getenv("SURF_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")),
+    "moon"
+)
+DEFAULT_START = date(2020, 1, 1)
+DEFAULT_END = date(2040, 12, 31)
+
+SYNODIC_MONTH = 29.530589  # 朔望月（日）
+# 新月・満月からこの日数以内を大潮とする
+SPRING_TIDE_WINDOW = 3.0
+
+PHASE_NAMES = np.array(["新月", "上弦の月", "満月", "下弦の月", "新月"])
+# 朔望月の中の位置（0=新月、0.5=満月）の区切り（PHASE_NAMESの境界。最後の区間は次の新月）
+# 輝面比は満ちるときと欠けるときで同じ値になり、満月（約100%）が最後の区間に入ってしまうため月齢から求める
+PHASE_BOUNDS = np.array([0.0625, 0.4375, 0.5625, 0.9375])
+
+TABLE_DTYPE = np.dtype([("age", "<f4"), ("illumination", "<f4")])
+TABLE_FILE_MODE = 0o644
+
+
+def compute_day(day: date) -> tuple:
+    """ephemで1日分の月齢（前回の新月からの日数）と輝面比（%）を計算（その日の0時UTC）"""
+    observer_date = ephem.Date(datetime.combine(day, datetime.min.time()))
+    moon = ephem.Moon(observer_date)
+    previous_new = ephem.previous_new_moon(observer_date)
+    return float(observer_date - previous_new), float(moon.phase)
+
+
+def build_table(start: date, end: date) -> np.ndarray:
+    """startからendまでの月齢表を作る"""
+    days = (end - start).days + 1
+    table = np.empty(days, dtype=TABLE_DTYPE)
+    for i in range(days):
+        table[i] = compute_day(start + timedelta(days=i))
+    return table
+
+
+def phase_names(age) -> np.ndarray:
+    """月齢（前回の新月からの日数）から月相の名前"""
+    position = np.asarray(age, dtype=float) / SYNODIC_MONTH % 1
+    return PHASE_NAMES[np.searchsorted(PHASE_BOUNDS, position, side="right")]
+
+
+def spring_tides(age) -> np.ndarray:
+    """大潮判定（新月・満月の前後SPRING_TIDE_WINDOW日以内）"""
+    age = np.asarray(age, dtype=float)
+    from_full = np.abs(age - SYNODIC_MONTH / 2)
+    from_new = np.minimum(age, SYNODIC_MONTH - age)
+    return np.minimum(from_new, from_full) <= SPRING_TIDE_WINDOW
+
+
+class MoonTable:
+    def __init__(
+        self,
+        table_dir: Optional[str] = DEFAULT_TABLE_DIR,
+        start: date = DEFAULT_START,
+        end: date = DEFAULT_END
+    ):
+        """
+        Args:
+            table_dir: 月齢表を保存するディレクトリ（Noneなら保存せずメモリ上で作る）
+            start: 月齢表の最初の日
+            end: 月齢表の最後の日（範囲外の日付はその都度ephemで計算）
+        """
+        self.start = start
+        self.end = end
+        self.table = self._load_or_build(table_dir)
+
+    def _load_or_build(self, table_dir: Optional[str]) -> np.ndarray:
+        if table_dir is None:
+            return build_table(self.start, self.end)
+
+        path = os.path.join(table_dir, f"moon_{self.start:%Y%m%d}_{self.end:%Y%m%d}.npy")
+        try:
+            table = np.load(path, mmap_mode="r")
+            if table.dtype == TABLE_DTYPE and len(table) == (self.end - self.start).days + 1:
+                return table
+        except (OSError, ValueError):
+            pass
+
+        table = build_table(self.start, self.end)
+        os.makedirs(table_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=table_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, table)
+            # mkstempのファイルは作成者だけが読める（0600）ため、他のユーザーのプロセスも読めるようにする
+            os.chmod(tmp_path, TABLE_FILE_MODE)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return np.load(path, mmap_mode="r")
+
+    def _rows(self, days: Sequence[date]) -> np.ndarray:
+        """日付ごとの (age, illumination)。範囲外の日付はephemで計算"""
+        offsets = np.array([(day - self.start).days for day in days], dtype=int)
+        inside = (offsets >= 0) & (offsets < len(self.table))
+        rows = np.empty(len(offsets), dtype=TABLE_DTYPE)
+        rows[inside] = self.table[offsets[inside]]
+        for i in np.flatnonzero(~inside):
+            rows[i] = compute_day(days[i])
+        return rows
+
+    def lookup_many(self, days: Sequence[date]) -> Dict[str, np.ndarray]:
+        """複数の日付の月齢情報を配列で返す（スコアのまとめて計算用）"""
+        rows = self._rows(days)
+        return {
+            "age": np.floor(rows["age"]).astype(int),
+            "phase": phase_names(rows["age"]),
+            "illumination": rows["illumination"].astype(float),
+            "is_spring_tide": spring_tides(rows["age"]),
+        }
+
+    def lookup(self, day: date) -> Dict:
+        """月齢と月の満ち欠け状態"""
+        offset = (day - self.start).days
+        if 0 <= offset < len(self.table):
+            age, illumination = (float(v) for v in self.table[offset])
+        else:
+            age, illumination = compute_day(day)
+        return {
+            "age": int(age),
+            "phase": str(phase_names(age)),
+            "illumination": illumination,
+            "is_spring_tide": bool(spring_tides(age)),
+        }
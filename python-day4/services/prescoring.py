@@ -0,0 +1,318 @@
+"""全スポットのスコアの事前計算（予報が更新されるたびに7日分を計算して保存する）
+
+APIは保存済みの結果を（スポット, 日付, スキルレベル）で引いて返すだけにする。
+結果はJSONに変換済みのバイト列で持つため、リクエストごとの計算・変換はない。
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from services.forecast import ForecastClient
+from services.forecast_cache import OPEN_METEO, Provider, forecast_run
+from services.moon import MoonTable
+from services.ranking import SpotScores, score_spots, session_windows
+from services.scoring import SKILL_RANGES
+from services.spots import Spot
+
+logger = logging.getLogger(__name__)
+
+# SURF_CACHE_DIRはキャッシュ全体のディレクトリ（予報・月齢表・事前計算の結果をその下に分けて保存する）
+DEFAULT_SCORES_FILE = os.path.join(
+    os.getenv("SURF_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")),
+    "scores",
+    "scores.json"
+)
+FORECAST_DAYS = 7
+SKILL_LEVELS = tuple(SKILL_RANGES)
+# 予報の発表時刻ちょうどはまだ新しい予報が出ていないことがあるため、少し待ってから計算する
+REFRESH_DELAY = 5 * 60
+NO_FORECAST_ERROR = "予報データがありません（OPENWEATHER_API_KEYと予報の応答を確認してください）"
+
+ScoreKey = Tuple[str, str, str]  # (スポット名, 日付 YYYY-MM-DD, スキルレベル)
+
+
+def _round(value: float, digits: int = 1) -> Optional[float]:
+    """JSONに入れる数値（NaNはnull）"""
+    return None if value != value else round(float(value), digits)
+
+
+def slot_records(spot_scores: SpotScores) -> Dict[Tuple[str, str], List[Dict]]:
+    """
+    スコアの計算結果を（スポット名, 日付）ごとの時間帯のリストにする（評価理由もここで作る）
+
+    Returns:
+        dict: (スポット名, 日付 YYYY-MM-DD) -> 時刻順の時間帯の辞書のリスト
+    """
+    records: Dict[Tuple[str, str], List[Dict]] = {}
+    slots = spot_scores.slots
+    for row, slot in enumerate(slots.itertuples(index=False)):
+        records.setdefault((slot.spot, slot.datetime.date().isoformat()), []).append({
+            'time': slot.datetime.isoformat(),
+            'score': int(slot.score),
+            'wave_height': _round(slot.wave_height),
+            'wave_period': _round(slot.wave_period),
+            'wave_direction': _round(slot.wave_direction, 0),
+            'swell_wave_height': _round(slot.swell_wave_height),
+            'swell_wave_period': _round(slot.swell_wave_period),
+            'wind_speed': _round(slot.wind_speed),
+            'wind_deg': _round(slot.wind_deg, 0),
+            'wind_direction': str(slot.wind_direction),
+            'rain': _round(slot.rain),
+            'weather': slot.weather,
+            'temp': _round(slot.temp),
+            'reasons': spot_scores.reasons(row),
+        })
+    for slot_list in records.values():
+        slot_list.sort(key=lambda slot: slot['time'])
+    return records
+
+
+def prescore(
+    client: ForecastClient,
+    spots: Dict[str, Spot],
+    moon_table: MoonTable,
+    start: date,
+    days: int = FORECAST_DAYS,
+    skill_levels: Sequence[str] = SKILL_LEVELS,
+    interpolate: bool = False,
+    hourly: bool = False
+) -> Tuple[Dict[ScoreKey, Dict], Dict[str, str]]:
+    """
+    全スポット・全スキルレベルのstartからdays日分のスコアを計算
+
+    セッション向きの時間帯（sessions.GOOD_SESSION_SCORE点以上が続く区間）は開始日の結果に含める。
+
+    Returns:
+        tuple: ((スポット名, 日付, スキルレベル) -> 結果の辞書, スポット名 -> 取得エラー)
+    """
+    dates = [start + timedelta(days=i) for i in range(days)]
+    moon = moon_table.lookup_many(dates)
+    moon_by_date = {
+        d: {'phase': str(moon['phase'][i]), 'is_spring_tide': bool(moon['is_spring_tide'][i])}
+        for i, d in enumerate(dates)
+    }
+
+    fetched = client.fetch_spots(
+        {name: spot.as_beach_info() for name, spot in spots.items()},
+        dates[0].isoformat(),
+        (dates[-1] + timedelta(days=1)).isoformat()
+    )
+    errors = {name: data['error'] for name, data in fetched.items() if data['error']}
+
+    entries: Dict[ScoreKey, Dict] = {}
+    for skill_level in skill_levels:
+        spot_scores = score_spots(spots, fetched, dates, moon_by_date, skill_level, interpolate=interpolate, hourly=hourly)
+        sessions: Dict[Tuple[str, str], List[Dict]] = {}
+        for spot, windows in session_windows(spot_scores).items():
+            for window in windows:
+                sessions.setdefault((spot, window.start.date().isoformat()), []).append(window.as_dict())
+
+        for (spot, day), slots in slot_records(spot_scores).items():
+            best = max(slots, key=lambda slot: slot['score'])
+            entries[(spot, day, skill_level)] = {
+                'spot': spot,
+                'date': day,
+                'skill_level': skill_level,
+                'best': {'time': best['time'], 'score': best['score']},
+                'sessions': sessions.get((spot, day), []),
+                'slots': slots,
+            }
+    return entries, errors
+
+
+class ScoreStore:
+    def __init__(self, path: Optional[str] = DEFAULT_SCORES_FILE):
+        """
+        Args:
+            path: 計算結果の保存先（再起動してもすぐに返せるようにする。Noneならメモリのみ）
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[ScoreKey, Dict] = {}  # 発表時刻・計算時刻つきの結果
+        self._payloads: Dict[ScoreKey, Tuple[int, bytes]] = {}  # キー -> (予報の発表時刻, JSONのバイト列)
+        self.run: Optional[int] = None
+        self.generated_at: Optional[float] = None
+        self.errors: Dict[str, str] = {}
+
+    def get(self, spot: str, day: str, skill_level: str) -> Optional[Tuple[int, bytes]]:
+        """
+        保存済みの結果。なければNone
+
+        Returns:
+            tuple: (その結果の予報の発表時刻, JSONのバイト列)。ETagは必ずこの発表時刻から作る
+            （store.runを別に読むと、入れ替えの間に古い結果と新しい発表時刻の組み合わせを返しうる）
+        """
+        with self._lock:
+            return self._payloads.get((spot, day, skill_level))
+
+    def replace(self, entries: Dict[ScoreKey, Dict], run: int, errors: Optional[Dict[str, str]] = None) -> None:
+        """
+        計算結果をまとめて入れ替える（読み込み中のリクエストは古い結果か新しい結果のどちらかを返す）
+
+        errorsのスポット（予報を取得できなかったスポット）は前回の結果を残す。
+        """
+        errors = dict(errors or {})
+        generated_at = time.time()
+        entries = {key: {**entry, 'run': run, 'generated_at': generated_at} for key, entry in entries.items()}
+        payloads = {key: (run, self._encode(entry)) for key, entry in entries.items()}
+        with self._lock:
+            previous_entries, previous_payloads = self._entries, self._payloads
+        for key, entry in previous_entries.items():
+            if key[0] in errors and key not in entries:
+                entries[key] = entry
+                payloads[key] = previous_payloads[key]  # 前回の発表時刻・計算時刻のまま返す
+        with self._lock:
+            self._entries = entries
+            self._payloads = payloads
+            self.run = run
+            self.generated_at = generated_at
+            self.errors = errors
+        self._save()
+
+    def record_errors(self, errors: Dict[str, str]) -> None:
+        """計算結果は入れ替えずに取得エラーだけを記録する"""
+        with self._lock:
+            self.errors = dict(errors)
+
+    @staticmethod
+    def _encode(entry: Dict) -> bytes:
+        return json.dumps(entry, ensure_ascii=False).encode('utf-8')
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        stored = {
+            'run': self.run,
+            'generated_at': self.generated_at,
+            'errors': self.errors,
+            # 取得エラーで前回の結果を残したエントリは、その発表時刻・計算時刻のまま保存する
+            'entries': list(self._entries.values()),
+        }
+        # 一時ファイルに書いてから置き換え（読み込み中のプロセスが壊れたファイルを読まない）
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(stored, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self) -> bool:
+        """保存済みの計算結果を読み込む（ファイルがなければFalse）"""
+        if not self.path:
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        entries, payloads = {}, {}
+        for entry in stored['entries']:
+            # 発表時刻・計算時刻のないエントリ（以前の形式）は全体の値を使う
+            entry = {'run': stored['run'], 'generated_at': stored['generated_at'], **entry}
+            key = (entry['spot'], entry['date'], entry['skill_level'])
+            entries[key] = entry
+            payloads[key] = (entry['run'], self._encode(entry))
+        with self._lock:
+            self._entries = entries
+            self._payloads = payloads
+            self.run = stored['run']
+            self.generated_at = stored['generated_at']
+            self.errors = stored.get('errors', {})
+        return True
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                'run': self.run,
+                'generated_at': self.generated_at,
+                'entries': len(self._payloads),
+                'errors': dict(self.errors),
+            }
+
+
+class PrescoreWorker(threading.Thread):
+    def __init__(
+        self,
+        client: ForecastClient,
+        spots: Dict[str, Spot],
+        store: ScoreStore,
+        moon_table: MoonTable,
+        days: int = FORECAST_DAYS,
+        interpolate: bool = False,
+        hourly: bool = False,
+        provider: Provider = OPEN_METEO,
+        delay: float = REFRESH_DELAY
+    ):
+        """
+        予報の発表時刻ごとに全スポットのスコアを計算し直すバックグラウンドスレッド
+
+        Args:
+            client: 予報の取得に使うクライアント（キャッシュ付きなら同じ予報は再取得しない）
+            spots: 計算するスポット
+            store: 計算結果の保存先
+            moon_table: 月齢表
+            days: 今日から何日分を計算するか
+            interpolate: 波データを天気の時刻に合わせて補間するか
+            hourly: 波データの1時間ごとの時刻で計算するか
+            provider: 更新間隔の基準にする予報（波の予報は1時間ごとに更新される）
+            delay: 発表時刻から計算を始めるまでの秒数
+        """
+        super().__init__(name="prescore-worker", daemon=True)
+        self.client = client
+        self.spots = spots
+        self.store = store
+        self.moon_table = moon_table
+        self.days = days
+        self.interpolate = interpolate
+        self.hourly = hourly
+        self.provider = provider
+        self.delay = delay
+        self._stop_event = threading.Event()
+
+    def refresh(self) -> None:
+        """今の予報で全スポットのスコアを計算して保存"""
+        run = forecast_run(self.provider)
+        started = time.perf_counter()
+        entries, errors = prescore(
+            self.client, self.spots, self.moon_table, datetime.now().date(), self.days,
+            interpolate=self.interpolate, hourly=self.hourly
+        )
+        if not entries and not errors:
+            # 例外にならずに予報が空だった場合（APIキーがない・空の応答など）も全スポットの失敗として扱う
+            errors = {name: NO_FORECAST_ERROR for name in self.spots}
+        if not entries or len(errors) == len(self.spots):
+            # 全スポットで取得に失敗した場合は前回の結果を残し、少し待って再試行する
+            self.store.record_errors(errors)
+            raise RuntimeError(f"全スポットの予報を取得できませんでした: {next(iter(errors.values()), NO_FORECAST_ERROR)}")
+        self.store.replace(entries, run, errors)
+        logger.info("%dスポットのスコアを計算しました（%d件、%.1f秒）", len(self.spots), len(entries), time.perf_counter() - started)
+        for name, error in errors.items():
+            logger.warning("%s: %s", name, error)
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            # 保存済みの結果が今の予報のものなら、次の発表時刻まで計算しない
+            if self.store.run != forecast_run(self.provider):
+                try:
+                    self.refresh()
+                except Exception:
+                    logger.exception("スコアの事前計算に失敗しました")
+                    self._stop_event.wait(60)
+                    continue
+
+            next_run = forecast_run(self.provider) + self.provider.cadence + self.delay
+            self._stop_event.wait(max(next_run - time.time(), 1))
+
+    def stop(self) -> None:
+        self._stop_event.set()
@@ -0,0 +1,199 @@
+"""全スポットのスコアをまとめて計算してランキングにする"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from services.alignment import WAVE_COLUMNS, WEATHER_COLUMNS, merge_slots
+from services.scoring import ScoreResult, score_slots, wind_direction_names
+from services.sessions import GOOD_SESSION_SCORE, MIN_SESSION_HOURS, SessionWindow, find_windows
+from services.spots import Spot
+
+
+@dataclass
+class SpotScores:
+    """全スポット・全時間帯のスコア（slotsの行番号 = resultの位置）"""
+    slots: pd.DataFrame
+    result: ScoreResult
+    step: timedelta = timedelta(hours=3)  # 1時間帯の長さ
+
+    def reasons(self, row: int) -> List[str]:
+        return self.result.reasons(row)
+
+
+def merge_spots(
+    spots: Dict[str, Spot],
+    fetched: Dict[str, Dict],
+    dates: List[date],
+    hourly: bool = False,
+    interpolate: bool = False
+) -> pd.DataFrame:
+    """
+    全スポットの対象日の時間帯を1つの表につなげる
+
+    Args:
+        spots: スポット名 -> スポット（ビーチの向き・うねりの入る範囲を使う）
+        fetched: ForecastClient.fetch_spots の結果
+        dates: 対象の日付
+        hourly: Trueなら波データの1時間ごとの時刻で、風・気温を補間する（interpolateは使わない）
+        interpolate: 波データを天気の時刻に合わせて補間するか
+    """
+    columns: Dict[str, list] = {
+        'spot': [], 'datetime': [], 'beach_facing': [], 'swell_direction': [], 'swell_window': [],
+        'wind_speed': [], 'wind_deg': [], 'rain': [], 'weather': [], 'temp': [],
+        'wave_height': [], 'wave_period': [], 'wave_direction': [], 'swell_wave_height': [], 'swell_wave_period': [],
+    }
+
+    for name, data in fetched.items():
+        spot_slots = merge_slots(data['weather'], data['waves'], dates, hourly=hourly, interpolate=interpolate)
+        count = len(spot_slots['datetime'])
+        spot = spots[name]
+        columns['spot'].extend([name] * count)
+        columns['beach_facing'].extend([spot.facing] * count)
+        columns['swell_direction'].extend([spot.optimal_swell_direction] * count)
+        columns['swell_window'].extend([spot.swell_window] * count)
+        for key in WEATHER_COLUMNS + WAVE_COLUMNS:
+            columns[key].extend(spot_slots[key])
+    return pd.DataFrame(columns)
+
+
+def score_merged(
+    slots: pd.DataFrame,
+    moon_by_date: Dict[date, Dict],
+    skill_level: str,
+    step: timedelta = timedelta(hours=3)
+) -> SpotScores:
+    """
+    merge_spotsの表の全時間帯を1回でスコア計算（slotsにscore・wind_directionの列を追加する）
+
+    Args:
+        slots: merge_spotsの結果
+        moon_by_date: 日付 -> 月齢情報（get_moon_phaseの結果）
+        skill_level: スキルレベル
+        step: 1時間帯の長さ
+    """
+    slot_dates = [dt.date() for dt in slots['datetime']]
+    is_spring_tide = np.array([moon_by_date[d]['is_spring_tide'] for d in slot_dates], dtype=bool)
+    moon_phase = np.array([moon_by_date[d]['phase'] for d in slot_dates], dtype=object)
+
+    result = score_slots(
+        wave_height=slots['wave_height'].to_numpy(dtype=float),
+        wave_period=slots['wave_period'].to_numpy(dtype=float),
+        wind_speed=slots['wind_speed'].to_numpy(dtype=float),
+        wind_deg=slots['wind_deg'].to_numpy(dtype=float),
+        rain=slots['rain'].to_numpy(dtype=float),
+        beach_facing=slots['beach_facing'].to_numpy(dtype=float),
+        is_spring_tide=is_spring_tide,
+        moon_phase=moon_phase,
+        skill_level=skill_level,
+        wave_direction=slots['wave_direction'].to_numpy(dtype=float),
+        swell_direction=slots['swell_direction'].to_numpy(dtype=float),
+        swell_window=slots['swell_window'].to_numpy(dtype=float),
+        swell_wave_height=slots['swell_wave_height'].to_numpy(dtype=float),
+        swell_wave_period=slots['swell_wave_period'].to_numpy(dtype=float)
+    )
+    slots['score'] = result.score
+    slots['wind_direction'] = wind_direction_names(slots['wind_deg'].to_numpy(dtype=float)) if len(slots) else []
+    return SpotScores(slots, result, step)
+
+
+def score_spots(
+    spots: Dict[str, Spot],
+    fetched: Dict[str, Dict],
+    dates: List[date],
+    moon_by_date: Dict[date, Dict],
+    skill_level: str,
+    interpolate: bool = False,
+    hourly: bool = False
+) -> SpotScores:
+    """
+    全スポットの対象日の時間帯を1つの配列につなげ、1回でスコアを計算
+
+    Args:
+        spots: スポット名 -> スポット（ビーチの向き・うねりの入る範囲を使う）
+        fetched: ForecastClient.fetch_spots の結果
+        dates: 対象の日付
+        moon_by_date: 日付 -> 月齢情報（get_moon_phaseの結果）
+        skill_level: スキルレベル
+        interpolate: 波データを天気の時刻に合わせて補間するか
+        hourly: Trueなら波データの1時間ごとの時刻で、風・気温を補間して計算する（interpolateは使わない）
+    """
+    slots = merge_spots(spots, fetched, dates, hourly=hourly, interpolate=interpolate)
+    return score_merged(slots, moon_by_date, skill_level, timedelta(hours=1) if hourly else timedelta(hours=3))
+
+
+def score_day(slots: Dict[str, list], spot: Spot, moon_info: Dict, skill_level: str) -> ScoreResult:
+    """
+    1スポット・1日分の時間帯（merge_slotsの結果）をまとめてスコア計算（スポット詳細の表示用）
+
+    Args:
+        slots: merge_slotsの結果
+        spot: スポット
+        moon_info: その日の月齢情報（get_moon_phaseの結果）
+        skill_level: スキルレベル
+    """
+    return score_slots(
+        wave_height=slots['wave_height'],
+        wave_period=slots['wave_period'],
+        wind_speed=slots['wind_speed'],
+        wind_deg=slots['wind_deg'],
+        rain=slots['rain'],
+        beach_facing=spot.facing,
+        is_spring_tide=moon_info['is_spring_tide'],
+        moon_phase=moon_info['phase'],
+        skill_level=skill_level,
+        wave_direction=slots['wave_direction'],
+        swell_direction=spot.optimal_swell_direction,
+        swell_window=spot.swell_window,
+        swell_wave_height=slots['swell_wave_height'],
+        swell_wave_period=slots['swell_wave_period']
+    )
+
+
+def session_windows(
+    scores: SpotScores,
+    threshold: float = GOOD_SESSION_SCORE,
+    min_hours: float = MIN_SESSION_HOURS
+) -> Dict[str, List[SessionWindow]]:
+    """
+    スポットごとのセッション向きの時間帯（best_indexはslotsの行番号）
+
+    Returns:
+        dict: スポット名 -> 区間のリスト（時刻順。区間のないスポットは含めない）
+    """
+    windows = {}
+    slots = scores.slots
+    for name, rows in slots.groupby('spot', sort=False).indices.items():
+        rows = rows[np.argsort(slots['datetime'].to_numpy()[rows], kind='stable')]
+        found = find_windows(
+            list(slots['datetime'].iloc[rows]), slots['score'].to_numpy()[rows], threshold, min_hours, scores.step
+        )
+        for window in found:
+            window.best_index = int(rows[window.best_index])
+        if found:
+            windows[name] = found
+    return windows
+
+
+def rank_spots(scores: SpotScores) -> pd.DataFrame:
+    """
+    スポットごとの最高スコアの時間帯と平均スコアをランキングにする
+
+    Returns:
+        pd.DataFrame: 最高スコアの高い順（同点なら平均スコアの高い順）。rowはslotsの行番号
+    """
+    slots = scores.slots
+    if slots.empty:
+        return pd.DataFrame(columns=['spot', 'best_score', 'mean_score', 'best_time', 'row'])
+
+    best_rows = slots.groupby('spot', sort=False)['score'].idxmax()
+    ranking = pd.DataFrame({
+        'spot': best_rows.index,
+        'best_score': slots.loc[best_rows.values, 'score'].to_numpy(),
+        'mean_score': slots.groupby('spot', sort=False)['score'].mean().loc[best_rows.index].to_numpy(),
+        'best_time': slots.loc[best_rows.values, 'datetime'].to_numpy(),
+        'row': best_rows.to_numpy(),
+    })
+    return ranking.sort_values(['best_score', 'mean_score'], ascending=False, kind='stable').reset_index(drop=True)
@@ -0,0 +1,381 @@
+"""サーフィン適性スコアの計算（全時間帯・全スポット・全スキルレベルをNumPyでまとめて計算）
+
+各要素の判定結果は「どの条件に当てはまったか」のコードとして保持し、
+評価理由の文字列は表示する行についてだけ後から作る。
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# スキルレベルに応じた最適波高
+SKILL_RANGES: Dict[str, Tuple[float, float]] = {
+    '初心者': (0.5, 1.0),
+    '中級者': (1.0, 2.0),
+    '上級者': (2.0, 3.5),
+}
+DEFAULT_SKILL_RANGE = (1.0, 2.0)
+
+BASE_SCORE = 50
+DANGEROUS_WAVE_HEIGHT = 3.5
+
+WIND_DIRECTIONS = np.array(['北', '北東', '東', '南東', '南', '南西', '西', '北西'])
+WIND_TYPES = ['オフショア', 'サイドオフショア', 'オンショア', 'サイドオンショア']
+
+# 各要素の判定コードごとの点数（コードは np.select の条件の順番）
+HEIGHT_POINTS = np.array([20, -10, 5, -20, -10, 10])
+PERIOD_POINTS = np.array([20, 10, 5, -10])
+WIND_DIRECTION_POINTS = np.array([15, 10, -15, -5])
+WIND_SPEED_POINTS = np.array([10, 8, 3, -5, -10])
+RAIN_POINTS = np.array([5, 0, -5])
+MOON_POINTS = np.array([0, 5])
+# うねりの向き: 最適 / 良好 / ずれている / 陸側から / データなし
+SWELL_DIRECTION_POINTS = np.array([10, 5, -5, -15, 0])
+# うねりの質: 長周期のうねりが主体 / うねりと風波が混在 / 風波が主体 / データなし
+SWELL_QUALITY_POINTS = np.array([5, 0, -5, 0])
+
+# スポットの最適なうねりの向きから左右それぞれこの角度までを「うねりが入る範囲」とする
+DEFAULT_SWELL_WINDOW = 45.0
+GROUNDSWELL_PERIOD = 10.0  # この周期（秒）以上のうねりを長周期とする
+
+
+def wind_direction_names(deg) -> np.ndarray:
+    """風向（度）を8方位の名前に変換（配列のまま）"""
+    idx = ((np.asarray(deg, dtype=float) + 22.5) // 45).astype(int) % 8
+    return WIND_DIRECTIONS[idx]
+
+
+def get_wind_direction_name(deg: float) -> str:
+    """風向を8方位で返す"""
+    return str(wind_direction_names(deg))
+
+
+def skill_bounds(skill_levels: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """スキルレベルごとの最適波高の下限・上限（スキルの軸を先頭に持つ配列）"""
+    bounds = [SKILL_RANGES.get(skill, DEFAULT_SKILL_RANGE) for skill in skill_levels]
+    bounds = np.array(bounds, dtype=float).reshape(-1, 2)
+    return bounds[:, 0], bounds[:, 1]
+
+
+def _height_codes(wave_height: np.ndarray, min_h: np.ndarray, max_h: np.ndarray) -> np.ndarray:
+    return np.select(
+        [
+            (min_h <= wave_height) & (wave_height <= max_h),  # 最適
+            wave_height < min_h * 0.5,  # 小さすぎる
+            wave_height < min_h,  # やや小さい
+            wave_height > DANGEROUS_WAVE_HEIGHT,  # 危険
+            wave_height > max_h,  # 高め
+        ],
+        [0, 1, 2, 3, 4],
+        default=5  # 良好（どの条件にも当てはまらない場合）
+    ).astype(np.int8)
+
+
+def _period_codes(wave_period: np.ndarray) -> np.ndarray:
+    return np.select(
+        [
+            (8 <= wave_period) & (wave_period <= 12),
+            ((6 <= wave_period) & (wave_period < 8)) | ((12 < wave_period) & (wave_period <= 14)),
+            (14 < wave_period) & (wave_period <= 16),
+        ],
+        [0, 1, 2],
+        default=3
+    ).astype(np.int8)
+
+
+def _wind_direction_codes(wind_deg: np.ndarray, beach_facing: np.ndarray) -> np.ndarray:
+    """
+    風向がオフショアかオンショアかを判定
+
+    beach_facing: ビーチが向いている方角（度）
+    - 湘南: 180（南向き）
+    - 九十九里: 90（東向き）
+    """
+    # ビーチに対する風の相対角度
+    relative_angle = (wind_deg - beach_facing + 180) % 360
+    return np.select(
+        [
+            (45 <= relative_angle) & (relative_angle <= 135),
+            ((135 < relative_angle) & (relative_angle <= 180)) | ((0 <= relative_angle) & (relative_angle < 45)),
+            (225 <= relative_angle) & (relative_angle <= 315),
+        ],
+        [0, 1, 2],
+        default=3
+    ).astype(np.int8)
+
+
+def _wind_speed_codes(wind_speed: np.ndarray) -> np.ndarray:
+    # 3, 5, 8, 10m/s以下をそれぞれ0〜3、それより強ければ4
+    return np.searchsorted(np.array([3, 5, 8, 10]), wind_speed, side='left').astype(np.int8)
+
+
+def _rain_codes(rain: np.ndarray) -> np.ndarray:
+    return np.select([rain == 0, rain < 2], [0, 1], default=2).astype(np.int8)
+
+
+def angle_difference(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """2つの角度（度）の差（0〜180）"""
+    return np.abs((np.asarray(a, dtype=float) - b + 180) % 360 - 180)
+
+
+def _swell_direction_codes(
+    wave_direction: np.ndarray,
+    swell_direction: np.ndarray,
+    swell_window: np.ndarray,
+    beach_facing: np.ndarray
+) -> np.ndarray:
+    """
+    波向（波が来る方角）がスポットのうねりの入る範囲に入っているかを判定
+
+    swell_direction: スポットに最適なうねりが来る方角（度）
+    swell_window: 最適な方角から左右それぞれ何度までうねりが入るか
+    """
+    from_optimal = angle_difference(wave_direction, swell_direction)
+    return np.select(
+        [
+            np.isnan(wave_direction),
+            angle_difference(wave_direction, beach_facing) > 90,  # 陸側から来る波は届かない
+            from_optimal <= swell_window / 2,
+            from_optimal <= swell_window,
+        ],
+        [4, 3, 0, 1],
+        default=2
+    ).astype(np.int8)
+
+
+def _swell_quality_codes(wave_height: np.ndarray, swell_wave_height: np.ndarray, swell_wave_period: np.ndarray) -> np.ndarray:
+    """波高に占めるうねり成分の割合と周期から、まとまった波か風波かを判定"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = swell_wave_height / wave_height
+    return np.select(
+        [
+            ~(swell_wave_height > 0) | ~(wave_height > 0),  # NaN・0はデータなし
+            (ratio >= 0.7) & (swell_wave_period >= GROUNDSWELL_PERIOD),
+            ratio >= 0.5,
+        ],
+        [3, 0, 1],
+        default=2
+    ).astype(np.int8)
+
+
+@dataclass
+class ScoreResult:
+    """
+    スコアの計算結果（配列の形は入力をブロードキャストした形）
+
+    評価理由はreasons()で1件ずつ作る（表示しない行の文字列は作らない）
+    """
+    score: np.ndarray
+    height_code: np.ndarray
+    period_code: np.ndarray
+    wind_direction_code: np.ndarray
+    wind_speed_code: np.ndarray
+    rain_code: np.ndarray
+    moon_code: np.ndarray
+    swell_direction_code: np.ndarray
+    swell_quality_code: np.ndarray
+    wave_height: np.ndarray
+    wave_period: np.ndarray
+    wind_deg: np.ndarray
+    wind_speed: np.ndarray
+    rain: np.ndarray
+    skill_level: np.ndarray
+    moon_phase: np.ndarray
+    wave_direction: np.ndarray
+    swell_wave_height: np.ndarray
+    swell_wave_period: np.ndarray
+
+    def contributions(self) -> Dict[str, np.ndarray]:
+        """要素ごとの加点・減点（配列）"""
+        return {
+            '波の高さ': HEIGHT_POINTS[self.height_code],
+            '波の周期': PERIOD_POINTS[self.period_code],
+            '風向': WIND_DIRECTION_POINTS[self.wind_direction_code],
+            '風速': WIND_SPEED_POINTS[self.wind_speed_code],
+            '天気': RAIN_POINTS[self.rain_code],
+            '月齢': MOON_POINTS[self.moon_code],
+            'うねりの向き': SWELL_DIRECTION_POINTS[self.swell_direction_code],
+            'うねりの質': SWELL_QUALITY_POINTS[self.swell_quality_code],
+        }
+
+    def reasons(self, index) -> List[str]:
+        """1件分の評価理由（indexは配列の位置。1次元ならint、多次元ならタプル）"""
+        wave_height = float(self.wave_height[index])
+        wave_period = float(self.wave_period[index])
+        wind_speed = float(self.wind_speed[index])
+        rain = float(self.rain[index])
+        skill_level = str(self.skill_level[index])
+        moon_phase = str(self.moon_phase[index])
+
+        reasons = [
+            [
+                f"✓ 最適な波高 ({wave_height:.1f}m - {skill_level}向け)",
+                f"✗ 波が小さすぎる ({wave_height:.1f}m)",
+                f"△ やや小さい波 ({wave_height:.1f}m)",
+                f"⚠️ 危険な波高 ({wave_height:.1f}m)",
+                f"△ 波が高め ({wave_height:.1f}m)",
+                f"○ 良好な波高 ({wave_height:.1f}m)",
+            ][self.height_code[index]],
+            [
+                f"✓ 理想的な周期 ({wave_period:.0f}秒)",
+                f"○ 良好な周期 ({wave_period:.0f}秒)",
+                f"△ 長周期 ({wave_period:.0f}秒 - 上級者向け)",
+                f"✗ 不適切な周期 ({wave_period:.0f}秒)",
+            ][self.period_code[index]],
+        ]
+
+        wind_code = self.wind_direction_code[index]
+        mark = "✓" if WIND_DIRECTION_POINTS[wind_code] > 0 else "✗"
+        reasons.append(f"{mark} {WIND_TYPES[wind_code]}（{get_wind_direction_name(self.wind_deg[index])}風）")
+
+        reasons.append([
+            f"✓ 穏やかな風 ({wind_speed:.1f}m/s)",
+            f"✓ 軽い風 ({wind_speed:.1f}m/s)",
+            f"○ やや風あり ({wind_speed:.1f}m/s)",
+            f"△ 強めの風 ({wind_speed:.1f}m/s)",
+            f"✗ 強風 ({wind_speed:.1f}m/s)",
+        ][self.wind_speed_code[index]])
+
+        reasons.append([
+            "✓ 雨なし",
+            f"△ 小雨 ({rain:.1f}mm)",
+            f"✗ 雨 ({rain:.1f}mm)",
+        ][self.rain_code[index]])
+
+        if self.moon_code[index]:
+            reasons.append(f"✓ 大潮期間（{moon_phase}）- うねり入りやすい")
+        else:
+            reasons.append(f"○ 小潮期間（{moon_phase}）")
+
+        # うねりのデータがない時間帯は理由に含めない
+        swell_direction_code = self.swell_direction_code[index]
+        if swell_direction_code != 4:
+            direction = get_wind_direction_name(self.wave_direction[index])
+            reasons.append([
+                f"✓ うねりの向きが最適（{direction}から）",
+                f"○ うねりの向きが良好（{direction}から）",
+                f"△ うねりの向きがずれている（{direction}から）",
+                f"✗ うねりが入りにくい向き（{direction}から）",
+            ][swell_direction_code])
+
+        swell_quality_code = self.swell_quality_code[index]
+        if swell_quality_code != 3:
+            swell_height = float(self.swell_wave_height[index])
+            swell_period = float(self.swell_wave_period[index])
+            reasons.append([
+                f"✓ 長周期のうねりが主体 ({swell_height:.1f}m・{swell_period:.0f}秒)",
+                f"○ うねりと風波が混在 (うねり{swell_height:.1f}m)",
+                f"✗ 風波が主体でまとまりにくい (うねり{swell_height:.1f}m)",
+            ][swell_quality_code])
+
+        return reasons
+
+
+def score_slots(
+    wave_height,
+    wave_period,
+    wind_speed,
+    wind_deg,
+    rain,
+    beach_facing,
+    is_spring_tide,
+    moon_phase,
+    skill_level,
+    wave_direction=np.nan,
+    swell_direction=None,
+    swell_window=DEFAULT_SWELL_WINDOW,
+    swell_wave_height=np.nan,
+    swell_wave_period=np.nan
+) -> ScoreResult:
+    """
+    サーフィン適性スコア（0-100点）をまとめて計算
+
+    引数はすべてスカラーか配列で、NumPyのブロードキャストで形をそろえる。
+    例: 時間帯の配列と skill_level=np.array(['初心者', '中級者', '上級者'])[:, None] を渡すと
+    （スキル数, 時間帯数）のスコアが1回で求まる。
+
+    Args:
+        wave_height: 波高（m）
+        wave_period: 波の周期（秒）
+        wind_speed: 風速（m/s）
+        wind_deg: 風向（度）
+        rain: 3時間降水量（mm）
+        beach_facing: ビーチが向いている方角（度）
+        is_spring_tide: 大潮期間か
+        moon_phase: 月相の名前（評価理由に使う）
+        skill_level: スキルレベル（初心者/中級者/上級者）
+        wave_direction: 波向（波が来る方角、度）。NaNならうねりの向きは評価しない
+        swell_direction: スポットに最適なうねりが来る方角（度）。Noneならbeach_facing
+        swell_window: 最適な方角から左右それぞれ何度までうねりが入るか
+        swell_wave_height: うねり成分の波高（m）。NaNならうねりの質は評価しない
+        swell_wave_period: うねり成分の周期（秒）
+    """
+    # スキルレベルの種類はブロードキャストする前に求める（文字列の大きな配列をソートしない）
+    skill_level = np.asarray(skill_level)
+    skills, skill_index = np.unique(skill_level, return_inverse=True)
+    min_h, max_h = skill_bounds(skills)
+    skill_index = skill_index.reshape(skill_level.shape)
+
+    arrays = np.broadcast_arrays(
+        np.asarray(wave_height, dtype=float),
+        np.asarray(wave_period, dtype=float),
+        np.asarray(wind_speed, dtype=float),
+        np.asarray(wind_deg, dtype=float),
+        np.asarray(rain, dtype=float),
+        np.asarray(beach_facing, dtype=float),
+        np.asarray(is_spring_tide, dtype=bool),
+        np.asarray(moon_phase),
+        skill_level,
+        skill_index,
+        np.asarray(wave_direction, dtype=float),
+        np.asarray(beach_facing if swell_direction is None else swell_direction, dtype=float),
+        np.asarray(swell_window, dtype=float),
+        np.asarray(swell_wave_height, dtype=float),
+        np.asarray(swell_wave_period, dtype=float),
+    )
+    (wave_height, wave_period, wind_speed, wind_deg, rain, beach_facing,
+     is_spring_tide, moon_phase, skill_level, skill_index,
+     wave_direction, swell_direction, swell_window, swell_wave_height, swell_wave_period) = arrays
+
+    height_code = _height_codes(wave_height, min_h[skill_index], max_h[skill_index])
+    period_code = _period_codes(wave_period)
+    wind_direction_code = _wind_direction_codes(wind_deg, beach_facing)
+    wind_speed_code = _wind_speed_codes(wind_speed)
+    rain_code = _rain_codes(rain)
+    moon_code = is_spring_tide.astype(np.int8)
+    swell_direction_code = _swell_direction_codes(wave_direction, swell_direction, swell_window, beach_facing)
+    swell_quality_code = _swell_quality_codes(wave_height, swell_wave_height, swell_wave_period)
+
+    score = (
+        BASE_SCORE
+        + HEIGHT_POINTS[height_code]
+        + PERIOD_POINTS[period_code]
+        + WIND_DIRECTION_POINTS[wind_direction_code]
+        + WIND_SPEED_POINTS[wind_speed_code]
+        + RAIN_POINTS[rain_code]
+        + MOON_POINTS[moon_code]
+        + SWELL_DIRECTION_POINTS[swell_direction_code]
+        + SWELL_QUALITY_POINTS[swell_quality_code]
+    )
+
+    return ScoreResult(
+        score=np.clip(score, 0, 100),  # スコアを0-100に制限
+        height_code=height_code,
+        period_code=period_code,
+        wind_direction_code=wind_direction_code,
+        wind_speed_code=wind_speed_code,
+        rain_code=rain_code,
+        moon_code=moon_code,
+        swell_direction_code=swell_direction_code,
+        swell_quality_code=swell_quality_code,
+        wave_height=wave_height,
+        wave_period=wave_period,
+        wind_deg=wind_deg,
+        wind_speed=wind_speed,
+        rain=rain,
+        skill_level=skill_level,
+        moon_phase=moon_phase,
+        wave_direction=wave_direction,
+        swell_wave_height=swell_wave_height,
+        swell_wave_period=swell_wave_period,
+    )
@@ -0,0 +1,86 @@
+"""スコアの高い時間帯が続く「セッション向きの時間帯」の検出（連続する区間をまとめて求める）"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from services.alignment import to_epoch_seconds
+
+GOOD_SESSION_SCORE = 70  # この点数以上の時間帯を「良い時間帯」とする
+MIN_SESSION_HOURS = 2  # 良い時間帯がこの時間以上続けばセッション向きとする
+# 時間帯の長さによらず、良い時間帯がこの数以上続くことも条件にする
+# （3時間ごとでは1時間帯だけで3時間になり、MIN_SESSION_HOURSだけでは単発の良い時間帯も区間になるため）
+MIN_SESSION_SLOTS = 2
+
+
+@dataclass
+class SessionWindow:
+    """良い時間帯が続く区間（endは最後の時間帯の終わり）"""
+    start: datetime
+    end: datetime
+    hours: float
+    best_score: int
+    mean_score: float
+    best_index: int  # 区間の中で最もスコアの高い時間帯の位置（入力の配列の位置）
+
+    def as_dict(self) -> Dict:
+        return {
+            'start': self.start.isoformat(),
+            'end': self.end.isoformat(),
+            'hours': self.hours,
+            'best_score': self.best_score,
+            'mean_score': round(self.mean_score, 1),
+        }
+
+
+def find_windows(
+    times: Sequence[datetime],
+    scores: Sequence[int],
+    threshold: float = GOOD_SESSION_SCORE,
+    min_hours: float = MIN_SESSION_HOURS,
+    step: timedelta = timedelta(hours=1),
+    min_slots: int = MIN_SESSION_SLOTS
+) -> List[SessionWindow]:
+    """
+    scoreがthreshold以上の時間帯がmin_hours以上、かつmin_slots個以上続く区間
+
+    時刻の間隔がstepより空いているところ（データの欠け）では区間を区切る。
+
+    Args:
+        times: 時間帯の開始時刻（昇順）
+        scores: 時間帯ごとのスコア
+        threshold: 良い時間帯とするスコア
+        min_hours: 区間の最短の長さ（時間）
+        step: 1時間帯の長さ（1時間ごとなら1時間、3時間ごとなら3時間）
+        min_slots: 区間に含む時間帯の最少の数
+
+    Returns:
+        list: 区間（時刻順）
+    """
+    scores = np.asarray(scores, dtype=float)
+    if len(scores) == 0:
+        return []
+
+    good = scores >= threshold
+    seconds = to_epoch_seconds(times)
+    contiguous = np.diff(seconds) == step.total_seconds()
+    # 前の時間帯が良い時間帯で、かつ時刻が続いていなければ新しい区間が始まる
+    starts_run = np.concatenate([[True], ~(good[:-1] & good[1:] & contiguous)])
+    starts = np.flatnonzero(starts_run)
+    ends = np.append(starts[1:], len(scores))
+    lengths = ends - starts
+    keep = good[starts] & (lengths >= min_slots) & (lengths * step.total_seconds() / 3600 >= min_hours)
+
+    windows = []
+    for start, end in zip(starts[keep], ends[keep]):
+        best = start + int(np.argmax(scores[start:end]))
+        windows.append(SessionWindow(
+            start=times[start],
+            end=times[end - 1] + step,
+            hours=float((end - start) * step.total_seconds() / 3600),
+            best_score=int(scores[best]),
+            mean_score=float(scores[start:end].mean()),
+            best_index=int(best),
+        ))
+    return windows
@@ -0,0 +1,228 @@
+"""サーフスポットの登録情報（データファイルから読み込み、位置で検索できるようにする）
+
+スポットは data/spots.csv に1行ずつ書く。環境変数 SURF_SPOTS_FILE に追加のファイルを
+（複数ならos.pathsep区切りで）指定すると、そのスポットも読み込む（同じ名前は後のファイルで上書き）。
+位置の検索は緯度・経度の格子（バケット）で候補を絞ってから距離を計算する。
+"""
+import csv
+import math
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.forecast_cache import Provider, group_by_cell
+from services.scoring import DEFAULT_SWELL_WINDOW
+
+DEFAULT_SPOTS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "spots.csv")
+USER_SPOTS_FILES = [path for path in os.getenv("SURF_SPOTS_FILE", "").split(os.pathsep) if path]
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+INDEX_CELL_DEGREES = 0.5  # 位置検索の格子の大きさ（度）
+
+BREAK_TYPES = {'beach': 'ビーチブレイク', 'reef': 'リーフブレイク', 'point': 'ポイントブレイク', 'rivermouth': 'リバーマウス'}
+TIDE_PREFERENCES = {'low': '干潮前後', 'mid': 'ミドルタイド', 'high': '満潮前後', 'any': '潮位を問わない'}
+
+
+@dataclass(frozen=True)
+class Spot:
+    """サーフスポット1か所"""
+    name: str
+    lat: float
+    lon: float
+    facing: float  # ビーチが向いている方角（度）
+    break_type: str = 'beach'
+    swell_direction: Optional[float] = None  # 最適なうねりの向き（度、来る方向）。Noneならfacingと同じ
+    swell_window: float = DEFAULT_SWELL_WINDOW  # 最適な向きから左右それぞれ何度までうねりが入るか
+    tide_preference: str = 'any'
+    description: str = ''
+
+    @property
+    def optimal_swell_direction(self) -> float:
+        return self.facing if self.swell_direction is None else self.swell_direction
+
+    def as_beach_info(self) -> Tuple[float, float, float]:
+        """get_beach_info() の形式 (緯度, 経度, ビーチの向き)"""
+        return self.lat, self.lon, self.facing
+
+
+def _parse_row(row: Dict[str, str], path: str, line: int) -> Spot:
+    """CSVの1行をSpotに変換（不正な値はファイル名と行番号つきのValueError）"""
+    try:
+        swell_direction = (row.get('swell_direction') or '').strip()
+        swell_window = (row.get('swell_window') or '').strip()
+        spot = Spot(
+            name=row['name'].strip(),
+            lat=float(row['lat']),
+            lon=float(row['lon']),
+            facing=float(row['facing']) % 360,
+            break_type=(row.get('break_type') or 'beach').strip(),
+            swell_direction=float(swell_direction) % 360 if swell_direction else None,
+            swell_window=float(swell_window) if swell_window else DEFAULT_SWELL_WINDOW,
+            tide_preference=(row.get('tide_preference') or 'any').strip(),
+            description=(row.get('description') or '').strip(),
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"{path}:{line}: スポットの形式が正しくありません ({type(e).__name__}: {e})") from e
+
+    if not spot.name:
+        raise ValueError(f"{path}:{line}: スポット名が空です")
+    if not (-90 <= spot.lat <= 90 and -180 <= spot.lon <= 180):
+        raise ValueError(f"{path}:{line}: 緯度・経度が範囲外です ({spot.lat}, {spot.lon})")
+    if spot.break_type not in BREAK_TYPES:
+        raise ValueError(f"{path}:{line}: 未対応のbreak_typeです: {spot.break_type}")
+    if not 0 < spot.swell_window <= 180:
+        raise ValueError(f"{path}:{line}: swell_windowは0より大きく180以下にしてください: {spot.swell_window}")
+    if spot.tide_preference not in TIDE_PREFERENCES:
+        raise ValueError(f"{path}:{line}: 未対応のtide_preferenceです: {spot.tide_preference}")
+    return spot
+
+
+def read_spots(path: str) -> List[Spot]:
+    """スポットのCSVを読み込む（見出し: name,lat,lon,facing[,break_type,swell_direction,swell_window,tide_preference,description]）"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        # 見出しが1行目なのでデータは2行目から
+        return [_parse_row(row, path, line) for line, row in enumerate(csv.DictReader(f), start=2)]
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """1地点から複数地点までの大円距離（km）"""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class SpotRegistry:
+    def __init__(self, spots: Sequence[Spot], cell_degrees: float = INDEX_CELL_DEGREES):
+        """
+        Args:
+            spots: スポット（同じ名前は後のものが優先）
+            cell_degrees: 位置検索の格子の大きさ（度）
+        """
+        self._spots: Dict[str, Spot] = {}
+        for spot in spots:
+            self._spots.pop(spot.name, None)  # 上書きしたスポットは後ろに並べる
+            self._spots[spot.name] = spot
+        self.cell_degrees = cell_degrees
+
+        ordered = list(self._spots.values())
+        self._names = [spot.name for spot in ordered]
+        self._lats = np.array([spot.lat for spot in ordered], dtype=float)
+        self._lons = np.array([spot.lon for spot in ordered], dtype=float)
+        self._buckets: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for i, (lat, lon) in enumerate(zip(self._lats, self._lons)):
+            bucket_lat, bucket_lon = self._bucket(lat, lon)
+            self._buckets[(bucket_lat, self._wrap_lon_bucket(bucket_lon))].append(i)
+
+    @classmethod
+    def load(cls, paths: Sequence[str]) -> 'SpotRegistry':
+        """複数のCSVから読み込む（同じ名前のスポットは後のファイルで上書き）"""
+        spots: List[Spot] = []
+        for path in paths:
+            spots.extend(read_spots(path))
+        return cls(spots)
+
+    def _bucket(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def __len__(self) -> int:
+        return len(self._spots)
+
+    def __iter__(self) -> Iterator[Spot]:
+        return iter(self._spots.values())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._spots
+
+    def __getitem__(self, name: str) -> Spot:
+        return self._spots[name]
+
+    def names(self) -> List[str]:
+        return list(self._names)
+
+    def beach_info(self, names: Optional[Sequence[str]] = None) -> Dict[str, Tuple[float, float, float]]:
+        """スポット名 -> (緯度, 経度, ビーチの向き)（ForecastClient.fetch_spotsなどに渡す形式）"""
+        names = self._names if names is None else names
+        return {name: self._spots[name].as_beach_info() for name in names}
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[Spot, float]]:
+        """
+        指定した地点から radius_km 以内のスポット
+
+        Returns:
+            list: (スポット, 距離km) の近い順
+        """
+        if not self._names:
+            return []
+        lat_span = radius_km / KM_PER_DEGREE
+        # 経度1度の長さは緯度が高いほど短い（極付近は全経度を探す）
+        cos_lat = math.cos(math.radians(min(abs(lat) + lat_span, 90)))
+        lon_span = 180 if cos_lat < 1e-6 else min(radius_km / (KM_PER_DEGREE * cos_lat), 180)
+
+        (lat_lo, lon_lo), (lat_hi, lon_hi) = self._bucket(lat - lat_span, lon - lon_span), self._bucket(lat + lat_span, lon + lon_span)
+        if (lat_hi - lat_lo + 1) * (lon_hi - lon_lo + 1) > len(self._buckets):
+            # 探す格子がスポットのある格子より多いほど広い範囲なら全スポットの距離を計算する
+            candidates = np.arange(len(self._names))
+        else:
+            candidates = np.unique([
+                i
+                for bucket_lat in range(lat_lo, lat_hi + 1)
+                for bucket_lon in range(lon_lo, lon_hi + 1)
+                for i in self._buckets.get((bucket_lat, self._wrap_lon_bucket(bucket_lon)), ())
+            ]).astype(int)
+        if not len(candidates):
+            return []
+
+        distances = haversine_km(lat, lon, self._lats[candidates], self._lons[candidates])
+        inside = distances <= radius_km
+        order = np.argsort(distances[inside], kind='stable')
+        return [
+            (self._spots[self._names[i]], float(d))
+            for i, d in zip(candidates[inside][order], distances[inside][order])
+        ]
+
+    def _wrap_lon_bucket(self, bucket_lon: int) -> int:
+        """日付変更線をまたぐ格子を反対側の格子番号に直す"""
+        buckets_around = round(360 / self.cell_degrees)
+        first = math.floor(-180 / self.cell_degrees)
+        return (bucket_lon - first) % buckets_around + first
+
+    def nearest(self, lat: float, lon: float, count: int = 1) -> List[Tuple[Spot, float]]:
+        """指定した地点に近いスポットcount件（格子を広げながら探す）"""
+        if not self._names:
+            return []
+        radius_km = self.cell_degrees * KM_PER_DEGREE
+        while True:
+            found = self.within(lat, lon, radius_km)
+            if len(found) >= min(count, len(self._names)) or radius_km >= math.pi * EARTH_RADIUS_KM:
+                return found[:count]
+            radius_km *= 2
+
+    def group_by_cell(self, provider: Provider, names: Optional[Sequence[str]] = None) -> Dict[Tuple[float, float], List[str]]:
+        """
+        予報の格子セルごとのスポット名（同じセルのスポットは1回の取得を共有できる）
+
+        Returns:
+            dict: セルの中心 (緯度, 経度) -> スポット名のリスト
+        """
+        names = self._names if names is None else names
+        return group_by_cell({name: (self._spots[name].lat, self._spots[name].lon) for name in names}, provider)
+
+
+@lru_cache(maxsize=1)
+def get_registry() -> SpotRegistry:
+    """既定のスポット（data/spots.csv と SURF_SPOTS_FILE）"""
+    return SpotRegistry.load([DEFAULT_SPOTS_FILE, *USER_SPOTS_FILES])
+
+
+def get_beach_info() -> Dict[str, Tuple[float, float, float]]:
+    """
+    サーフスポット情報
+    (緯度, 経度, ビーチの向き（度）)
+    """
+    return get_registry().beach_info()
@@ -1,12 +1,20 @@
 import streamlit as st
-import requests
 import pandas as pd
 from datetime import datetime, timedelta
-import ephem
-from typing import Dict, List, Tuple
+from typing import Dict, List
 import os
 from dotenv import load_dotenv
 
+from services.alignment import merge_slots
+from services.display import ranking_table, slot_rows
+from services.forecast import ForecastClient
+from services.forecast_cache import ForecastCache
+from services.moon import MoonTable
+from services.ranking import rank_spots, score_day, score_spots, session_windows
+from services.scoring import get_wind_direction_name
+from services.sessions import GOOD_SESSION_SCORE, MIN_SESSION_HOURS, MIN_SESSION_SLOTS, find_windows
+from services.spots import BREAK_TYPES, TIDE_PREFERENCES, get_registry
+
 # Load environment variables
 load_dotenv()
 
@@ -16,43 +24,24 @@ try:
     OPENWEATHER_API_KEY = st.secrets.get('OPENWEATHER_API_KEY', '')
 except:
     OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY', '')
-OPENWEATHER_URL = 'https://api.openweathermap.org/data/2.5/forecast'
 
-# Open-Meteo（完全無料、APIキー不要）
-OPEN_METEO_URL = 'https://marine-api.open-meteo.com/v1/marine'
+@st.cache_resource
+def get_moon_table() -> MoonTable:
+    """月齢表（初回だけephemで計算して保存し、以降はファイルをメモリマップで読み込む）"""
+    return MoonTable()
 
 def get_moon_phase(date: datetime) -> Dict:
     """月齢と月の満ち欠け状態を計算"""
-    observer = ephem.Observer()
-    observer.date = date
-
-    moon = ephem.Moon(observer)
-    moon_phase = moon.phase
-
-    previous_new = ephem.previous_new_moon(date)
-    moon_age = (date - previous_new.datetime()).days
-
-    # 月相の判定
-    if moon_phase < 6.25:
-        phase_name = "新月"
-    elif moon_phase < 43.75:
-        phase_name = "上弦の月"
-    elif moon_phase < 56.25:
-        phase_name = "満月"
-    elif moon_phase < 93.75:
-        phase_name = "下弦の月"
-    else:
-        phase_name = "新月"
+    return get_moon_table().lookup(date.date())
 
-    # 大潮判定（新月・満月前後3日）
-    is_spring_tide = (0 <= moon_age <= 3) or (13 <= moon_age <= 17) or (26 <= moon_age <= 29)
+@st.cache_resource
+def get_forecast_client() -> ForecastClient:
+    """
+    HTTP接続と予報キャッシュを全セッションで使い回すため、クライアントはプロセスで1つだけ作る
 
-    return {
-        'age': moon_age,
-        'phase': phase_name,
-        'illumination': moon_phase,
-        'is_spring_tide': is_spring_tide
-    }
+    予報は格子セル×発表時刻ごとにディスクにも保存するため、再実行や再起動でも取得し直さない。
+    """
+    return ForecastClient(OPENWEATHER_API_KEY, cache=ForecastCache())
 
 def get_weather_data(lat: float, lon: float) -> List[Dict]:
     """OpenWeatherMapから天気・風データを取得"""
@@ -60,31 +49,8 @@ def get_weather_data(lat: float, lon: float) -> List[Dict]:
         st.warning("OpenWeatherMap APIキーが未設定です。デモデータを使用します。")
         return []
 
-    params = {
-        'lat': lat,
-        'lon': lon,
-        'appid': OPENWEATHER_API_KEY,
-        'units': 'metric',
-        'lang': 'ja'
-    }
-
     try:
-        response = requests.get(OPENWEATHER_URL, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        weather_data = []
-        for item in data['list']:
-            weather_data.append({
-                'datetime': datetime.fromtimestamp(item['dt']),
-                'temp': item['main']['temp'],
-                'weather': item['weather'][0]['description'],
-                'wind_speed': item['wind']['speed'],
-                'wind_deg': item['wind'].get('deg', 0),
-                'rain': item.get('rain', {}).get('3h', 0)
-            })
-
-        return weather_data
+        return get_forecast_client().get_weather(lat, lon)
 
     except Exception as e:
         st.error(f"天気データ取得エラー: {e}")
@@ -92,185 +58,13 @@ def get_weather_data(lat: float, lon: float) -> List[Dict]:
 
 def get_wave_data(lat: float, lon: float, start_date: str, end_date: str) -> List[Dict]:
     """Open-Meteoから波情報を取得（完全無料）"""
-    params = {
-        'latitude': lat,
-        'longitude': lon,
-        'start_date': start_date,
-        'end_date': end_date,
-        'hourly': 'wave_height,wave_period,wave_direction',
-        'timezone': 'Asia/Tokyo'
-    }
-
     try:
-        response = requests.get(OPEN_METEO_URL, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        if 'hourly' not in data:
-            return []
-
-        hourly = data['hourly']
-        wave_data = []
-
-        for i in range(len(hourly['time'])):
-            wave_data.append({
-                'datetime': datetime.fromisoformat(hourly['time'][i]),
-                'wave_height': hourly['wave_height'][i] if hourly['wave_height'][i] else 0,
-                'wave_period': hourly['wave_period'][i] if hourly['wave_period'][i] else 0,
-                'wave_direction': hourly['wave_direction'][i] if hourly['wave_direction'][i] else 0
-            })
-
-        return wave_data
+        return get_forecast_client().get_waves(lat, lon, start_date, end_date)
 
     except Exception as e:
         st.error(f"波データ取得エラー: {e}")
         return []
 
-def get_wind_direction_name(deg: float) -> str:
-    """風向を8方位で返す"""
-    directions = ['北', '北東', '東', '南東', '南', '南西', '西', '北西']
-    idx = int((deg + 22.5) / 45) % 8
-    return directions[idx]
-
-def classify_wind_offshore(wind_deg: float, beach_facing: float) -> Tuple[str, int]:
-    """
-    風向がオフショアかオンショアかを判定
-
-    beach_facing: ビーチが向いている方角（度）
-    - 湘南: 180（南向き）
-    - 九十九里: 90（東向き）
-    """
-    # ビーチに対する風の相対角度
-    relative_angle = (wind_deg - beach_facing + 180) % 360
-
-    if 45 <= relative_angle <= 135:
-        return "オフショア", 15
-    elif 135 < relative_angle <= 180 or 0 <= relative_angle < 45:
-        return "サイドオフショア", 10
-    elif 225 <= relative_angle <= 315:
-        return "オンショア", -15
-    else:
-        return "サイドオンショア", -5
-
-def calculate_surf_score(weather: Dict, wave: Dict, moon: Dict,
-                         skill_level: str, beach_facing: float) -> Tuple[int, List[str]]:
-    """サーフィン適性スコアを計算（0-100点）"""
-    score = 50
-    reasons = []
-
-    # スキルレベルに応じた最適波高
-    skill_ranges = {
-        '初心者': (0.5, 1.0),
-        '中級者': (1.0, 2.0),
-        '上級者': (2.0, 3.5)
-    }
-
-    # 【波の高さ】（±20点）
-    wave_height = wave['wave_height']
-    min_h, max_h = skill_ranges.get(skill_level, (1.0, 2.0))
-
-    if min_h <= wave_height <= max_h:
-        score += 20
-        reasons.append(f"✓ 最適な波高 ({wave_height:.1f}m - {skill_level}向け)")
-    elif wave_height < min_h:
-        if wave_height < min_h * 0.5:
-            score -= 10
-            reasons.append(f"✗ 波が小さすぎる ({wave_height:.1f}m)")
-        else:
-            score += 5
-            reasons.append(f"△ やや小さい波 ({wave_height:.1f}m)")
-    else:
-        if wave_height > 3.5:
-            score -= 20
-            reasons.append(f"⚠️ 危険な波高 ({wave_height:.1f}m)")
-        elif wave_height > max_h:
-            score -= 10
-            reasons.append(f"△ 波が高め ({wave_height:.1f}m)")
-        else:
-            score += 10
-            reasons.append(f"○ 良好な波高 ({wave_height:.1f}m)")
-
-    # 【波の周期】（±20点）
-    wave_period = wave['wave_period']
-    if 8 <= wave_period <= 12:
-        score += 20
-        reasons.append(f"✓ 理想的な周期 ({wave_period:.0f}秒)")
-    elif 6 <= wave_period < 8 or 12 < wave_period <= 14:
-        score += 10
-        reasons.append(f"○ 良好な周期 ({wave_period:.0f}秒)")
-    elif 14 < wave_period <= 16:
-        score += 5
-        reasons.append(f"△ 長周期 ({wave_period:.0f}秒 - 上級者向け)")
-    else:
-        score -= 10
-        reasons.append(f"✗ 不適切な周期 ({wave_period:.0f}秒)")
-
-    # 【風向】（±15点）
-    wind_type, wind_score = classify_wind_offshore(weather['wind_deg'], beach_facing)
-    score += wind_score
-    wind_dir_name = get_wind_direction_name(weather['wind_deg'])
-
-    if wind_score > 0:
-        reasons.append(f"✓ {wind_type}（{wind_dir_name}風）")
-    else:
-        reasons.append(f"✗ {wind_type}（{wind_dir_name}風）")
-
-    # 【風速】（±10点）
-    wind_speed = weather['wind_speed']
-    if wind_speed <= 3:
-        score += 10
-        reasons.append(f"✓ 穏やかな風 ({wind_speed:.1f}m/s)")
-    elif wind_speed <= 5:
-        score += 8
-        reasons.append(f"✓ 軽い風 ({wind_speed:.1f}m/s)")
-    elif wind_speed <= 8:
-        score += 3
-        reasons.append(f"○ やや風あり ({wind_speed:.1f}m/s)")
-    elif wind_speed <= 10:
-        score -= 5
-        reasons.append(f"△ 強めの風 ({wind_speed:.1f}m/s)")
-    else:
-        score -= 10
-        reasons.append(f"✗ 強風 ({wind_speed:.1f}m/s)")
-
-    # 【天気】（±10点）
-    if weather['rain'] == 0:
-        score += 5
-        reasons.append("✓ 雨なし")
-    elif weather['rain'] < 2:
-        reasons.append(f"△ 小雨 ({weather['rain']:.1f}mm)")
-    else:
-        score -= 5
-        reasons.append(f"✗ 雨 ({weather['rain']:.1f}mm)")
-
-    # 【月齢ボーナス】（±5点）
-    if moon['is_spring_tide']:
-        score += 5
-        reasons.append(f"✓ 大潮期間（{moon['phase']}）- うねり入りやすい")
-    else:
-        reasons.append(f"○ 小潮期間（{moon['phase']}）")
-
-    # スコアを0-100に制限
-    score = max(0, min(100, score))
-
-    return score, reasons
-
-def get_beach_info() -> Dict[str, Tuple[float, float, float]]:
-    """
-    サーフスポット情報
-    (緯度, 経度, ビーチの向き（度）)
-    """
-    return {
-        '湘南（鵠沼）': (35.3333, 139.4833, 180),  # 南向き
-        '千葉（九十九里）': (35.5500, 140.4000, 90),  # 東向き
-        '千葉（一宮）': (35.3667, 140.4000, 90),  # 東向き
-        '静岡（御前崎）': (34.6000, 138.2167, 180),  # 南向き
-        '宮崎（木崎浜）': (31.9833, 131.4667, 135),  # 南東向き
-        '高知（生見）': (33.5667, 134.2833, 135),  # 南東向き
-        '新潟（角田浜）': (37.7667, 138.8667, 270),  # 西向き
-        '徳島（小松海岸）': (33.9667, 134.5833, 135)  # 南東向き
-    }
-
 # ========== Streamlit UI ==========
 st.set_page_config(page_title="サーフィン情報アドバイザー", page_icon="🏄", layout="wide")
 
@@ -280,8 +74,20 @@ st.markdown('**日付と場所を入力すると、風・波・月齢から最
 # サイドバー
 st.sidebar.header('📋 条件を入力')
 
-beaches = get_beach_info()
-location = st.sidebar.selectbox('📍 サーフスポット', list(beaches.keys()))
+registry = get_registry()
+beaches = registry.beach_info()
+mode = st.sidebar.radio('🗺️ 表示モード', ['スポット詳細', '全スポットランキング'], horizontal=True)
+if mode == 'スポット詳細':
+    location = st.sidebar.selectbox('📍 サーフスポット', registry.names())
+else:
+    ranking_period = st.sidebar.radio('📆 期間', ['選択した日', '7日間'], horizontal=True)
+    # スポットが多い場合は基準スポットの周辺に絞る（空間インデックスで検索）
+    area_center = st.sidebar.selectbox('🧭 エリア', ['全スポット'] + registry.names(),
+                                       format_func=lambda name: name if name == '全スポット' else f'{name}の周辺')
+    if area_center != '全スポット':
+        area_radius = st.sidebar.slider('📏 範囲（km）', min_value=10, max_value=500, value=100, step=10)
+        center = registry[area_center]
+        beaches = registry.beach_info([spot.name for spot, _ in registry.within(center.lat, center.lon, area_radius)])
 
 skill_level = st.sidebar.selectbox('🏄 スキルレベル', ['初心者', '中級者', '上級者'])
 
@@ -292,10 +98,32 @@ target_date = st.sidebar.date_input(
     max_value=datetime.now() + timedelta(days=7)
 )
 
-if st.sidebar.button('🔍 分析開始', type='primary'):
-    lat, lon, beach_facing = beaches[location]
+resolution = st.sidebar.radio('⏱️ 時間の刻み', ['3時間ごと', '1時間ごと'], horizontal=True,
+                              help='1時間ごとの場合は波データの時刻に合わせて風・気温を補間します')
+hourly = resolution == '1時間ごと'
+if hourly:
+    interpolate_waves = False
+else:
+    interpolate_waves = st.sidebar.checkbox('🌊 波データを天気の時刻に合わせて補間', value=False,
+                                            help='オフの場合は最も近い時刻の波データを使用します')
+
+session_score = st.sidebar.slider('✨ セッション向きとするスコア', min_value=50, max_value=90, value=GOOD_SESSION_SCORE, step=5)
+# 良い時間帯がMIN_SESSION_SLOTS個以上続くことも条件のため、1時間は選べない
+SESSION_HOURS_OPTIONS = [2, 3, 4, 6]
+session_hours = st.sidebar.selectbox('⌛ 続く時間（以上）', SESSION_HOURS_OPTIONS,
+                                     index=SESSION_HOURS_OPTIONS.index(MIN_SESSION_HOURS),
+                                     format_func=lambda hours: f'{hours}時間')
+
+if mode == 'スポット詳細' and st.sidebar.button('🔍 分析開始', type='primary'):
+    spot = registry[location]
+    lat, lon, beach_facing = spot.as_beach_info()
 
     st.header(f'📊 {location}の予報 ({target_date.strftime("%Y年%m月%d日")})')
+    st.caption(
+        f'{BREAK_TYPES[spot.break_type]} ・ 向き{get_wind_direction_name(spot.facing)} ・ '
+        f'ベストうねり{get_wind_direction_name(spot.optimal_swell_direction)} ・ {TIDE_PREFERENCES[spot.tide_preference]}'
+        + (f' ・ {spot.description}' if spot.description else '')
+    )
 
     # 月齢情報
     target_datetime = datetime.combine(target_date, datetime.min.time())
@@ -321,37 +149,16 @@ if st.sidebar.button('🔍 分析開始', type='primary'):
         wave_data = get_wave_data(lat, lon, start_date, end_date)
 
     if weather_data and wave_data:
-        # データをマージ
-        results = []
-
-        for weather in weather_data:
-            if weather['datetime'].date() != target_date:
-                continue
-
-            # 最も近い時刻の波データを探す
-            closest_wave = min(wave_data,
-                             key=lambda w: abs((w['datetime'] - weather['datetime']).total_seconds()))
-
-            score, reasons = calculate_surf_score(weather, closest_wave, moon_info,
-                                                 skill_level, beach_facing)
-
-            results.append({
-                '時刻': weather['datetime'].strftime('%H:%M'),
-                'datetime': weather['datetime'],
-                'スコア': score,
-                '波高': f"{closest_wave['wave_height']:.1f}m",
-                '周期': f"{closest_wave['wave_period']:.0f}秒",
-                '風速': f"{weather['wind_speed']:.1f}m/s",
-                '風向': get_wind_direction_name(weather['wind_deg']),
-                '天気': weather['weather'],
-                '気温': f"{weather['temp']:.1f}°C",
-                '評価理由': reasons
-            })
-
-        if results:
-            # スコアでソート
-            results_sorted = sorted(results, key=lambda x: x['スコア'], reverse=True)
+        # データをマージ（1時間ごとの場合は波データの時刻に風・気温を補間）
+        day_slots = merge_slots(weather_data, wave_data, [target_date], hourly=hourly, interpolate=interpolate_waves)
+
+        # その日の全時間帯をまとめてスコア計算
+        scored = score_day(day_slots, spot, moon_info, skill_level)
+
+        # スコアの高い順
+        results_sorted = slot_rows(day_slots, scored)
 
+        if results_sorted:
             # ベストタイム
             best = results_sorted[0]
 
@@ -375,15 +182,27 @@ if st.sidebar.button('🔍 分析開始', type='primary'):
                 st.metric('周期', best['周期'])
 
             st.markdown("**📝 評価理由:**")
-            for reason in best['評価理由']:
+            for reason in scored.reasons(best['index']):
                 st.markdown(f"- {reason}")
 
+            # スコアの高い時間帯が続く区間
+            windows = find_windows(day_slots['datetime'], scored.score, session_score, session_hours,
+                                   timedelta(hours=1 if hourly else 3))
+            st.markdown(f"**🕐 セッション向きの時間帯（{session_score}点以上が{session_hours}時間以上・"
+                        f"{MIN_SESSION_SLOTS}時間帯以上続く）:**")
+            if windows:
+                for window in windows:
+                    st.markdown(f"- {window.start.strftime('%H:%M')}〜{window.end.strftime('%H:%M')}"
+                                f"（{window.hours:g}時間、平均{window.mean_score:.0f}点・最高{window.best_score}点）")
+            else:
+                st.markdown("- 該当する時間帯はありません")
+
             st.divider()
 
             # 全時間帯の詳細
             st.subheader('⏰ 全時間帯の詳細')
 
-            df = pd.DataFrame([{k: v for k, v in r.items() if k != '評価理由' and k != 'datetime'}
+            df = pd.DataFrame([{k: v for k, v in r.items() if k not in ('index', 'datetime')}
                               for r in results_sorted])
 
             # スコア別に色付け
@@ -402,11 +221,11 @@ if st.sidebar.button('🔍 分析開始', type='primary'):
             st.dataframe(df.style.apply(highlight_score, axis=1),
                         use_container_width=True, height=400)
 
-            # 詳細を展開表示
+            # 詳細を展開表示（評価理由は表示するときに作る）
             with st.expander('📋 各時間帯の詳細な評価理由'):
                 for result in results_sorted:
                     st.markdown(f"### {result['時刻']} (スコア: {result['スコア']}/100)")
-                    for reason in result['評価理由']:
+                    for reason in scored.reasons(result['index']):
                         st.markdown(f"- {reason}")
                     st.divider()
         else:
@@ -414,6 +233,49 @@ if st.sidebar.button('🔍 分析開始', type='primary'):
     else:
         st.error('データを取得できませんでした')
 
+if mode == '全スポットランキング' and st.sidebar.button('🏆 ランキング作成', type='primary'):
+    days = 1 if ranking_period == '選択した日' else 7
+    dates = [target_date + timedelta(days=i) for i in range(days)]
+    period_label = target_date.strftime("%Y年%m月%d日") + ('' if days == 1 else f'から{days}日間')
+    st.header(f'🏆 全スポットランキング ({period_label})')
+
+    # 対象日ごとの月齢情報
+    moon_by_date = {d: get_moon_phase(datetime.combine(d, datetime.min.time())) for d in dates}
+
+    with st.spinner(f'{len(beaches)}スポットのデータを同時に取得中...'):
+        start_date = dates[0].strftime('%Y-%m-%d')
+        end_date = (dates[-1] + timedelta(days=1)).strftime('%Y-%m-%d')
+        fetched = get_forecast_client().fetch_spots(beaches, start_date, end_date)
+
+    if not OPENWEATHER_API_KEY:
+        st.warning("OpenWeatherMap APIキーが未設定のため、ランキングを作成できません。")
+    for name, data in fetched.items():
+        if data['error']:
+            st.error(f"{name}: {data['error']}")
+
+    # 全スポット・全時間帯を1回でスコア計算
+    spot_scores = score_spots({name: registry[name] for name in beaches}, fetched, dates, moon_by_date, skill_level,
+                              interpolate=interpolate_waves, hourly=hourly)
+    ranking = rank_spots(spot_scores)
+
+    if ranking.empty:
+        st.warning('選択した期間のデータがありません')
+    else:
+        top = ranking.iloc[0]
+        st.success(f"🥇 **おすすめスポット: {top['spot']}**（{pd.Timestamp(top['best_time']).strftime('%m/%d %H:%M')}、{top['best_score']}/100）")
+
+        windows_by_spot = session_windows(spot_scores, session_score, session_hours)
+        df_ranking = ranking_table(spot_scores, ranking, windows_by_spot)
+        st.dataframe(df_ranking, use_container_width=True, hide_index=True)
+
+        # 評価理由は表示するスポットのベストタイムについてだけ作る
+        with st.expander('📋 各スポットのベストタイムの評価理由'):
+            for _, row in ranking.iterrows():
+                st.markdown(f"### {row['spot']} (スコア: {row['best_score']}/100)")
+                for reason in spot_scores.reasons(int(row['row'])):
+                    st.markdown(f"- {reason}")
+                st.divider()
+
 # サイドバーにヘルプ
 with st.sidebar.expander('ℹ️ 使い方'):
     st.markdown("""
@@ -457,4 +319,12 @@ with st.sidebar.expander('🔧 スコアリング基準'):
 
     **月齢** (+5点)
     - 大潮時にボーナス
+
+    **うねりの向き** (+10〜-15点)
+    - スポットに最適な向き: +10
+    - 陸側から: -15
+
+    **うねりの質** (±5点)
+    - 長周期のうねりが主体: +5
+    - 風波が主体: -5
     """)
@@ -0,0 +1,70 @@
+"""天気と波の時刻合わせ（最も近い時刻・角度の補間・1時間ごとの時間帯）"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from services.alignment import hourly_slots, interp_degrees, nearest_indices
+
+
+def test_nearest_indices_prefers_earlier_on_ties():
+    times = np.array([0.0, 10.0, 20.0])
+    targets = np.array([5.0, 15.0, 4.9, 5.1])
+    assert nearest_indices(targets, times).tolist() == [0, 1, 0, 1]
+
+
+def test_nearest_indices_clamps_outside_range():
+    times = np.array([0.0, 10.0, 20.0])
+    assert nearest_indices(np.array([-100.0, 0.0, 20.0, 100.0]), times).tolist() == [0, 0, 2, 2]
+
+
+def test_interp_degrees_wraps_through_north():
+    xp = np.array([0.0, 10.0])
+    # 350°と10°の中間は180°ではなく0°
+    assert interp_degrees(np.array([5.0]), xp, np.array([350.0, 10.0]))[0] == pytest.approx(0.0)
+    # 単位円上で補間するため途中の角度は厳密な線形にはならないが、近い値になる
+    assert interp_degrees(np.array([2.5]), xp, np.array([350.0, 10.0]))[0] == pytest.approx(355.0, abs=0.1)
+    assert interp_degrees(np.array([2.5]), xp, np.array([10.0, 350.0]))[0] == pytest.approx(5.0, abs=0.1)
+
+
+def test_interp_degrees_stays_in_range():
+    xp = np.array([0.0, 1.0])
+    values = interp_degrees(np.linspace(0, 1, 11), xp, np.array([359.0, 1.0]))
+    assert np.all((values >= 0) & (values < 360))
+
+
+def weather(hour, wind_speed, wind_deg, rain=0.0, label="晴天", temp=20.0):
+    return {
+        'datetime': datetime(2025, 1, 1) + timedelta(hours=hour),
+        'wind_speed': wind_speed, 'wind_deg': wind_deg, 'rain': rain, 'weather': label, 'temp': temp,
+    }
+
+
+def wave(hour, height=1.0):
+    return {
+        'datetime': datetime(2025, 1, 1) + timedelta(hours=hour),
+        'wave_height': height, 'wave_period': 8.0, 'wave_direction': 180.0,
+        'swell_wave_height': 0.8, 'swell_wave_period': 10.0,
+    }
+
+
+def test_hourly_slots_interpolates_weather_onto_wave_times():
+    weather_data = [weather(3, 6.0, 350.0, rain=1.0, label="曇り"), weather(0, 3.0, 10.0, label="晴天")]
+    wave_data = [wave(hour) for hour in range(-1, 5)]
+    slots = hourly_slots(weather_data, wave_data)
+
+    # 天気の最初と最後の時刻の間の波の時刻だけ
+    assert slots['datetime'] == [datetime(2025, 1, 1) + timedelta(hours=h) for h in range(4)]
+    np.testing.assert_allclose(slots['wind_speed'], [3.0, 4.0, 5.0, 6.0])
+    np.testing.assert_allclose(slots['wind_deg'], [10.0, 3.33, 356.67, 350.0], atol=0.1)
+    # 降水量・天気は最も近い時刻の値（ちょうど中間はない）
+    np.testing.assert_allclose(slots['rain'], [0.0, 0.0, 1.0, 1.0])
+    assert slots['weather'] == ["晴天", "晴天", "曇り", "曇り"]
+    np.testing.assert_allclose(slots['wave_height'], [1.0] * 4)
+
+
+def test_hourly_slots_without_weather_is_empty():
+    slots = hourly_slots([], [wave(0)])
+    assert slots['datetime'] == []
+    assert slots['weather'] == []
+    assert len(slots['wind_speed']) == 0 and len(slots['wave_height']) == 0
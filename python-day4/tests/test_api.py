@@ -0,0 +1,89 @@
+"""スコアのJSON API（ETagによる304と、結果がないときのステータス）"""
+import json
+import threading
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+import pytest
+
+from services.api import ScoreAPIServer
+from services.prescoring import ScoreStore
+from services.spots import Spot, SpotRegistry
+
+ENTRY = {'spot': '鵠沼', 'date': '2025-01-01', 'skill_level': '中級者', 'best': {'score': 80}, 'sessions': [], 'slots': []}
+
+
+@pytest.fixture
+def server():
+    store = ScoreStore(None)
+    registry = SpotRegistry([Spot("鵠沼", 35.3333, 139.4833, 180)])
+    server = ScoreAPIServer(store, registry, ("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, path, headers=None, **query):
+    url = f"{server.base_url}{path}" + (f"?{urlencode(query)}" if query else "")
+    try:
+        with urlopen(Request(url, headers=headers or {}), timeout=5) as response:
+            return response.status, response.headers, response.read()
+    except HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def scores(server, headers=None, **query):
+    return get(server, "/api/scores", headers, **{'spot': '鵠沼', 'date': '2025-01-01', 'skill': '中級者', **query})
+
+
+def test_scores_before_first_run_is_503(server):
+    status, _, _ = scores(server)
+    assert status == 503
+
+
+def test_etag_is_the_run_of_the_payload(server):
+    server.store.replace({('鵠沼', '2025-01-01', '中級者'): ENTRY}, 100)
+    status, headers, body = scores(server)
+    assert status == 200
+    assert headers['ETag'] == '"100"'
+    assert json.loads(body)['run'] == 100
+
+
+def test_matching_etag_is_304(server):
+    server.store.replace({('鵠沼', '2025-01-01', '中級者'): ENTRY}, 100)
+    status, headers, body = scores(server, {'If-None-Match': '"100"'})
+    assert status == 304 and body == b''
+    assert headers['ETag'] == '"100"'
+
+
+def test_new_run_changes_etag(server):
+    server.store.replace({('鵠沼', '2025-01-01', '中級者'): ENTRY}, 100)
+    server.store.replace({('鵠沼', '2025-01-01', '中級者'): ENTRY}, 200)
+    status, headers, _ = scores(server, {'If-None-Match': '"100"'})
+    assert status == 200 and headers['ETag'] == '"200"'
+
+
+def test_kept_result_keeps_its_etag(server):
+    server.store.replace({('鵠沼', '2025-01-01', '中級者'): ENTRY}, 100)
+    server.store.replace({}, 200, errors={'鵠沼': '天気データ取得エラー'})
+    status, headers, _ = scores(server, {'If-None-Match': '"100"'})
+    assert status == 304 and headers['ETag'] == '"100"'
+
+
+@pytest.mark.parametrize("query, expected", [
+    ({'date': '2025-01-02'}, 404),
+    ({'spot': '不明'}, 404),
+    ({'skill': 'プロ'}, 400),
+])
+def test_errors(server, query, expected):
+    server.store.replace({('鵠沼', '2025-01-01', '中級者'): ENTRY}, 100)
+    assert scores(server, **query)[0] == expected
+
+
+def test_health(server):
+    server.store.replace({('鵠沼', '2025-01-01', '中級者'): ENTRY}, 100)
+    status, _, body = get(server, "/api/health")
+    assert status == 200 and json.loads(body)['entries'] == 1
@@ -0,0 +1,106 @@
+"""バックテストの集計（合算・パーセンタイル）とアーカイブの読み込み"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.backtest import FACTORS, MAX_SCORE, BacktestStats, load_archive, run_backtest
+from services.scoring import score_slots
+from services.spots import Spot
+
+SKILLS = ('初心者', '中級者')
+
+
+def stats_with(scores_by_skill, **kwargs):
+    """スキルレベルごとの点数のリストからヒストグラムを作る"""
+    histogram = np.zeros((len(SKILLS), MAX_SCORE + 1), dtype=np.int64)
+    for row, scores in enumerate(scores_by_skill):
+        np.add.at(histogram[row], scores, 1)
+    return BacktestStats(SKILLS, hours=len(scores_by_skill[0]), histogram=histogram, **kwargs)
+
+
+def test_percentiles_from_histogram():
+    stats = stats_with([[20] * 10 + [80] * 10, list(range(100))])
+    p10, p50, p90 = stats.percentiles([10, 50, 90]).T
+    assert p10.tolist() == [20, 9]
+    assert p50.tolist() == [20, 49]
+    assert p90.tolist() == [80, 89]
+
+
+def test_percentiles_of_empty_stats_are_zero():
+    assert BacktestStats(SKILLS).percentiles([50]).tolist() == [[0], [0]]
+
+
+def test_merge_adds_counts_and_widens_period():
+    first = stats_with([[50, 60], [70, 70]], start=pd.Timestamp("2020-01-01"), end=pd.Timestamp("2020-12-31"), dropped=3)
+    second = stats_with([[90, 90], [10, 20]], start=pd.Timestamp("2019-06-01"), end=pd.Timestamp("2020-06-30"), dropped=1)
+    first.factor_sum[:] = 1.0
+    second.factor_sum[:] = 2.0
+
+    merged = first.merge(second)
+    assert merged.hours == 4 and merged.dropped == 4
+    assert (merged.start, merged.end) == (pd.Timestamp("2019-06-01"), pd.Timestamp("2020-12-31"))
+    np.testing.assert_array_equal(merged.histogram, first.histogram + second.histogram)
+    np.testing.assert_array_equal(merged.factor_sum, np.full((len(SKILLS), len(FACTORS)), 3.0))
+    # 元の集計は変わらない
+    assert first.hours == 2
+
+
+def test_merge_with_empty_keeps_period():
+    stats = stats_with([[50], [50]], start=pd.Timestamp("2020-01-01"), end=pd.Timestamp("2020-01-02"))
+    merged = BacktestStats(SKILLS).merge(stats)
+    assert (merged.start, merged.end) == (stats.start, stats.end)
+
+
+def test_merge_rejects_different_skill_levels():
+    with pytest.raises(ValueError):
+        BacktestStats(SKILLS).merge(BacktestStats(('上級者',)))
+
+
+def test_add_counts_every_skill_and_hour():
+    stats = BacktestStats(SKILLS)
+    result = score_slots(
+        wave_height=np.array([0.8, 1.5, 3.0]), wave_period=10, wind_speed=2, wind_deg=0, rain=0,
+        beach_facing=180, is_spring_tide=False, moon_phase='', skill_level=np.array(SKILLS)[:, None]
+    )
+    stats.add(result)
+    assert stats.hours == 3
+    assert stats.histogram.sum(axis=1).tolist() == [3, 3]
+    np.testing.assert_array_equal(
+        stats.factor_sum[:, FACTORS.index('波の高さ')], result.contributions()['波の高さ'].sum(axis=1)
+    )
+
+
+def test_load_archive_sums_rain_over_three_hours(tmp_path):
+    path = tmp_path / "2025.csv"
+    path.write_text(
+        "latitude,longitude\n35.3,139.4\n\n"
+        "time,wave_height (m),wave_period (s),wind_speed_10m (km/h),wind_direction_10m (°),rain (mm)\n"
+        "2025-01-01T00:00,1,8,36,180,1\n"
+        "2025-01-01T01:00,1,8,36,180,2\n"
+        "2025-01-01T05:00,1,8,36,180,0\n"
+        "2025-01-01T06:00,1,8,36,180,4\n",
+        encoding="utf-8"
+    )
+    frame = load_archive([str(path)])
+    # 欠けた時刻をまたいで3時間より前の雨は含めない
+    assert frame['rain'].tolist() == [1.0, 3.0, 0.0, 4.0]
+    assert frame['wind_speed'].tolist() == pytest.approx([10.0] * 4)
+
+
+def test_moon_table_covers_only_the_archive_years(tmp_path):
+    archive = tmp_path / "archive" / "鵠沼"
+    archive.mkdir(parents=True)
+    rows = "".join(f"2023-12-31T{h:02d}:00,1.5,10,10,0,0\n" for h in range(24))
+    rows += "".join(f"2024-01-01T{h:02d}:00,1.5,10,10,0,0\n" for h in range(24))
+    (archive / "2024.csv").write_text(
+        "time,wave_height (m),wave_period (s),wind_speed_10m (km/h),wind_direction_10m (°),rain (mm)\n" + rows,
+        encoding="utf-8"
+    )
+    table_dir = tmp_path / "moon"
+
+    [result] = run_backtest(
+        [Spot("鵠沼", 35.3333, 139.4833, 180)], str(tmp_path / "archive"), processes=1, table_dir=str(table_dir)
+    )
+    assert result.error is None
+    assert result.stats.hours == 48
+    assert [path.name for path in table_dir.iterdir()] == ["moon_20230101_20241231.npy"]
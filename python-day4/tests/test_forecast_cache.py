@@ -0,0 +1,72 @@
+"""予報データのキャッシュ（期限切れ・同時取得の集約・古いファイルの削除）"""
+import os
+import threading
+import time
+
+from services.forecast_cache import OPENWEATHER, ForecastCache
+
+
+def key(run=0):
+    return ForecastCache.make_key(OPENWEATHER, (35.3, 139.5), run)
+
+
+def test_entries_expire(tmp_path):
+    cache = ForecastCache(str(tmp_path))
+    cache.set(key(), {"list": [1]}, time.time() + 60)
+    cache.set(key(1), {"list": [2]}, time.time() - 1)
+    assert cache.get(key()) == {"list": [1]}
+    assert cache.get(key(1)) is None
+
+
+def test_entries_are_read_back_from_disk(tmp_path):
+    ForecastCache(str(tmp_path)).set(key(), {"list": [1]}, time.time() + 60)
+    ForecastCache(str(tmp_path)).set(key(1), {"list": [2]}, time.time() - 1)
+    assert ForecastCache(str(tmp_path)).get(key()) == {"list": [1]}
+    assert ForecastCache(str(tmp_path)).get(key(1)) is None
+
+
+def test_expired_entry_is_fetched_again():
+    cache = ForecastCache(None)
+    cache.set(key(), {"list": [1]}, time.time() - 1)
+    assert cache.get_or_fetch(key(), time.time() + 60, lambda: {"list": [2]}) == {"list": [2]}
+
+
+def test_concurrent_misses_are_fetched_once():
+    cache = ForecastCache(None)
+    calls = []
+    started = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)  # 他のスレッドが同じキーを待つ間に取得を終えない
+        return {"list": [1]}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_fetch(key(), time.time() + 60, fetch)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert started.is_set()
+    assert len(calls) == 1
+    assert results == [{"list": [1]}] * 8
+
+
+def test_prune_disk_removes_only_old_cache_files(tmp_path):
+    cache = ForecastCache(str(tmp_path))
+    cache.set(key(), {"list": [1]}, time.time() + 60)
+    old_entry = tmp_path / f"{key(1)}.json"
+    old_tmp = tmp_path / f"{key(2)}.abc123.tmp"
+    foreign = tmp_path / "moon_20200101_20401231.npy"
+    for path in (old_entry, old_tmp, foreign):
+        path.write_text("{}")
+        os.utime(path, (time.time() - 2 * 24 * 60 * 60,) * 2)
+
+    cache._prune_disk()
+
+    assert sorted(os.listdir(tmp_path)) == sorted([f"{key()}.json", foreign.name])
@@ -0,0 +1,49 @@
+"""月齢表（月相の名前・大潮の判定・保存したファイル）"""
+from datetime import date
+
+import pytest
+
+from services.moon import SYNODIC_MONTH, MoonTable, phase_names
+
+
+@pytest.fixture(scope="module")
+def table():
+    return MoonTable(None, start=date(2024, 1, 1), end=date(2024, 3, 31))
+
+
+@pytest.mark.parametrize("day, phase", [
+    (date(2024, 1, 26), "満月"),  # 2024-01-25 17:54 UTC
+    (date(2024, 2, 10), "新月"),  # 2024-02-09 22:59 UTC
+    (date(2024, 2, 17), "上弦の月"),  # 2024-02-16 15:01 UTC
+    (date(2024, 3, 4), "下弦の月"),  # 2024-03-03 15:23 UTC
+])
+def test_phase_on_known_dates(table, day, phase):
+    info = table.lookup(day)
+    assert info["phase"] == phase
+    assert table.lookup_many([day])["phase"][0] == phase
+
+
+def test_full_moon_is_spring_tide(table):
+    info = table.lookup(date(2024, 1, 26))
+    assert info["illumination"] > 99
+    assert info["is_spring_tide"]
+
+
+def test_phase_names_wrap_around_the_cycle():
+    ages = [0, 1, 7, 14.8, 22, 28.5, SYNODIC_MONTH + 14.8]
+    assert phase_names(ages).tolist() == ["新月", "新月", "上弦の月", "満月", "下弦の月", "新月", "満月"]
+
+
+def test_dates_outside_the_table_are_computed(table):
+    assert table.lookup(date(2024, 4, 24))["phase"] == "満月"  # 2024-04-23 23:49 UTC
+
+
+def test_saved_table_is_readable_by_others(tmp_path):
+    MoonTable(str(tmp_path), start=date(2024, 1, 1), end=date(2024, 1, 31))
+    [path] = tmp_path.iterdir()
+    assert path.name == "moon_20240101_20240131.npy"
+    assert path.stat().st_mode & 0o777 == 0o644
+
+    # 保存した表を読み込んでも同じ値になる
+    loaded = MoonTable(str(tmp_path), start=date(2024, 1, 1), end=date(2024, 1, 31))
+    assert loaded.lookup(date(2024, 1, 26))["phase"] == "満月"
@@ -0,0 +1,129 @@
+"""事前計算の結果の保存・読み込みと、予報を取得できなかったときの扱い"""
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from services.moon import MoonTable
+from services.prescoring import NO_FORECAST_ERROR, PrescoreWorker, ScoreStore
+from services.spots import Spot
+
+SPOTS = {
+    "鵠沼": Spot("鵠沼", 35.3333, 139.4833, 180),
+    "一宮": Spot("一宮", 35.3667, 140.4000, 90),
+}
+
+
+def entry(spot, day="2025-01-01", skill_level="中級者", score=80):
+    return {'spot': spot, 'date': day, 'skill_level': skill_level, 'best': {'score': score}, 'sessions': [], 'slots': []}
+
+
+def entries(*spots, **kwargs):
+    return {(spot, "2025-01-01", "中級者"): entry(spot, **kwargs) for spot in spots}
+
+
+def payload(store, spot):
+    run, body = store.get(spot, "2025-01-01", "中級者")
+    return run, json.loads(body)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "scores" / "scores.json")
+
+
+def test_replace_and_load_round_trip(path):
+    store = ScoreStore(path)
+    store.replace(entries("鵠沼", "一宮"), 100)
+
+    loaded = ScoreStore(path)
+    assert loaded.load()
+    assert loaded.run == 100
+    run, body = payload(loaded, "鵠沼")
+    assert run == 100 and body['run'] == 100 and body['best'] == {'score': 80}
+    assert loaded.get("鵠沼", "2025-01-02", "中級者") is None
+
+
+def test_load_without_file(path):
+    assert not ScoreStore(path).load()
+
+
+def test_failed_spot_keeps_previous_result_and_run(path):
+    store = ScoreStore(path)
+    store.replace(entries("鵠沼", "一宮", score=50), 100)
+    store.replace(entries("鵠沼", score=90), 200, errors={"一宮": "天気データ取得エラー"})
+
+    assert payload(store, "鵠沼")[0] == 200 and payload(store, "鵠沼")[1]['best'] == {'score': 90}
+    assert payload(store, "一宮")[0] == 100 and payload(store, "一宮")[1]['best'] == {'score': 50}
+    assert store.status()['errors'] == {"一宮": "天気データ取得エラー"}
+
+    # 保存し直しても、残した結果は前回の発表時刻のまま
+    loaded = ScoreStore(path)
+    loaded.load()
+    assert payload(loaded, "一宮") == payload(store, "一宮")
+    assert payload(loaded, "鵠沼") == payload(store, "鵠沼")
+
+
+class FakeClient:
+    """fetch_spotsの結果を決めて返すクライアント"""
+
+    def __init__(self, weather_available=True, error=None):
+        self.weather_available = weather_available
+        self.error = error
+
+    def fetch_spots(self, spots, start_date, end_date):
+        start = datetime.fromisoformat(start_date)
+        end = datetime.fromisoformat(end_date)
+        hours = int((end - start).total_seconds() // 3600)
+        weather = [
+            {'datetime': start + timedelta(hours=h), 'temp': 15.0, 'weather': '晴天', 'wind_speed': 2.0, 'wind_deg': 0, 'rain': 0}
+            for h in range(0, hours, 3)
+        ] if self.weather_available else []
+        waves = [
+            {'datetime': start + timedelta(hours=h), 'wave_height': 1.5, 'wave_period': 10.0, 'wave_direction': 180.0,
+             'swell_wave_height': 1.2, 'swell_wave_period': 11.0}
+            for h in range(hours)
+        ]
+        return {name: {'weather': weather, 'waves': waves, 'error': self.error} for name in spots}
+
+
+@pytest.fixture(scope="module")
+def moon_table():
+    today = date.today()
+    return MoonTable(None, start=today - timedelta(days=1), end=today + timedelta(days=3))
+
+
+def worker(client, store, moon_table):
+    return PrescoreWorker(client, SPOTS, store, moon_table, days=2)
+
+
+def test_refresh_stores_all_spots(moon_table):
+    store = ScoreStore(None)
+    worker(FakeClient(), store, moon_table).refresh()
+    assert store.run is not None
+    assert store.status()['entries'] == len(SPOTS) * 2 * 3  # スポット × 日数 × スキルレベル
+
+
+def test_empty_forecast_keeps_previous_results(moon_table):
+    store = ScoreStore(None)
+    worker(FakeClient(), store, moon_table).refresh()
+    before = store.status()
+
+    # APIキーがないと天気は例外にならず空になる
+    with pytest.raises(RuntimeError, match="全スポット"):
+        worker(FakeClient(weather_available=False), store, moon_table).refresh()
+
+    after = store.status()
+    assert after['entries'] == before['entries'] and after['run'] == before['run']
+    assert after['errors'] == {name: NO_FORECAST_ERROR for name in SPOTS}
+
+
+def test_all_spots_failing_keeps_previous_results(moon_table):
+    store = ScoreStore(None)
+    worker(FakeClient(), store, moon_table).refresh()
+
+    with pytest.raises(RuntimeError):
+        worker(FakeClient(weather_available=False, error="波データ取得エラー: 503"), store, moon_table).refresh()
+
+    assert store.status()['entries'] == len(SPOTS) * 2 * 3
+    assert set(store.status()['errors']) == set(SPOTS)
@@ -0,0 +1,107 @@
+"""まとめて計算するスコアが、1件ずつ計算していたときのスコアと一致するか"""
+import itertools
+
+import numpy as np
+
+from services.scoring import score_slots
+
+
+def baseline_score(weather, wave, moon, skill_level, beach_facing):
+    """配列化する前のcalculate_surf_score（評価理由を除いたもの）"""
+    score = 50
+    skill_ranges = {
+        '初心者': (0.5, 1.0),
+        '中級者': (1.0, 2.0),
+        '上級者': (2.0, 3.5)
+    }
+
+    wave_height = wave['wave_height']
+    min_h, max_h = skill_ranges.get(skill_level, (1.0, 2.0))
+    if min_h <= wave_height <= max_h:
+        score += 20
+    elif wave_height < min_h:
+        if wave_height < min_h * 0.5:
+            score -= 10
+        else:
+            score += 5
+    else:
+        if wave_height > 3.5:
+            score -= 20
+        elif wave_height > max_h:
+            score -= 10
+        else:
+            score += 10
+
+    wave_period = wave['wave_period']
+    if 8 <= wave_period <= 12:
+        score += 20
+    elif 6 <= wave_period < 8 or 12 < wave_period <= 14:
+        score += 10
+    elif 14 < wave_period <= 16:
+        score += 5
+    else:
+        score -= 10
+
+    relative_angle = (weather['wind_deg'] - beach_facing + 180) % 360
+    if 45 <= relative_angle <= 135:
+        score += 15
+    elif 135 < relative_angle <= 180 or 0 <= relative_angle < 45:
+        score += 10
+    elif 225 <= relative_angle <= 315:
+        score -= 15
+    else:
+        score -= 5
+
+    wind_speed = weather['wind_speed']
+    if wind_speed <= 3:
+        score += 10
+    elif wind_speed <= 5:
+        score += 8
+    elif wind_speed <= 8:
+        score += 3
+    elif wind_speed <= 10:
+        score -= 5
+    else:
+        score -= 10
+
+    if weather['rain'] == 0:
+        score += 5
+    elif weather['rain'] >= 2:
+        score -= 5
+
+    if moon['is_spring_tide']:
+        score += 5
+
+    return max(0, min(100, score))
+
+
+HEIGHTS = [0.0, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 3.5, 4.0]
+PERIODS = [4, 6, 8, 12, 13, 14, 15, 16, 18]
+WIND_DEGS = [0, 45, 90, 135, 180, 225, 270, 315, 359]
+WIND_SPEEDS = [0, 3, 4, 5, 8, 9, 10, 15]
+RAINS = [0, 1, 2, 5]
+SKILLS = ['初心者', '中級者', '上級者', '不明']
+
+
+def test_vectorized_score_matches_baseline():
+    grid = list(itertools.product(HEIGHTS, PERIODS, WIND_DEGS, WIND_SPEEDS, RAINS, [False, True]))
+    columns = [np.array(values) for values in zip(*grid)]
+    wave_height, wave_period, wind_deg, wind_speed, rain, spring = columns
+
+    for beach_facing in (90, 180):
+        # うねりのデータなし（NaN）では、うねりの向き・質は加点・減点しない
+        result = score_slots(
+            wave_height=wave_height, wave_period=wave_period, wind_speed=wind_speed, wind_deg=wind_deg, rain=rain,
+            beach_facing=beach_facing, is_spring_tide=spring, moon_phase='', skill_level=np.array(SKILLS)[:, None]
+        )
+        for row, skill in enumerate(SKILLS):
+            expected = [
+                baseline_score(
+                    {'wind_deg': deg, 'wind_speed': speed, 'rain': r},
+                    {'wave_height': height, 'wave_period': period},
+                    {'is_spring_tide': tide},
+                    skill, beach_facing
+                )
+                for height, period, deg, speed, r, tide in grid
+            ]
+            np.testing.assert_array_equal(result.score[row], expected)
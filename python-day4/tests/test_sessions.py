@@ -0,0 +1,68 @@
+"""セッション向きの時間帯（良い時間帯が続く区間）の検出"""
+from datetime import datetime, timedelta
+
+from services.sessions import find_windows
+
+
+def hours(count, start=0):
+    return [datetime(2025, 1, 1) + timedelta(hours=start + i) for i in range(count)]
+
+
+def spans(windows):
+    return [(window.start.hour, window.end.hour, window.hours) for window in windows]
+
+
+def test_runs_at_both_ends_are_found():
+    scores = [80, 75, 10, 10, 90, 70]
+    assert spans(find_windows(hours(6), scores)) == [(0, 2, 2.0), (4, 6, 2.0)]
+
+
+def test_threshold_is_inclusive():
+    assert spans(find_windows(hours(2), [70, 70])) == [(0, 2, 2.0)]
+    assert find_windows(hours(2), [69, 70]) == []
+
+
+def test_shorter_runs_are_dropped():
+    assert find_windows(hours(5), [80, 10, 80, 10, 80]) == []
+
+
+def test_gap_in_times_splits_a_run():
+    times = hours(2) + hours(2, start=5)
+    windows = find_windows(times, [80, 80, 80, 80])
+    assert spans(windows) == [(0, 2, 2.0), (5, 7, 2.0)]
+
+
+def test_best_and_mean_scores():
+    [window] = find_windows(hours(4), [50, 72, 95, 80])
+    assert (window.best_score, window.best_index) == (95, 2)
+    assert window.mean_score == (72 + 95 + 80) / 3
+
+
+def test_empty_input():
+    assert find_windows([], []) == []
+
+
+def three_hourly(count):
+    return [datetime(2025, 1, 1) + timedelta(hours=3 * i) for i in range(count)]
+
+
+def test_single_good_slot_is_not_a_session_in_either_mode():
+    scores = [10, 90, 10]
+    assert find_windows(hours(3), scores, min_hours=1) == []
+    # 3時間ごとでは1時間帯でMIN_SESSION_HOURS（2時間）を満たすが、単発の時間帯は区間にしない
+    assert find_windows(three_hourly(3), scores, step=timedelta(hours=3)) == []
+
+
+def test_two_slots_make_a_session_in_both_modes():
+    scores = [10, 90, 80, 10]
+    assert spans(find_windows(hours(4), scores)) == [(1, 3, 2.0)]
+    assert spans(find_windows(three_hourly(4), scores, step=timedelta(hours=3))) == [(3, 9, 6.0)]
+
+
+def test_min_hours_still_applies_to_hourly_slots():
+    assert find_windows(hours(4), [10, 90, 80, 10], min_hours=3) == []
+    assert spans(find_windows(hours(4), [90, 90, 80, 10], min_hours=3)) == [(0, 3, 3.0)]
+
+
+def test_min_slots_can_be_relaxed():
+    assert spans(find_windows(three_hourly(3), [10, 90, 10], step=timedelta(hours=3), min_slots=1)) == [(3, 6, 3.0)]
@@ -0,0 +1,87 @@
+"""スポットの読み込み（CSVの検証）と位置による検索"""
+import pytest
+
+from services.spots import Spot, SpotRegistry, haversine_km, read_spots
+
+HEADER = "name,lat,lon,facing,break_type,swell_direction,swell_window,tide_preference,description\n"
+
+
+def write_csv(tmp_path, rows):
+    path = tmp_path / "spots.csv"
+    path.write_text(HEADER + "".join(row + "\n" for row in rows), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def registry():
+    return SpotRegistry([
+        Spot("鵠沼", 35.3333, 139.4833, 180),
+        Spot("一宮", 35.3667, 140.4000, 90),
+        Spot("御前崎", 34.6000, 138.2167, 180),
+        Spot("フィジー", -17.8, 179.9, 200),
+        Spot("サモア", -13.8, -171.9, 180),
+    ])
+
+
+def test_read_spots_parses_optional_columns(tmp_path):
+    path = write_csv(tmp_path, [
+        "鵠沼,35.3333,139.4833,540,beach,200,40,mid,初心者向け",
+        "一宮,35.3667,140.4,90,,,,,",
+    ])
+    first, second = read_spots(path)
+    assert first.facing == 180 and first.swell_direction == 200 and first.swell_window == 40
+    assert second.break_type == "beach" and second.swell_direction is None and second.tide_preference == "any"
+
+
+@pytest.mark.parametrize("row, message", [
+    ("鵠沼,north,139.4,180,,,,,", "形式が正しくありません"),
+    (" ,35.3,139.4,180,,,,,", "スポット名が空です"),
+    ("鵠沼,95,139.4,180,,,,,", "範囲外"),
+    ("鵠沼,35.3,139.4,180,slab,,,,", "break_type"),
+    ("鵠沼,35.3,139.4,180,,,0,,", "swell_window"),
+    ("鵠沼,35.3,139.4,180,,,,spring,", "tide_preference"),
+])
+def test_bad_rows_report_file_and_line(tmp_path, row, message):
+    path = write_csv(tmp_path, ["一宮,35.3667,140.4,90,,,,,", row])
+    with pytest.raises(ValueError, match=message) as excinfo:
+        read_spots(path)
+    assert f"{path}:3:" in str(excinfo.value)
+
+
+def test_later_spots_override_earlier_ones():
+    registry = SpotRegistry([Spot("鵠沼", 35.0, 139.0, 180), Spot("一宮", 35.3, 140.4, 90), Spot("鵠沼", 35.3, 139.5, 200)])
+    assert registry.names() == ["一宮", "鵠沼"]
+    assert registry["鵠沼"].facing == 200
+
+
+def test_within_returns_spots_in_radius_nearest_first(registry):
+    found = registry.within(35.3, 139.5, 100)
+    assert [spot.name for spot, _ in found] == ["鵠沼", "一宮"]
+    distances = [distance for _, distance in found]
+    assert distances == sorted(distances) and distances[-1] <= 100
+    assert registry.within(35.3, 139.5, 1) == []
+
+
+def test_within_matches_brute_force(registry):
+    for radius in (50, 150, 500, 3000):
+        expected = {spot.name for spot in registry if haversine_km(35.0, 139.0, spot.lat, spot.lon) <= radius}
+        assert {spot.name for spot, _ in registry.within(35.0, 139.0, radius)} == expected
+
+
+def test_within_crosses_the_date_line(registry):
+    found = registry.within(-15.0, 180.0, 1000)
+    assert {spot.name for spot, _ in found} == {"フィジー", "サモア"}
+
+
+def test_nearest_expands_until_enough_spots(registry):
+    assert [spot.name for spot, _ in registry.nearest(35.35, 140.3)] == ["一宮"]
+    assert [spot.name for spot, _ in registry.nearest(35.35, 140.3, count=3)] == ["一宮", "鵠沼", "御前崎"]
+    # 遠く離れた地点からでも見つかる
+    assert [spot.name for spot, _ in registry.nearest(0.0, 0.0)] != []
+    assert len(registry.nearest(0.0, 0.0, count=10)) == len(registry)
+
+
+def test_empty_registry():
+    registry = SpotRegistry([])
+    assert registry.within(35.0, 139.0, 100) == []
+    assert registry.nearest(35.0, 139.0) == []